@@ -0,0 +1,40 @@
+"""learn queue
+
+Revision ID: 5b7d9e1f2a3c
+Revises: 1a2b3c4d5e6f
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "5b7d9e1f2a3c"
+down_revision = "1a2b3c4d5e6f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "learning_profiles",
+        sa.Column("learn_queue_built_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "learn_queue",
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("word_id", sa.BigInteger(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["profile_id"], ["learning_profiles.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["word_id"], ["words.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("profile_id", "word_id"),
+    )
+    op.create_index("ix_learn_queue_profile_position", "learn_queue", ["profile_id", "position"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_learn_queue_profile_position", table_name="learn_queue")
+    op.drop_table("learn_queue")
+    op.drop_column("learning_profiles", "learn_queue_built_at")
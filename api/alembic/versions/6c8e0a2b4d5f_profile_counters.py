@@ -0,0 +1,48 @@
+"""profile counters
+
+Revision ID: 6c8e0a2b4d5f
+Revises: 5b7d9e1f2a3c
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "6c8e0a2b4d5f"
+down_revision = "5b7d9e1f2a3c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "profile_counters",
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("known_words", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("learn_available", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["profile_id"], ["learning_profiles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("profile_id"),
+    )
+    op.create_table(
+        "profile_daily_stats",
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("learned", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("due", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["profile_id"], ["learning_profiles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("profile_id", "day"),
+    )
+    op.create_index(
+        "ix_user_words_profile_next_review",
+        "user_words",
+        ["profile_id", "next_review_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_words_profile_next_review", table_name="user_words")
+    op.drop_table("profile_daily_stats")
+    op.drop_table("profile_counters")
@@ -0,0 +1,39 @@
+"""drop response cache tables
+
+Revision ID: 7d9f1b3c5e6a
+Revises: 6c8e0a2b4d5f
+Create Date: 2026-10-17 13:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "7d9f1b3c5e6a"
+down_revision = "6c8e0a2b4d5f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_table("weak_words_cache")
+    op.drop_table("dashboard_cache")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "dashboard_cache",
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["profile_id"], ["learning_profiles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("profile_id"),
+    )
+    op.create_table(
+        "weak_words_cache",
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["profile_id"], ["learning_profiles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("profile_id"),
+    )
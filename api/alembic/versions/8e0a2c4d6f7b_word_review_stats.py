@@ -0,0 +1,71 @@
+"""word review stats
+
+Revision ID: 8e0a2c4d6f7b
+Revises: 7d9f1b3c5e6a
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "8e0a2c4d6f7b"
+down_revision = "7d9f1b3c5e6a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "word_review_stats",
+        sa.Column("profile_id", sa.UUID(), nullable=False),
+        sa.Column("word_id", sa.BigInteger(), nullable=False),
+        sa.Column("lemma", sa.String(length=255), nullable=False),
+        sa.Column("wrong_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("correct_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("accuracy", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("last_result", sa.String(length=16), nullable=True),
+        sa.Column("last_review_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["profile_id"], ["learning_profiles.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["word_id"], ["words.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("profile_id", "word_id"),
+    )
+    op.create_index(
+        "ix_word_review_stats_errors",
+        "word_review_stats",
+        ["profile_id", "wrong_count", sa.text("correct_count DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_word_review_stats_correct",
+        "word_review_stats",
+        ["profile_id", "correct_count", sa.text("wrong_count DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_word_review_stats_accuracy",
+        "word_review_stats",
+        ["profile_id", "accuracy", sa.text("wrong_count DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_word_review_stats_lemma",
+        "word_review_stats",
+        ["profile_id", "lemma"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_review_events_profile_word",
+        "review_events",
+        ["profile_id", "word_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_events_profile_word", table_name="review_events")
+    op.drop_index("ix_word_review_stats_lemma", table_name="word_review_stats")
+    op.drop_index("ix_word_review_stats_accuracy", table_name="word_review_stats")
+    op.drop_index("ix_word_review_stats_correct", table_name="word_review_stats")
+    op.drop_index("ix_word_review_stats_errors", table_name="word_review_stats")
+    op.drop_table("word_review_stats")
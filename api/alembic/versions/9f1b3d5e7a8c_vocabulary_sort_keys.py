@@ -0,0 +1,49 @@
+"""vocabulary sort keys on user_words
+
+Revision ID: 9f1b3d5e7a8c
+Revises: 8e0a2c4d6f7b
+Create Date: 2026-10-17 15:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "9f1b3d5e7a8c"
+down_revision = "8e0a2c4d6f7b"
+branch_labels = None
+depends_on = None
+
+VOCABULARY_INDEXES = {
+    "ix_user_words_vocab_errors": "wrong_count",
+    "ix_user_words_vocab_accuracy": "accuracy",
+    "ix_user_words_vocab_next_review": "next_review_at",
+    "ix_user_words_vocab_learned": "learned_at",
+    "ix_user_words_vocab_lemma": "lemma",
+}
+
+
+def upgrade() -> None:
+    op.add_column("user_words", sa.Column("lemma", sa.String(length=255, collation="C"), nullable=True))
+    op.add_column("user_words", sa.Column("wrong_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("user_words", sa.Column("correct_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("user_words", sa.Column("accuracy", sa.Float(), nullable=True))
+    op.execute(
+        "UPDATE user_words SET lemma = words.lemma FROM words WHERE words.id = user_words.word_id"
+    )
+    op.execute(
+        "UPDATE user_words SET wrong_count = s.wrong_count, correct_count = s.correct_count, "
+        "accuracy = s.accuracy FROM word_review_stats s "
+        "WHERE s.profile_id = user_words.profile_id AND s.word_id = user_words.word_id"
+    )
+    for name, column in VOCABULARY_INDEXES.items():
+        op.create_index(name, "user_words", ["profile_id", "status", column, "word_id"], unique=False)
+
+
+def downgrade() -> None:
+    for name in VOCABULARY_INDEXES:
+        op.drop_index(name, table_name="user_words")
+    op.drop_column("user_words", "accuracy")
+    op.drop_column("user_words", "correct_count")
+    op.drop_column("user_words", "wrong_count")
+    op.drop_column("user_words", "lemma")
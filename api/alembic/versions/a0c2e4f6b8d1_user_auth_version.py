@@ -0,0 +1,23 @@
+"""user auth version
+
+Revision ID: a0c2e4f6b8d1
+Revises: 9f1b3d5e7a8c
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a0c2e4f6b8d1"
+down_revision = "9f1b3d5e7a8c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("auth_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "auth_version")
@@ -0,0 +1,23 @@
+"""worker job metrics snapshot
+
+Revision ID: a6c8e0f2b4d7
+Revises: f5b7d9e1a3c6
+Create Date: 2026-10-17 23:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a6c8e0f2b4d7"
+down_revision = "f5b7d9e1a3c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("worker_heartbeats", sa.Column("metrics", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("worker_heartbeats", "metrics")
@@ -0,0 +1,44 @@
+"""email outbox
+
+Revision ID: b1d3f5a7c9e2
+Revises: a0c2e4f6b8d1
+Create Date: 2026-10-17 17:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "b1d3f5a7c9e2"
+down_revision = "a0c2e4f6b8d1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "notification_outbox",
+        "profile_id",
+        existing_type=postgresql.UUID(as_uuid=True),
+        nullable=True,
+    )
+    op.add_column("notification_outbox", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index(
+        "ix_notification_outbox_dispatch",
+        "notification_outbox",
+        ["status", "channel", "scheduled_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_outbox_dispatch", table_name="notification_outbox")
+    op.drop_column("notification_outbox", "attempts")
+    op.execute("DELETE FROM notification_outbox WHERE profile_id IS NULL")
+    op.alter_column(
+        "notification_outbox",
+        "profile_id",
+        existing_type=postgresql.UUID(as_uuid=True),
+        nullable=False,
+    )
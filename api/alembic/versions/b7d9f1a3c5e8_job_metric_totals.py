@@ -0,0 +1,31 @@
+"""monotonic job metric totals
+
+Revision ID: b7d9f1a3c5e8
+Revises: a6c8e0f2b4d7
+Create Date: 2026-10-17 23:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b7d9f1a3c5e8"
+down_revision = "a6c8e0f2b4d7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_metric_totals",
+        sa.Column("job_type", sa.String(length=32), nullable=False),
+        sa.Column("metrics", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("job_type"),
+    )
+    op.drop_column("worker_heartbeats", "metrics")
+
+
+def downgrade() -> None:
+    op.add_column("worker_heartbeats", sa.Column("metrics", sa.JSON(), nullable=True))
+    op.drop_table("job_metric_totals")
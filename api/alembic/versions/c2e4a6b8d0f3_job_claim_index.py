@@ -0,0 +1,29 @@
+"""job claim index
+
+Revision ID: c2e4a6b8d0f3
+Revises: b1d3f5a7c9e2
+Create Date: 2026-10-17 18:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c2e4a6b8d0f3"
+down_revision = "b1d3f5a7c9e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_background_jobs_claim",
+        "background_jobs",
+        ["job_type", "run_after", "id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_background_jobs_claim", table_name="background_jobs")
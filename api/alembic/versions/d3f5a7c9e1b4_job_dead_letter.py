@@ -0,0 +1,25 @@
+"""job dead letter
+
+Revision ID: d3f5a7c9e1b4
+Revises: c2e4a6b8d0f3
+Create Date: 2026-10-17 19:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d3f5a7c9e1b4"
+down_revision = "c2e4a6b8d0f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("background_jobs", sa.Column("errors", sa.JSON(), nullable=True))
+    op.execute("UPDATE background_jobs SET status = 'dead' WHERE status = 'failed'")
+
+
+def downgrade() -> None:
+    op.execute("UPDATE background_jobs SET status = 'failed' WHERE status = 'dead'")
+    op.drop_column("background_jobs", "errors")
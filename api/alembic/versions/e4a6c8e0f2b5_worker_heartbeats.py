@@ -0,0 +1,46 @@
+"""worker heartbeats and job leases
+
+Revision ID: e4a6c8e0f2b5
+Revises: d3f5a7c9e1b4
+Create Date: 2026-10-17 20:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e4a6c8e0f2b5"
+down_revision = "d3f5a7c9e1b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("background_jobs", sa.Column("worker_id", sa.String(length=64), nullable=True))
+    op.add_column("background_jobs", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_background_jobs_lease",
+        "background_jobs",
+        ["lease_expires_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'running'"),
+    )
+    op.create_table(
+        "worker_heartbeats",
+        sa.Column("worker_id", sa.String(length=64), nullable=False),
+        sa.Column("hostname", sa.String(length=255), nullable=False),
+        sa.Column("pid", sa.Integer(), nullable=False),
+        sa.Column("running", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("worker_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("worker_heartbeats")
+    op.drop_index("ix_background_jobs_lease", table_name="background_jobs")
+    op.drop_column("background_jobs", "lease_expires_at")
+    op.drop_column("background_jobs", "worker_id")
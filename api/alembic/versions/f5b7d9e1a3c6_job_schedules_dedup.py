@@ -0,0 +1,43 @@
+"""job dedup keys and periodic schedules
+
+Revision ID: f5b7d9e1a3c6
+Revises: e4a6c8e0f2b5
+Create Date: 2026-10-17 22:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f5b7d9e1a3c6"
+down_revision = "e4a6c8e0f2b5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("background_jobs", sa.Column("dedup_key", sa.String(length=128), nullable=True))
+    op.create_index(
+        "ux_background_jobs_dedup",
+        "background_jobs",
+        ["dedup_key"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+    op.create_table(
+        "job_schedules",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("job_type", sa.String(length=32), nullable=False),
+        sa.Column("cron", sa.String(length=64), nullable=False),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_job_id", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_schedules")
+    op.drop_index("ux_background_jobs_dedup", table_name="background_jobs")
+    op.drop_column("background_jobs", "dedup_key")
@@ -1,15 +1,23 @@
 ﻿from __future__ import annotations
 
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth import get_current_user
-from app.core.audit import log_audit_event
-from app.core.config import ADMIN_EMAILS
+from app.core.audit import audit_buffer, log_audit_event
+from app.core.auth_cache import auth_cache, bump_auth_version
+from app.core.config import ADMIN_EMAILS, JOB_HEARTBEAT_SECONDS
+from app.core.job_queue import requeue_dead_jobs
+from app.core.outbox import outbox_kicker
+from app.core.password_hashing import password_hasher
+from app.core.response_cache import response_cache
+from app.core.review_forecast import forecast_review_load
+from app.core.security import token_cache
+from app.core.word_index import word_index
 from app.db.session import get_db
 from app.models import (
     AuditLog,
@@ -20,8 +28,20 @@ from app.models import (
     NotificationOutbox,
     User,
     UserProfile,
+    WorkerHeartbeat,
 )
-from app.schemas.admin import AdminAuditOut, AdminSummaryOut, AdminUserOut, AdminUserUpdate
+from app.schemas.admin import (
+    AdminAuditOut,
+    AdminJobRequeue,
+    AdminJobRequeueOut,
+    AdminReviewForecastHour,
+    AdminReviewForecastOut,
+    AdminSummaryOut,
+    AdminUserOut,
+    AdminUserUpdate,
+    AdminWorkerOut,
+)
+from app.schemas.tech import ReviewForecastDay
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -100,13 +120,37 @@ async def get_admin_summary(
         jobs_pending=int(job_map.get("pending", 0) or 0),
         jobs_running=int(job_map.get("running", 0) or 0),
         jobs_done=int(job_map.get("done", 0) or 0),
-        jobs_failed=int(job_map.get("failed", 0) or 0),
+        jobs_failed=int(job_map.get("failed", 0) or 0) + int(job_map.get("dead", 0) or 0),
         notifications_pending=int(notification_map.get("pending", 0) or 0),
         notifications_sent=int(notification_map.get("sent", 0) or 0),
         notifications_failed=int(notification_map.get("failed", 0) or 0),
     )
 
 
+@router.get("/review-forecast", response_model=AdminReviewForecastOut)
+async def get_review_forecast(
+    days: int = 14,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> AdminReviewForecastOut:
+    ensure_admin(user)
+    if days < 1 or days > 90:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid days")
+    forecast = await forecast_review_load(db, days, datetime.now(timezone.utc))
+    return AdminReviewForecastOut(
+        profiles=forecast["profiles"],
+        words=forecast["words"],
+        days=[
+            ReviewForecastDay(date=day, count=count)
+            for day, count in zip(forecast["dates"], forecast["totals"])
+        ],
+        hours=[
+            AdminReviewForecastHour(review_hour=hour, peak=max(counts, default=0), total=sum(counts))
+            for hour, counts in forecast["by_hour"].items()
+        ],
+    )
+
+
 @router.get("/users", response_model=list[AdminUserOut])
 async def list_users(
     query: str | None = None,
@@ -168,17 +212,26 @@ async def update_user(
     if not target_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
+    auth_changed = False
+    revoke_tokens = False
     if data.is_active is not None:
         if target_user.id == admin_user.id and not data.is_active:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot deactivate own account")
+        auth_changed = auth_changed or target_user.is_active != data.is_active
+        revoke_tokens = revoke_tokens or (target_user.is_active and not data.is_active)
         target_user.is_active = data.is_active
 
     if data.email_verified is not None:
         if target_user.id == admin_user.id and not data.email_verified:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot unverify own account")
+        auth_changed = auth_changed or (target_user.email_verified_at is not None) != data.email_verified
+        revoke_tokens = revoke_tokens or (target_user.email_verified_at is not None and not data.email_verified)
         target_user.email_verified_at = (
             datetime.now(timezone.utc) if data.email_verified else None
         )
+    # Granting access keeps existing sessions; only taking it away revokes tokens.
+    if revoke_tokens:
+        bump_auth_version(target_user)
 
     interface_lang = ensure_lang(data.interface_lang)
     theme = ensure_theme(data.theme)
@@ -195,6 +248,8 @@ async def update_user(
             profile.theme = theme
 
     await db.commit()
+    if auth_changed:
+        auth_cache.invalidate(target_user.id)
 
     await log_audit_event(
         "admin.user.update",
@@ -259,3 +314,60 @@ async def list_audit_logs(
         )
         for log, email in result.fetchall()
     ]
+
+
+@router.post("/jobs/requeue", response_model=AdminJobRequeueOut)
+async def requeue_jobs(
+    data: AdminJobRequeue,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> AdminJobRequeueOut:
+    ensure_admin(user)
+    if data.job_ids is not None and not data.job_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty job_ids")
+    job_ids = await requeue_dead_jobs(db, job_type=data.job_type, job_ids=data.job_ids)
+    await log_audit_event(
+        "admin.jobs.requeue",
+        user_id=user.id,
+        meta={"job_type": data.job_type, "job_ids": job_ids},
+        db=db,
+    )
+    return AdminJobRequeueOut(requeued=len(job_ids), job_ids=job_ids)
+
+
+@router.get("/workers", response_model=list[AdminWorkerOut])
+async def list_workers(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> list[AdminWorkerOut]:
+    ensure_admin(user)
+    alive_after = datetime.now(timezone.utc) - timedelta(seconds=JOB_HEARTBEAT_SECONDS * 3)
+    result = await db.execute(select(WorkerHeartbeat).order_by(WorkerHeartbeat.started_at))
+    return [
+        AdminWorkerOut(
+            worker_id=row.worker_id,
+            hostname=row.hostname,
+            pid=row.pid,
+            running=row.running,
+            completed=row.completed,
+            failed=row.failed,
+            started_at=row.started_at,
+            last_seen_at=row.last_seen_at,
+            alive=row.last_seen_at >= alive_after,
+        )
+        for row in result.scalars().all()
+    ]
+
+
+@router.get("/runtime")
+async def runtime_stats(user: User = Depends(get_current_user)) -> dict:
+    ensure_admin(user)
+    return {
+        "password_hasher": password_hasher.stats(),
+        "audit": audit_buffer.stats(),
+        "outbox": outbox_kicker.stats(),
+        "auth_cache": auth_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "word_index": word_index.stats(),
+    }
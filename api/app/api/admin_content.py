@@ -9,11 +9,18 @@ from sqlalchemy.orm import aliased
 from app.api.auth import get_current_user
 from app.core.audit import log_audit_event
 from app.core.config import ADMIN_EMAILS
+from app.core.learn_queue import invalidate_learn_queues
+from app.core.profile_counters import invalidate_profile_counters, profiles_with_words
+from app.core.review_stats import rebuild_review_stats
+from app.core.translation_cache import translation_cache
+from app.core.vocabulary import propagate_lemma, word_lemma
+from app.core.word_index import word_index
 from app.db.session import get_db
 from app.models import (
     ContentReport,
     Corpus,
     CorpusWordStat,
+    LearnQueueItem,
     ReviewEvent,
     Translation,
     User,
@@ -239,6 +246,12 @@ async def merge_words(db: AsyncSession, source_id: int, target_id: int) -> None:
     if source_id == target_id:
         return
 
+    await invalidate_learn_queues(
+        db,
+        select(LearnQueueItem.profile_id).where(LearnQueueItem.word_id.in_([source_id, target_id])),
+    )
+    await invalidate_profile_counters(db, profiles_with_words([source_id, target_id]))
+
     t_src = aliased(Translation)
     t_tgt = aliased(Translation)
     dup_result = await db.execute(
@@ -338,7 +351,7 @@ async def merge_words(db: AsyncSession, source_id: int, target_id: int) -> None:
                 )
             )
         )
-        .values(word_id=target_id)
+        .values(word_id=target_id, lemma=word_lemma(target_id))
     )
     user_source = aliased(UserWord)
     user_target = aliased(UserWord)
@@ -358,6 +371,7 @@ async def merge_words(db: AsyncSession, source_id: int, target_id: int) -> None:
     await db.execute(
         update(ReviewEvent).where(ReviewEvent.word_id == source_id).values(word_id=target_id)
     )
+    await rebuild_review_stats(db, word_ids=[source_id, target_id])
     await db.execute(
         update(ContentReport).where(ContentReport.word_id == source_id).values(word_id=target_id)
     )
@@ -394,7 +408,10 @@ async def update_word(
     existing_word = existing.scalar_one_or_none()
     if existing_word:
         await merge_words(db, word.id, existing_word.id)
+        await word_index.queue_rebuild(db, user.id)
         await db.commit()
+        translation_cache.invalidate_words([word.id, existing_word.id])
+        translation_cache.invalidate_custom()
         await log_audit_event(
             "admin.word.merge",
             user_id=user.id,
@@ -405,6 +422,7 @@ async def update_word(
         return AdminWordOut(id=existing_word.id, lemma=existing_word.lemma, lang=existing_word.lang)
 
     word.lemma = lemma
+    await propagate_lemma(word.id, lemma, db)
     try:
         await db.commit()
     except IntegrityError as exc:
@@ -455,6 +473,7 @@ async def update_translation(
     except IntegrityError as exc:
         await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Translation already exists") from exc
+    translation_cache.invalidate_words([translation.word_id])
 
     await log_audit_event(
         "admin.translation.update",
@@ -483,8 +502,12 @@ async def delete_word(
     if word is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Word not found")
 
+    await invalidate_profile_counters(db, profiles_with_words([word_id]))
     await db.delete(word)
+    await word_index.queue_rebuild(db, user.id)
     await db.commit()
+    translation_cache.invalidate_words([word_id])
+    translation_cache.invalidate_custom()
 
     await log_audit_event(
         "admin.word.delete",
@@ -508,8 +531,13 @@ async def delete_translation(
     if translation is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Translation not found")
 
+    await invalidate_profile_counters(
+        db,
+        select(UserWord.profile_id).where(UserWord.word_id == translation.word_id),
+    )
     await db.delete(translation)
     await db.commit()
+    translation_cache.invalidate_words([translation.word_id])
 
     await log_audit_event(
         "admin.translation.delete",
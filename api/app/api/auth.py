@@ -1,33 +1,27 @@
 import hashlib
 import secrets
-import smtplib
 import uuid
 from datetime import datetime, timedelta, timezone
-from email.message import EmailMessage
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit import log_audit_event
+from app.core.auth_cache import AuthState, auth_cache, bump_auth_version
 from app.core.config import (
     API_BASE_URL,
     APP_BASE_URL,
     ADMIN_EMAILS,
     JWT_SECRET,
-    SMTP_FROM,
-    SMTP_HOST,
-    SMTP_PASSWORD,
-    SMTP_PORT,
-    SMTP_TLS,
-    SMTP_USER,
 )
-from app.core.security import create_access_token, decode_access_token, hash_password, verify_password
+from app.core.outbox import outbox_kicker, queue_email
+from app.core.password_hashing import password_hasher
+from app.core.security import bearer_token, create_access_token, decode_access_claims
 from app.db.session import get_db
-from app.models import AuthToken, LearningProfile, User, UserProfile
+from app.models import AuthToken, LearningProfile, User, UserProfile, UserSettings
 from app.schemas.auth import (
     EmailRequest,
     LoginRequest,
@@ -62,37 +56,6 @@ def build_reset_link(token: str) -> str:
     return build_link(APP_BASE_URL, "/auth/reset", token)
 
 
-def ensure_smtp_configured() -> None:
-    if not SMTP_HOST or not SMTP_FROM:
-        raise RuntimeError("SMTP not configured")
-
-
-def send_email_message(to_email: str, subject: str, body: str) -> None:
-    ensure_smtp_configured()
-    message = EmailMessage()
-    message["Subject"] = subject
-    message["From"] = SMTP_FROM
-    message["To"] = to_email
-    message.set_content(body)
-    if SMTP_TLS:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            if SMTP_USER:
-                server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(message)
-    else:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
-            if SMTP_USER:
-                server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(message)
-
-
-async def send_email_async(to_email: str, subject: str, body: str) -> None:
-    await run_in_threadpool(send_email_message, to_email, subject, body)
-
-
 def build_verify_email(link: str) -> tuple[str, str]:
     subject = "Confirm your email"
     body = (
@@ -186,6 +149,7 @@ async def verify_email_token(db: AsyncSession, token: str) -> User:
         auth_token.used_at = now
     user.email_verified_at = now
     await db.commit()
+    auth_cache.invalidate(user.id)
     return user
 
 
@@ -228,26 +192,134 @@ async def get_active_learning_profile(
     return learning_profile
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    token = credentials.credentials
-    subject = decode_access_token(token)
+class RequestContext:
+    def __init__(
+        self,
+        user: User,
+        user_profile: UserProfile | None,
+        learning_profile: LearningProfile | None,
+        settings: UserSettings | None,
+    ) -> None:
+        self.user = user
+        self.user_profile = user_profile
+        self.learning_profile = learning_profile
+        self.settings = settings
+
+    @property
+    def interface_lang(self) -> str:
+        if self.user_profile is None:
+            return "ru"
+        return self.user_profile.interface_lang or "ru"
+
+    def require_profile(self) -> LearningProfile:
+        if self.learning_profile is None or not self.learning_profile.onboarding_done:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Onboarding required")
+        return self.learning_profile
+
+    async def ensure_settings(self, db: AsyncSession) -> UserSettings:
+        profile = self.require_profile()
+        if self.settings is None:
+            self.settings = UserSettings(profile_id=profile.id, user_id=self.user.id)
+            db.add(self.settings)
+            await db.commit()
+        return self.settings
+
+
+async def load_request_context(user_id: uuid.UUID, db: AsyncSession) -> RequestContext | None:
+    result = await db.execute(
+        select(User, UserProfile, LearningProfile, UserSettings)
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+        .outerjoin(
+            LearningProfile,
+            and_(LearningProfile.id == UserProfile.active_profile_id, LearningProfile.user_id == User.id),
+        )
+        .outerjoin(UserSettings, UserSettings.profile_id == LearningProfile.id)
+        .where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return RequestContext(*row)
+
+
+def decode_token_claims(token: str) -> tuple[uuid.UUID, int]:
+    subject, auth_version = decode_access_claims(token)
     try:
-        user_id = uuid.UUID(subject)
+        return uuid.UUID(subject), auth_version
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    if not user.is_active:
+
+def authenticate_request(request: Request) -> None:
+    token = bearer_token(request.headers.get("authorization"))
+    claims = None
+    if token is not None:
+        try:
+            claims = decode_token_claims(token)
+        except HTTPException:
+            claims = None
+    request.state.auth_token = token
+    request.state.auth_claims = claims
+
+
+def request_token_claims(request: Request, token: str) -> tuple[uuid.UUID, int]:
+    claims = getattr(request.state, "auth_claims", None)
+    if claims is not None and getattr(request.state, "auth_token", None) == token:
+        return claims
+    return decode_token_claims(token)
+
+
+def ensure_auth_state(state: AuthState, token_version: int) -> None:
+    if state.auth_version != token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    if not state.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User inactive")
-    if user.email_verified_at is None:
+    if state.email_verified_at is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email not verified")
-    return user
+
+
+async def get_request_context(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> RequestContext:
+    context = getattr(request.state, "context", None)
+    if context is not None:
+        return context
+
+    user_id, token_version = request_token_claims(request, credentials.credentials)
+    cache_version = auth_cache.version
+    context = await load_request_context(user_id, db)
+    if context is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    state = AuthState.from_user(context.user)
+    auth_cache.set(state, cache_version)
+    ensure_auth_state(state, token_version)
+    request.state.context = context
+    return context
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    context = getattr(request.state, "context", None)
+    if context is not None:
+        return context.user
+
+    user_id, token_version = request_token_claims(request, credentials.credentials)
+    state = auth_cache.get(user_id)
+    if state is None or state.auth_version < token_version:
+        cache_version = auth_cache.version
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        state = AuthState.from_user(user)
+        auth_cache.set(state, cache_version)
+    ensure_auth_state(state, token_version)
+    return state.to_user()
 
 
 @router.post("/register", response_model=TokenOut)
@@ -269,7 +341,7 @@ async def register(
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    user = User(email=email, hashed_password=hash_password(data.password))
+    user = User(email=email, hashed_password=await password_hasher.hash(data.password))
     db.add(user)
     await db.flush()
 
@@ -279,16 +351,13 @@ async def register(
     verify_token = await create_auth_token(db, user.id, "verify", VERIFY_TOKEN_HOURS)
     verify_link = build_verify_link(verify_token)
     subject, body = build_verify_email(verify_link)
-    try:
-        await send_email_async(email, subject, body)
-    except Exception as exc:
-        await db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Email delivery failed") from exc
+    queue_email(db, user.id, email, "verify", subject, body)
 
     await db.commit()
+    outbox_kicker.kick()
 
     await log_audit_event("auth.register", user_id=user.id, request=request, db=db)
-    token = create_access_token(user.id)
+    token = create_access_token(user.id, user.auth_version or 0)
     return TokenOut(access_token=token, email_verified=False)
 
 
@@ -303,7 +372,7 @@ async def login(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email and password required")
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user or not await password_hasher.verify(data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     interface_lang = ensure_lang(data.interface_lang)
@@ -317,7 +386,7 @@ async def login(
 
     await db.commit()
     await log_audit_event("auth.login", user_id=user.id, request=request, db=db)
-    token = create_access_token(user.id)
+    token = create_access_token(user.id, user.auth_version or 0)
     return TokenOut(access_token=token, email_verified=user.email_verified_at is not None)
 
 
@@ -338,13 +407,10 @@ async def request_verify(
     verify_token = await create_auth_token(db, user.id, "verify", VERIFY_TOKEN_HOURS)
     verify_link = build_verify_link(verify_token)
     subject, body = build_verify_email(verify_link)
-    try:
-        await send_email_async(email, subject, body)
-    except Exception as exc:
-        await db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Email delivery failed") from exc
+    queue_email(db, user.id, email, "verify", subject, body)
 
     await db.commit()
+    outbox_kicker.kick()
     await log_audit_event("auth.verify.request", user_id=user.id, request=request, db=db)
     return {"status": "ok"}
 
@@ -393,13 +459,10 @@ async def request_password_reset(
     reset_token = await create_auth_token(db, user.id, "reset", RESET_TOKEN_HOURS)
     reset_link = build_reset_link(reset_token)
     subject, body = build_reset_email(reset_link)
-    try:
-        await send_email_async(email, subject, body)
-    except Exception as exc:
-        await db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Email delivery failed") from exc
+    queue_email(db, user.id, email, "reset", subject, body)
 
     await db.commit()
+    outbox_kicker.kick()
     await log_audit_event("auth.reset.request", user_id=user.id, request=request, db=db)
     return {"status": "ok"}
 
@@ -419,11 +482,13 @@ async def reset_password(
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token")
 
-    user.hashed_password = hash_password(data.new_password)
+    user.hashed_password = await password_hasher.hash(data.new_password)
     if user.email_verified_at is None:
         user.email_verified_at = datetime.now(timezone.utc)
+    bump_auth_version(user)
 
     await db.commit()
+    auth_cache.invalidate(user.id)
     await log_audit_event("auth.reset", user_id=user.id, request=request, db=db)
     return {"status": "ok"}
 
@@ -5,9 +5,12 @@ from sqlalchemy import delete, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.auth import get_active_learning_profile, get_current_user
+from app.api.auth import RequestContext, get_request_context
+from app.core.profile_counters import apply_counter_delta, snapshot_counters
+from app.core.response_cache import response_cache
+from app.core.translation_cache import translation_cache
 from app.db.session import get_db
-from app.models import User, UserCustomWord, UserWord, Word
+from app.models import UserCustomWord, UserWord, Word
 from app.schemas.custom_words import (
     CustomWordIn,
     CustomWordOut,
@@ -48,19 +51,15 @@ def parse_import(text: str) -> tuple[list[tuple[str, str]], int, int]:
     return entries, total_lines, invalid_lines
 
 
-async def load_profile(user_id, db: AsyncSession):
-    return await get_active_learning_profile(user_id, db, require_onboarding=True)
-
-
 @router.get("/custom-words", response_model=list[CustomWordOut])
 async def list_custom_words(
     limit: int = 50,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> list[CustomWordOut]:
     if limit < 1 or limit > 200:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limit")
-    profile = await load_profile(user.id, db)
+    profile = context.require_profile()
 
     result = await db.execute(
         select(UserCustomWord.word_id, Word.lemma, UserCustomWord.translation, UserCustomWord.created_at)
@@ -87,10 +86,11 @@ async def list_custom_words(
 @router.post("/custom-words", response_model=CustomWordOut)
 async def add_custom_word(
     data: CustomWordIn,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> CustomWordOut:
-    profile = await load_profile(user.id, db)
+    user = context.user
+    profile = context.require_profile()
 
     word = normalize_text(data.word)
     translation = normalize_text(data.translation)
@@ -117,6 +117,7 @@ async def add_custom_word(
     if learned_result.scalar_one_or_none() is not None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Word already learned")
 
+    counter_delta = await snapshot_counters(profile, [word_id], db, sign=-1)
     stmt = insert(UserCustomWord).values(
         profile_id=profile.id,
         user_id=user.id,
@@ -129,7 +130,11 @@ async def add_custom_word(
         set_={"translation": stmt.excluded.translation},
     )
     await db.execute(stmt)
+    await snapshot_counters(profile, [word_id], db, delta=counter_delta)
+    await apply_counter_delta(profile.id, counter_delta, db)
     await db.commit()
+    translation_cache.invalidate_profile(profile.id)
+    await response_cache.invalidate_profile(profile.id)
 
     row_result = await db.execute(
         select(UserCustomWord).where(
@@ -152,10 +157,11 @@ async def add_custom_word(
 async def update_custom_word(
     word_id: int,
     data: CustomWordIn,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> CustomWordOut:
-    profile = await load_profile(user.id, db)
+    user = context.user
+    profile = context.require_profile()
 
     word = normalize_text(data.word)
     translation = normalize_text(data.translation)
@@ -213,6 +219,8 @@ async def update_custom_word(
         if learned_new.scalar_one_or_none() is not None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Word already learned")
 
+        affected_ids = [custom_word.word_id, new_word_id]
+        counter_delta = await snapshot_counters(profile, affected_ids, db, sign=-1)
         stmt = insert(UserCustomWord).values(
             profile_id=profile.id,
             user_id=user.id,
@@ -227,7 +235,11 @@ async def update_custom_word(
         await db.execute(stmt)
         if new_word_id != custom_word.word_id:
             await db.execute(delete(UserCustomWord).where(UserCustomWord.id == custom_word.id))
+        await snapshot_counters(profile, affected_ids, db, delta=counter_delta)
+        await apply_counter_delta(profile.id, counter_delta, db)
         await db.commit()
+        translation_cache.invalidate_profile(profile.id)
+        await response_cache.invalidate_profile(profile.id)
 
         updated_result = await db.execute(
             select(UserCustomWord).where(
@@ -246,6 +258,8 @@ async def update_custom_word(
 
     custom_word.translation = translation
     await db.commit()
+    translation_cache.invalidate_profile(profile.id)
+    await response_cache.invalidate_profile(profile.id)
     return CustomWordOut(
         word_id=custom_word.word_id,
         word=word,
@@ -257,10 +271,11 @@ async def update_custom_word(
 @router.delete("/custom-words/{word_id}")
 async def delete_custom_word(
     word_id: int,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
-    profile = await load_profile(user.id, db)
+    profile = context.require_profile()
+    counter_delta = await snapshot_counters(profile, [word_id], db, sign=-1)
     result = await db.execute(
         delete(UserCustomWord).where(
             UserCustomWord.profile_id == profile.id,
@@ -270,17 +285,22 @@ async def delete_custom_word(
     )
     if result.rowcount == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Custom word not found")
+    await snapshot_counters(profile, [word_id], db, delta=counter_delta)
+    await apply_counter_delta(profile.id, counter_delta, db)
     await db.commit()
+    translation_cache.invalidate_profile(profile.id)
+    await response_cache.invalidate_profile(profile.id)
     return {"deleted": True}
 
 
 @router.post("/custom-words/import", response_model=CustomWordsImportOut)
 async def import_custom_words(
     data: CustomWordsImportRequest,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> CustomWordsImportOut:
-    profile = await load_profile(user.id, db)
+    user = context.user
+    profile = context.require_profile()
     entries, total_lines, invalid_lines = parse_import(data.text or "")
     if not entries:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No valid lines found")
@@ -314,6 +334,7 @@ async def import_custom_words(
     existing_map = {row.word_id: row.translation for row in existing_result.fetchall()}
 
     rows = []
+    new_word_ids = []
     inserted = 0
     updated = 0
     skipped = 0
@@ -324,6 +345,7 @@ async def import_custom_words(
         existing_translation = existing_map.get(word_id)
         if existing_translation is None:
             inserted += 1
+            new_word_ids.append(word_id)
         elif existing_translation == translation:
             skipped += 1
         else:
@@ -339,14 +361,19 @@ async def import_custom_words(
         )
 
     if rows:
+        counter_delta = await snapshot_counters(profile, new_word_ids, db, sign=-1)
         stmt = insert(UserCustomWord).values(rows)
         stmt = stmt.on_conflict_do_update(
             index_elements=["profile_id", "word_id", "target_lang"],
             set_={"translation": stmt.excluded.translation},
         )
         await db.execute(stmt)
+        await snapshot_counters(profile, new_word_ids, db, delta=counter_delta)
+        await apply_counter_delta(profile.id, counter_delta, db)
 
     await db.commit()
+    translation_cache.invalidate_profile(profile.id)
+    await response_cache.invalidate_profile(profile.id)
 
     return CustomWordsImportOut(
         total_lines=total_lines,
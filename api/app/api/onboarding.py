@@ -9,6 +9,10 @@ from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth import get_active_learning_profile, get_current_user
+from app.core.learn_queue import consume_learn_queue, rebuild_learn_queue
+from app.core.profile_counters import rebuild_profile_counters, record_inserted_words
+from app.core.response_cache import response_cache
+from app.core.word_index import word_index
 from app.db.session import get_db
 from app.models import (
     Corpus,
@@ -23,6 +27,7 @@ from app.models import (
     Translation,
 )
 from app.schemas.onboarding import (
+    CorpusCoverageOut,
     CorpusOut,
     CorpusPreviewOut,
     CorpusPreviewWordOut,
@@ -37,6 +42,8 @@ from app.schemas.onboarding import (
 router = APIRouter(tags=["onboarding"])
 
 LANG_CODES = {"ru", "en"}
+DEFAULT_COVERAGE_LIMITS = "500,1000,2000,3000,5000,10000"
+MAX_COVERAGE_LIMITS = 20
 
 
 def normalize_lang(value: str | None) -> str | None:
@@ -177,6 +184,38 @@ async def preview_corpus(
     return CorpusPreviewOut(corpus_id=corpus_id, words=words)
 
 
+@router.get("/corpora/{corpus_id}/coverage", response_model=CorpusCoverageOut)
+async def corpus_coverage(
+    corpus_id: int,
+    limits: str = DEFAULT_COVERAGE_LIMITS,
+    source_lang: str | None = None,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> CorpusCoverageOut:
+    try:
+        limit_values = [int(item) for item in limits.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limits")
+    if not limit_values or len(limit_values) > MAX_COVERAGE_LIMITS or min(limit_values) < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limits")
+
+    learning_profile = await get_active_learning_profile(user.id, db, require_onboarding=False)
+    source_lang = normalize_lang(source_lang) if source_lang else None
+    if source_lang is None and learning_profile is not None:
+        source_lang = learning_profile.native_lang
+    if not source_lang:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Language required")
+
+    coverage = await word_index.corpus_coverage(
+        learning_profile.id if learning_profile else None,
+        corpus_id,
+        source_lang,
+        limit_values,
+        db,
+    )
+    return CorpusCoverageOut(corpus_id=corpus_id, lang=source_lang, **coverage)
+
+
 @router.get("/corpora", response_model=list[CorpusOut])
 async def list_corpora(
     source_lang: str | None = None,
@@ -297,7 +336,11 @@ async def apply_onboarding(
             )
         )
 
+    await db.flush()
+    await rebuild_learn_queue(learning_profile, db)
+    await rebuild_profile_counters(learning_profile, db)
     await db.commit()
+    await response_cache.invalidate_profile(learning_profile.id)
     return OnboardingOut()
 
 
@@ -328,20 +371,25 @@ async def import_known_words(
             "profile_id": profile.id,
             "user_id": user.id,
             "word_id": word_id,
+            "lemma": lemma,
             "status": "known",
             "stage": 0,
             "learned_at": now,
             "next_review_at": now,
         }
-        for word_id in word_id_map.values()
+        for lemma, word_id in word_id_map.items()
     ]
     inserted = 0
     if rows:
         stmt = insert(UserWord).values(rows)
-        stmt = stmt.on_conflict_do_nothing(index_elements=["profile_id", "word_id"])
+        stmt = stmt.on_conflict_do_nothing(index_elements=["profile_id", "word_id"]).returning(UserWord.word_id)
         result = await db.execute(stmt)
-        inserted = result.rowcount or 0
+        inserted_ids = [row.word_id for row in result.fetchall()]
+        inserted = len(inserted_ids)
+        await consume_learn_queue(profile.id, list(word_id_map.values()), db)
+        await record_inserted_words(profile, inserted_ids, db)
         await db.commit()
+        await response_cache.invalidate_profile(profile.id)
 
     words_found = len(word_id_map)
     words_missing = len(unique_lemmas) - words_found
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth import get_current_user
 from app.core.audit import log_audit_event
+from app.core.auth_cache import auth_cache
 from app.db.session import get_db
 from app.models import User, UserProfile
 from app.schemas.profile import ProfileOut, ProfileUpdateRequest
@@ -83,4 +84,5 @@ async def delete_profile(
     await log_audit_event("auth.delete", user_id=user.id, request=request, db=db)
     await db.execute(delete(User).where(User.id == user.id))
     await db.commit()
+    auth_cache.invalidate(user.id)
     return {"deleted": True}
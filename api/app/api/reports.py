@@ -9,9 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.auth import get_active_learning_profile, get_current_user
 from app.core.audit import log_audit_event
 from app.core.config import ADMIN_EMAILS, ADMIN_TELEGRAM_CHAT_IDS
+from app.core.job_queue import enqueue
 from app.db.session import get_db
 from app.models import (
-    BackgroundJob,
     ContentReport,
     Corpus,
     CorpusWordStat,
@@ -95,15 +95,7 @@ async def enqueue_report_notification(
     profile_id,
     db: AsyncSession,
 ) -> None:
-    job = BackgroundJob(
-        job_type="send_report_notifications",
-        status="pending",
-        payload={"report_id": report_id},
-        user_id=user_id,
-        profile_id=profile_id,
-        run_after=datetime.now(timezone.utc),
-    )
-    db.add(job)
+    await enqueue(db, "send_report_notifications", {"report_id": report_id}, user_id, profile_id)
     await db.commit()
 
 
@@ -10,7 +10,7 @@ from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 
-from app.api.auth import get_active_learning_profile, get_current_user
+from app.api.auth import RequestContext, get_current_user, get_request_context
 from app.db.session import get_db
 from app.models import (
     ChatMessage,
@@ -586,7 +586,7 @@ async def compute_challenge_progress(
 @router.post("/challenges/start", response_model=UserChallengeOut)
 async def start_challenge(
     data: ChallengeStartRequest,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> UserChallengeOut:
     key = data.challenge_key
@@ -594,7 +594,8 @@ async def start_challenge(
     if not definition:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
 
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
 
     existing_result = await db.execute(
         select(UserChallenge).where(
@@ -637,10 +638,11 @@ async def start_challenge(
 
 @router.get("/challenges/my", response_model=list[UserChallengeOut])
 async def my_challenges(
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> list[UserChallengeOut]:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
     rows = (
         await db.execute(
             select(UserChallenge)
@@ -1241,14 +1243,15 @@ async def list_group_challenges(
 @router.post("/group-challenges", response_model=GroupChallengeOut)
 async def create_group_challenge(
     data: GroupChallengeCreateRequest,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> GroupChallengeOut:
     definition = CHALLENGES.get(data.challenge_key)
     if not definition:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
 
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
 
     code = await generate_invite_code(db)
     now = datetime.now(timezone.utc)
@@ -1291,7 +1294,7 @@ async def create_group_challenge(
 @router.post("/group-challenges/join", response_model=GroupChallengeOut)
 async def join_group_challenge(
     data: GroupChallengeJoinRequest,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> GroupChallengeOut:
     code = (data.invite_code or "").strip().upper()
@@ -1309,7 +1312,8 @@ async def join_group_challenge(
     if group.ends_at and now > group.ends_at:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Challenge expired")
 
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
     existing_member = await db.execute(
         select(GroupChallengeMember).where(
             GroupChallengeMember.group_id == group.id,
@@ -1,108 +1,160 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import and_, case, func, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.auth import get_current_user
-from app.api.study import fetch_user_translation_map, load_profile_settings
+from app.api.auth import RequestContext, get_request_context
+from app.api.study import fetch_user_translation_map
+from app.core.response_cache import response_cache
+from app.core.review_stats import WEAK_WORD_SORTS, weak_word_order
+from app.core.vocabulary import (
+    DEFAULT_ORDERS,
+    VOCABULARY_SORTS,
+    WORD_STATUSES,
+    InvalidCursor,
+    browse_vocabulary,
+)
 from app.db.session import get_db
-from app.models import ReviewEvent, User, UserWord, WeakWordsCache, Word
-from app.schemas.stats import WeakWordOut, WeakWordsOut
+from app.models import LearningProfile, UserWord, WordReviewStat
+from app.schemas.stats import VocabularyPageOut, VocabularyWordOut, WeakWordOut, WeakWordsOut
 
 router = APIRouter(tags=["stats"])
 DEFAULT_LIMIT = 20
 CACHE_TTL_SECONDS = 120
+VOCABULARY_PAGE_SIZE = 50
 
 
 @router.get("/stats/weak-words", response_model=WeakWordsOut)
 async def weak_words(
     limit: int = DEFAULT_LIMIT,
+    sort: str = "wrong",
+    order: str | None = None,
     refresh: bool = False,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> WeakWordsOut:
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limit")
+    if sort not in WEAK_WORD_SORTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sort")
+    if order is None:
+        order = "asc" if sort == "alpha" else "desc"
+    if order not in {"asc", "desc"}:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid order")
 
-    profile, _settings = await load_profile_settings(user.id, db)
-
-    now = datetime.now(timezone.utc)
-    if not refresh and limit == DEFAULT_LIMIT:
-        cache_result = await db.execute(
-            select(WeakWordsCache).where(WeakWordsCache.profile_id == profile.id)
-        )
-        cache = cache_result.scalar_one_or_none()
-        if cache and cache.updated_at and now - cache.updated_at <= timedelta(seconds=CACHE_TTL_SECONDS):
-            return WeakWordsOut(**cache.data)
+    profile = context.require_profile()
 
-    stats_subq = (
-        select(
-            ReviewEvent.word_id.label("word_id"),
-            func.sum(case((ReviewEvent.result == "wrong", 1), else_=0)).label("wrong_count"),
-            func.sum(case((ReviewEvent.result == "correct", 1), else_=0)).label("correct_count"),
-        )
-        .where(ReviewEvent.profile_id == profile.id)
-        .group_by(ReviewEvent.word_id)
-        .subquery()
+    data = await response_cache.get_or_set(
+        "weak_words",
+        profile.id,
+        lambda: load_weak_words(profile, limit, sort, order, db),
+        CACHE_TTL_SECONDS,
+        variant=f"{limit}:{sort}:{order}",
+        refresh=refresh,
     )
+    return WeakWordsOut(**data)
+
 
-    total_result = await db.execute(select(func.count()).select_from(stats_subq))
+async def load_weak_words(profile: LearningProfile, limit: int, sort: str, order: str, db: AsyncSession) -> dict:
+    total_result = await db.execute(
+        select(func.count()).select_from(WordReviewStat).where(WordReviewStat.profile_id == profile.id)
+    )
     total_count = int(total_result.scalar_one() or 0)
 
     stmt = (
         select(
-            stats_subq.c.word_id,
-            stats_subq.c.wrong_count,
-            stats_subq.c.correct_count,
-            Word.lemma,
+            WordReviewStat.word_id,
+            WordReviewStat.lemma,
+            WordReviewStat.wrong_count,
+            WordReviewStat.correct_count,
+            WordReviewStat.accuracy,
             UserWord.learned_at,
             UserWord.next_review_at,
         )
-        .select_from(stats_subq)
-        .join(Word, Word.id == stats_subq.c.word_id)
         .join(
             UserWord,
-            and_(UserWord.profile_id == profile.id, UserWord.word_id == stats_subq.c.word_id),
+            and_(UserWord.profile_id == WordReviewStat.profile_id, UserWord.word_id == WordReviewStat.word_id),
         )
-        .order_by(stats_subq.c.wrong_count.desc(), stats_subq.c.correct_count.asc())
+        .where(WordReviewStat.profile_id == profile.id)
+        .order_by(*weak_word_order(sort, order))
         .limit(limit)
     )
     rows = (await db.execute(stmt)).all()
     word_ids = [row.word_id for row in rows]
     translation_map = await fetch_user_translation_map(profile.id, word_ids, profile.target_lang, db)
 
-    results = []
-    for row in rows:
-        attempts = (row.correct_count or 0) + (row.wrong_count or 0)
-        accuracy = round((row.correct_count or 0) / attempts, 3) if attempts else 0.0
-        results.append(
-            WeakWordOut(
+    results = [
+        WeakWordOut(
+            word_id=row.word_id,
+            word=row.lemma,
+            translations=translation_map.get(row.word_id, []),
+            wrong_count=int(row.wrong_count or 0),
+            correct_count=int(row.correct_count or 0),
+            accuracy=round(row.accuracy or 0.0, 3),
+            learned_at=row.learned_at,
+            next_review_at=row.next_review_at,
+        )
+        for row in rows
+    ]
+
+    return jsonable_encoder(WeakWordsOut(total=total_count, items=results))
+
+
+@router.get("/stats/vocabulary", response_model=VocabularyPageOut)
+async def vocabulary(
+    sort: str = "lemma",
+    order: str | None = None,
+    status_filter: str | None = Query(default=None, alias="status"),
+    corpus_id: int | None = None,
+    limit: int = VOCABULARY_PAGE_SIZE,
+    cursor: str | None = None,
+    context: RequestContext = Depends(get_request_context),
+    db: AsyncSession = Depends(get_db),
+) -> VocabularyPageOut:
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limit")
+    if sort not in VOCABULARY_SORTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sort")
+    order = order or DEFAULT_ORDERS[sort]
+    if order not in {"asc", "desc"}:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid order")
+    if status_filter is not None and status_filter not in WORD_STATUSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status")
+
+    profile = context.require_profile()
+    try:
+        rows, next_cursor = await browse_vocabulary(
+            profile.id,
+            sort,
+            order,
+            (status_filter,) if status_filter else WORD_STATUSES,
+            corpus_id,
+            limit,
+            cursor,
+            db,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    translation_map = await fetch_user_translation_map(
+        profile.id, [row.word_id for row in rows], profile.target_lang, db
+    )
+    return VocabularyPageOut(
+        items=[
+            VocabularyWordOut(
                 word_id=row.word_id,
-                word=row.lemma,
+                word=row.lemma or "",
+                status=row.status,
                 translations=translation_map.get(row.word_id, []),
                 wrong_count=int(row.wrong_count or 0),
                 correct_count=int(row.correct_count or 0),
-                accuracy=accuracy,
+                accuracy=round(row.accuracy, 3) if row.accuracy is not None else None,
                 learned_at=row.learned_at,
                 next_review_at=row.next_review_at,
             )
-        )
-
-    payload = WeakWordsOut(total=total_count, items=results)
-    if limit == DEFAULT_LIMIT:
-        cache_result = await db.execute(
-            select(WeakWordsCache).where(WeakWordsCache.profile_id == profile.id)
-        )
-        cache = cache_result.scalar_one_or_none()
-        data = jsonable_encoder(payload)
-        if cache:
-            cache.data = data
-            cache.updated_at = now
-        else:
-            db.add(WeakWordsCache(profile_id=profile.id, data=data, updated_at=now))
-        await db.commit()
-    return payload
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
@@ -1,18 +1,47 @@
 from __future__ import annotations
 
 import random
-import re
-from difflib import SequenceMatcher
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    String,
+    and_,
+    case,
+    cast,
+    column,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.auth import get_active_learning_profile, get_current_user
+from app.api.auth import RequestContext, get_request_context
 from app.db.session import get_db
+from app.core.answer_matcher import compile_matcher, grade_answers
 from app.core.audit import log_audit_event
+from app.core.config import REVIEW_FUZZ_SEED, REVIEW_LOAD_SMOOTHING
+from app.core.learn_queue import consume_learn_queue, ensure_learn_queue, read_learn_queue
+from app.core.profile_counters import (
+    CounterDelta,
+    apply_counter_delta,
+    lock_profile_counters,
+    record_inserted_words,
+)
+from app.core.review_forecast import load_review_calendar
+from app.core.review_stats import apply_review_results, lock_review_stats
+from app.core.response_cache import response_cache
+from app.core.scheduler import sm2_schedule
+from app.core.vocabulary import word_lemma
+from app.core.translation_cache import translation_cache
 from app.models import (
     Corpus,
     CorpusWordStat,
@@ -20,10 +49,8 @@ from app.models import (
     ReviewEvent,
     StudySession,
     Translation,
-    User,
     UserCorpus,
     UserCustomWord,
-    UserProfile,
     UserSettings,
     UserWord,
     Word,
@@ -43,17 +70,9 @@ from app.schemas.study import (
 router = APIRouter(prefix="/study", tags=["study"])
 
 
-async def load_profile_settings(user_id, db: AsyncSession) -> tuple[LearningProfile, UserSettings]:
-    profile = await get_active_learning_profile(user_id, db, require_onboarding=True)
-
-    settings_result = await db.execute(
-        select(UserSettings).where(UserSettings.profile_id == profile.id)
-    )
-    settings = settings_result.scalar_one_or_none()
-    if settings is None:
-        settings = UserSettings(profile_id=profile.id, user_id=user_id)
-        db.add(settings)
-        await db.commit()
+async def load_profile_settings(context: RequestContext, db: AsyncSession) -> tuple[LearningProfile, UserSettings]:
+    profile = context.require_profile()
+    settings = await context.ensure_settings(db)
     return profile, settings
 
 
@@ -564,41 +583,7 @@ async def fetch_corpus_words(
 ) -> list[LearnWordOut]:
     if limit <= 0:
         return []
-    stmt = (
-        select(
-            Word.id.label("word_id"),
-            Word.lemma.label("lemma"),
-            func.min(CorpusWordStat.rank).label("rank"),
-            func.max(CorpusWordStat.count).label("count"),
-        )
-        .select_from(CorpusWordStat)
-        .join(UserCorpus, UserCorpus.corpus_id == CorpusWordStat.corpus_id)
-        .join(Word, Word.id == CorpusWordStat.word_id)
-        .join(
-            Translation,
-            and_(Translation.word_id == Word.id, Translation.target_lang == target_lang),
-        )
-        .outerjoin(
-            UserWord,
-            and_(UserWord.profile_id == profile_id, UserWord.word_id == Word.id),
-        )
-        .where(UserCorpus.profile_id == profile_id, UserCorpus.enabled.is_(True))
-        .where(Word.lang == source_lang)
-        .where(
-            or_(
-                UserCorpus.target_word_limit == 0,
-                CorpusWordStat.rank <= UserCorpus.target_word_limit,
-            )
-        )
-        .where(UserWord.word_id.is_(None))
-        .group_by(Word.id, Word.lemma)
-        .order_by(func.min(CorpusWordStat.rank).nulls_last(), Word.id)
-        .limit(limit)
-    )
-    if exclude_word_ids:
-        stmt = stmt.where(Word.id.notin_(exclude_word_ids))
-    result = await db.execute(stmt)
-    rows = result.fetchall()
+    rows = await read_learn_queue(profile_id, limit, exclude_word_ids, db)
     word_ids = [row.word_id for row in rows]
     translation_map = await fetch_user_translation_map(profile_id, word_ids, target_lang, db)
     results: list[LearnWordOut] = []
@@ -692,57 +677,6 @@ async def fetch_review_words(
     return results
 
 
-def normalize_text(value: str) -> str:
-    return " ".join(value.lower().split())
-
-
-def build_translation_options(translations: list[str]) -> set[str]:
-    options: set[str] = set()
-    for text in translations:
-        for part in re.split(r"[;,/]", text or ""):
-            normalized = normalize_text(part)
-            if normalized:
-                options.add(normalized)
-    return options
-
-
-def edit_distance(a: str, b: str) -> int:
-    if a == b:
-        return 0
-    if not a:
-        return len(b)
-    if not b:
-        return len(a)
-    if len(a) < len(b):
-        a, b = b, a
-    previous = list(range(len(b) + 1))
-    for i, char_a in enumerate(a, start=1):
-        current = [i]
-        for j, char_b in enumerate(b, start=1):
-            insert_cost = current[j - 1] + 1
-            delete_cost = previous[j] + 1
-            replace_cost = previous[j - 1] + (char_a != char_b)
-            current.append(min(insert_cost, delete_cost, replace_cost))
-        previous = current
-    return previous[-1]
-
-
-def is_fuzzy_match(answer: str, option: str) -> bool:
-    if not answer or not option:
-        return False
-    if answer == option:
-        return True
-    if abs(len(answer) - len(option)) > 2:
-        return False
-    min_len = min(len(answer), len(option))
-    if min_len <= 6:
-        return edit_distance(answer, option) <= 1
-    if min_len <= 8:
-        return edit_distance(answer, option) <= 2
-    ratio = SequenceMatcher(None, answer, option).ratio()
-    return ratio >= 0.88
-
-
 async def fetch_user_translation_map(
     profile_id,
     word_ids: list[int],
@@ -751,42 +685,55 @@ async def fetch_user_translation_map(
 ) -> dict[int, list[str]]:
     if not word_ids:
         return {}
-    mapping: dict[int, list[str]] = {}
-    custom_result = await db.execute(
-        select(UserCustomWord.word_id, UserCustomWord.translation).where(
-            UserCustomWord.profile_id == profile_id,
-            UserCustomWord.word_id.in_(word_ids),
-            UserCustomWord.target_lang == target_lang,
+    custom_map = translation_cache.get_custom(profile_id, target_lang)
+    if custom_map is None:
+        version = translation_cache.version
+        custom_result = await db.execute(
+            select(UserCustomWord.word_id, UserCustomWord.translation).where(
+                UserCustomWord.profile_id == profile_id,
+                UserCustomWord.target_lang == target_lang,
+            )
         )
-    )
-    for word_id, translation in custom_result.fetchall():
-        mapping.setdefault(word_id, []).append(translation)
+        loaded: dict[int, list[str]] = {}
+        for word_id, translation in custom_result.fetchall():
+            loaded.setdefault(word_id, []).append(translation)
+        custom_map = {word_id: tuple(values) for word_id, values in loaded.items()}
+        translation_cache.set_custom(profile_id, target_lang, custom_map, version=version)
+
+    mapping: dict[int, list[str]] = {}
+    for word_id in word_ids:
+        if word_id in custom_map:
+            mapping[word_id] = list(custom_map[word_id])
 
     remaining = [word_id for word_id in word_ids if word_id not in mapping]
     if not remaining:
         return mapping
 
-    result = await db.execute(
-        select(Translation.word_id, Translation.translation).where(
-            Translation.word_id.in_(remaining),
-            Translation.target_lang == target_lang,
+    cached, missing = translation_cache.get_many(remaining, target_lang)
+    if missing:
+        version = translation_cache.version
+        result = await db.execute(
+            select(Translation.word_id, Translation.translation).where(
+                Translation.word_id.in_(missing),
+                Translation.target_lang == target_lang,
+            )
         )
-    )
-    for word_id, translation in result.fetchall():
-        mapping.setdefault(word_id, []).append(translation)
+        loaded = {word_id: [] for word_id in missing}
+        for word_id, translation in result.fetchall():
+            loaded[word_id].append(translation)
+        fresh = {word_id: tuple(values) for word_id, values in loaded.items()}
+        translation_cache.set_many(fresh, target_lang, version=version)
+        cached.update(fresh)
+
+    for word_id in remaining:
+        translations = cached.get(word_id)
+        if translations:
+            mapping[word_id] = list(translations)
     return mapping
 
 
 def score_answer(answer: str, translations: list[str]) -> tuple[bool, int, list[str]]:
-    normalized = normalize_text(answer or "")
-    options = sorted(build_translation_options(translations))
-    if not normalized:
-        return False, 0, options
-    if normalized in options:
-        return True, 5, options
-    if any(is_fuzzy_match(normalized, option) for option in options):
-        return True, 4, options
-    return False, 2, options
+    return compile_matcher(translations).score(answer)
 
 
 def sm2_next(
@@ -812,12 +759,132 @@ def sm2_next(
     return repetitions, interval_days, ef, now + timedelta(days=interval_days)
 
 
+REVIEW_STATE_COLUMNS = (
+    UserWord.word_id,
+    UserWord.status,
+    UserWord.repetitions,
+    UserWord.interval_days,
+    UserWord.ease_factor,
+    UserWord.correct_streak,
+    UserWord.wrong_streak,
+    UserWord.learned_at,
+    UserWord.next_review_at,
+)
+
+
+def profile_fuzz_seed(profile_id) -> int:
+    return profile_id.int ^ REVIEW_FUZZ_SEED
+
+
+def schedule_reviews(
+    entries: list[tuple],
+    now: datetime,
+    fuzz_seed: int | None = None,
+    calendar: dict[int, int] | None = None,
+    capacity: int = 0,
+) -> list[tuple[int, int, float, datetime]]:
+    return sm2_schedule(
+        [entry[1] for entry in entries],
+        [entry[0].repetitions or 0 for entry in entries],
+        [entry[0].interval_days or 0 for entry in entries],
+        [entry[0].ease_factor or 2.5 for entry in entries],
+        now,
+        word_ids=[entry[0].word_id for entry in entries],
+        fuzz_seed=fuzz_seed,
+        calendar=calendar,
+        capacity=capacity,
+    )
+
+
+def build_review_update(current, scheduled: tuple[int, int, float, datetime], correct: bool) -> dict:
+    repetitions, interval_days, ease_factor, next_review_at = scheduled
+    if correct:
+        status_value = current.status if current.status in {"known", "learned"} else "learned"
+        correct_streak = (current.correct_streak or 0) + 1
+        wrong_streak = 0
+    else:
+        status_value = current.status
+        correct_streak = 0
+        wrong_streak = (current.wrong_streak or 0) + 1
+    return {
+        "word_id": current.word_id,
+        "status": status_value,
+        "repetitions": repetitions,
+        "interval_days": interval_days,
+        "ease_factor": ease_factor,
+        "next_review_at": next_review_at,
+        "correct_streak": correct_streak,
+        "wrong_streak": wrong_streak,
+        "correct": correct,
+    }
+
+
+async def apply_review_updates(profile_id, updates: list[dict], now: datetime, db: AsyncSession) -> None:
+    if not updates:
+        return
+    data = values(
+        column("word_id", BigInteger),
+        column("status", String),
+        column("repetitions", Integer),
+        column("interval_days", Integer),
+        column("ease_factor", Float),
+        column("next_review_at", DateTime(timezone=True)),
+        column("correct_streak", Integer),
+        column("wrong_streak", Integer),
+        column("correct", Boolean),
+        name="review_updates",
+    ).data(
+        [
+            (
+                item["word_id"],
+                item["status"],
+                item["repetitions"],
+                item["interval_days"],
+                item["ease_factor"],
+                item["next_review_at"],
+                item["correct_streak"],
+                item["wrong_streak"],
+                item["correct"],
+            )
+            for item in updates
+        ]
+    )
+    correct_count = UserWord.correct_count + case((data.c.correct, 1), else_=0)
+    stmt = (
+        update(UserWord)
+        .where(UserWord.profile_id == profile_id, UserWord.word_id == data.c.word_id)
+        .values(
+            status=data.c.status,
+            stage=data.c.repetitions,
+            repetitions=data.c.repetitions,
+            interval_days=data.c.interval_days,
+            ease_factor=data.c.ease_factor,
+            last_review_at=now,
+            next_review_at=data.c.next_review_at,
+            correct_streak=data.c.correct_streak,
+            wrong_streak=data.c.wrong_streak,
+            wrong_count=UserWord.wrong_count + case((data.c.correct, 0), else_=1),
+            correct_count=correct_count,
+            accuracy=cast(correct_count, Float) / (UserWord.wrong_count + UserWord.correct_count + 1),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(stmt)
+
+
+async def insert_review_events(events: list[dict], db: AsyncSession) -> None:
+    if not events:
+        return
+    await db.execute(insert(ReviewEvent).values(events))
+
+
 async def seed_review_words(
-    profile_id,
-    source_lang: str,
+    profile: LearningProfile,
     limit: int,
     db: AsyncSession,
 ) -> int:
+    profile_id = profile.id
+    source_lang = profile.native_lang
     stmt = (
         select(Word.id)
         .select_from(CorpusWordStat)
@@ -847,6 +914,7 @@ async def seed_review_words(
         {
             "profile_id": profile_id,
             "word_id": word_id,
+            "lemma": word_lemma(word_id),
             "status": "learned",
             "stage": 0,
             "repetitions": 0,
@@ -861,23 +929,29 @@ async def seed_review_words(
         for word_id in word_ids
     ]
     stmt = insert(UserWord).values(rows)
-    stmt = stmt.on_conflict_do_nothing(index_elements=["profile_id", "word_id"])
+    stmt = stmt.on_conflict_do_nothing(index_elements=["profile_id", "word_id"]).returning(UserWord.word_id)
     result = await db.execute(stmt)
+    inserted = [row.word_id for row in result.fetchall()]
+    await consume_learn_queue(profile_id, word_ids, db)
+    await record_inserted_words(profile, inserted, db)
     await db.commit()
-    return int(result.rowcount or 0)
+    await response_cache.invalidate_profile(profile_id)
+    return len(inserted)
 
 
 @router.post("/learn/start", response_model=LearnStartOut)
 async def start_learn(
     limit: int | None = None,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> LearnStartOut:
-    profile, settings = await load_profile_settings(user.id, db)
+    user = context.user
+    profile, settings = await load_profile_settings(context, db)
     batch_size = limit if limit and limit > 0 else settings.learn_batch_size
     if batch_size <= 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid batch size")
 
+    await ensure_learn_queue(profile, db)
     words = await fetch_learn_words(
         profile.id,
         profile.native_lang,
@@ -896,15 +970,11 @@ async def start_learn(
     )
     db.add(session)
     await db.flush()
-    ui_lang_result = await db.execute(
-        select(UserProfile.interface_lang).where(UserProfile.user_id == user.id)
-    )
-    interface_lang = ui_lang_result.scalar_one_or_none() or "ru"
     reading = await build_reading_block(
         profile.id,
         [item.word_id for item in words],
         profile.target_lang,
-        interface_lang,
+        context.interface_lang,
         db,
         session.id,
     )
@@ -917,13 +987,14 @@ async def start_learn(
 async def submit_learn(
     data: LearnSubmitRequest,
     request: Request,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> LearnSubmitOut:
     if not data.words:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No answers")
 
-    profile, _settings = await load_profile_settings(user.id, db)
+    user = context.user
+    profile = context.require_profile()
 
     word_ids = [item.word_id for item in data.words]
     if len(set(word_ids)) != len(word_ids):
@@ -947,9 +1018,8 @@ async def submit_learn(
     words_total = len(data.words)
     words_correct = 0
     results = []
-    for item in data.words:
-        translations = translation_map.get(item.word_id, [])
-        correct, _quality, options = score_answer(item.answer, translations)
+    grades = grade_answers([(item.word_id, item.answer) for item in data.words], translation_map)
+    for item, (correct, _quality, options) in zip(data.words, grades):
         results.append(
             {
                 "word_id": item.word_id,
@@ -973,6 +1043,7 @@ async def submit_learn(
                 "profile_id": profile.id,
                 "user_id": user.id,
                 "word_id": item.word_id,
+                "lemma": word_lemma(item.word_id),
                 "status": "learned",
                 "stage": 1,
                 "repetitions": 1,
@@ -987,11 +1058,15 @@ async def submit_learn(
             for item in data.words
         ]
         stmt = insert(UserWord).values(rows)
-        stmt = stmt.on_conflict_do_nothing(index_elements=["profile_id", "word_id"])
+        stmt = stmt.on_conflict_do_nothing(index_elements=["profile_id", "word_id"]).returning(UserWord.word_id)
         result = await db.execute(stmt)
-        learned = int(result.rowcount or 0)
+        inserted = [row.word_id for row in result.fetchall()]
+        learned = len(inserted)
+        await consume_learn_queue(profile.id, word_ids, db)
+        await record_inserted_words(profile, inserted, db)
 
     await db.commit()
+    await response_cache.invalidate_profile(profile.id)
 
     await log_audit_event(
         "study.learn.submit",
@@ -1013,10 +1088,11 @@ async def submit_learn(
 @router.post("/review/start", response_model=ReviewStartOut)
 async def start_review(
     limit: int | None = None,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> ReviewStartOut:
-    profile, settings = await load_profile_settings(user.id, db)
+    user = context.user
+    profile, settings = await load_profile_settings(context, db)
     batch_size = limit if limit and limit > 0 else settings.daily_review_words
     if batch_size <= 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid batch size")
@@ -1050,13 +1126,14 @@ async def start_review(
 async def submit_review(
     data: ReviewSubmitRequest,
     request: Request,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> ReviewSubmitOut:
     if not data.words:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No answers")
 
-    profile, _settings = await load_profile_settings(user.id, db)
+    user = context.user
+    profile, settings = await load_profile_settings(context, db)
 
     word_ids = [item.word_id for item in data.words]
     if len(set(word_ids)) != len(word_ids):
@@ -1075,10 +1152,19 @@ async def submit_review(
         if session is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
 
+    # Counter deltas subtract the state read here, so it must not go stale
+    # before commit: concurrent submits of the same words queue on the rows.
+    await lock_profile_counters(db, profile.id)
     rows_result = await db.execute(
-        select(UserWord).where(UserWord.profile_id == profile.id, UserWord.word_id.in_(word_ids))
+        select(*REVIEW_STATE_COLUMNS)
+        .where(
+            UserWord.profile_id == profile.id,
+            UserWord.word_id.in_(word_ids),
+        )
+        .order_by(UserWord.word_id)
+        .with_for_update()
     )
-    user_words = {row.word_id: row for row in rows_result.scalars().all()}
+    user_words = {row.word_id: row for row in rows_result.fetchall()}
     if len(user_words) != len(word_ids):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Word not found")
 
@@ -1090,11 +1176,11 @@ async def submit_review(
     words_incorrect = 0
     results = []
 
+    entries = []
     review_events = []
-    for item in data.words:
+    grades = grade_answers([(item.word_id, item.answer) for item in data.words], translation_map)
+    for item, (correct, quality, options) in zip(data.words, grades):
         current = user_words[item.word_id]
-        translations = translation_map.get(item.word_id, [])
-        correct, quality, options = score_answer(item.answer, translations)
         if item.quality is not None:
             try:
                 provided_quality = int(item.quality)
@@ -1112,54 +1198,64 @@ async def submit_review(
                 "correct_answers": options,
             }
         )
-        repetitions = current.repetitions or 0
-        interval_days = current.interval_days or 0
-        ease_factor = current.ease_factor or 2.5
-        repetitions, interval_days, ease_factor, next_review_at = sm2_next(
-            quality, repetitions, interval_days, ease_factor, now
+        entries.append((current, quality, correct))
+        review_events.append(
+            {
+                "profile_id": profile.id,
+                "user_id": user.id,
+                "word_id": item.word_id,
+                "result": "correct" if correct else "wrong",
+            }
         )
-        current.repetitions = repetitions
-        current.interval_days = interval_days
-        current.ease_factor = ease_factor
-        current.stage = repetitions
-        current.last_review_at = now
-        current.next_review_at = next_review_at
         if correct:
-            current.correct_streak = (current.correct_streak or 0) + 1
-            current.wrong_streak = 0
-            if current.status not in {"known", "learned"}:
-                current.status = "learned"
             words_correct += 1
-            review_events.append(
-                ReviewEvent(
-                    profile_id=profile.id,
-                    user_id=user.id,
-                    word_id=current.word_id,
-                    result="correct",
-                )
-            )
         else:
-            current.correct_streak = 0
-            current.wrong_streak = (current.wrong_streak or 0) + 1
             words_incorrect += 1
-            review_events.append(
-                ReviewEvent(
-                    profile_id=profile.id,
-                    user_id=user.id,
-                    word_id=current.word_id,
-                    result="wrong",
-                )
-            )
+
+    if REVIEW_LOAD_SMOOTHING:
+        calendar = await load_review_calendar(profile.id, now, word_ids, db)
+        scheduled = schedule_reviews(
+            entries,
+            now,
+            fuzz_seed=profile_fuzz_seed(profile.id),
+            calendar=calendar,
+            capacity=settings.daily_review_words,
+        )
+    else:
+        scheduled = schedule_reviews(entries, now)
+    updates = [
+        build_review_update(current, schedule, correct)
+        for (current, _quality, correct), schedule in zip(entries, scheduled)
+    ]
 
     if session is not None:
         session.words_total = words_total
         session.words_correct = words_correct
         session.finished_at = now
 
-    if review_events:
-        db.add_all(review_events)
+    counter_delta = CounterDelta()
+    for (current, _quality, _correct), update_row in zip(entries, updates):
+        reviewable = bool(translation_map.get(current.word_id))
+        counter_delta.add_word(
+            True, current.status, current.learned_at, current.next_review_at, False, reviewable, -1
+        )
+        counter_delta.add_word(
+            True, update_row["status"], current.learned_at, update_row["next_review_at"], False, reviewable
+        )
+
+    await lock_review_stats(db, [profile.id], shared=True)
+    await apply_review_updates(profile.id, updates, now, db)
+    await insert_review_events(review_events, db)
+    await apply_review_results(
+        profile.id,
+        {item["word_id"]: item["correct"] for item in results},
+        now,
+        db,
+    )
+    await apply_counter_delta(profile.id, counter_delta, db)
 
     await db.commit()
+    await response_cache.invalidate_profile(profile.id)
 
     await log_audit_event(
         "study.review.submit",
@@ -1184,11 +1280,11 @@ async def submit_review(
 @router.post("/review/seed", response_model=ReviewSeedOut)
 async def seed_review(
     limit: int = 10,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> ReviewSeedOut:
-    profile, _settings = await load_profile_settings(user.id, db)
+    profile = context.require_profile()
     if limit <= 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limit")
-    seeded = await seed_review_words(profile.id, profile.native_lang, limit, db)
+    seeded = await seed_review_words(profile, limit, db)
     return ReviewSeedOut(seeded=seeded)
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import hmac
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.auth import get_active_learning_profile, get_current_user
+from app.api.admin import ensure_admin
+from app.api.auth import RequestContext, get_current_user, get_request_context, security
+from app.core.config import METRICS_TOKEN
+from app.core.job_metrics import collect_job_metrics, render_prometheus, summarize
+from app.core.job_queue import enqueue
+from app.core.review_forecast import forecast_review_load
 from app.db.session import get_db
 from app.models import (
     AuditLog,
@@ -19,9 +27,13 @@ from app.schemas.tech import (
     AuditLogOut,
     BackgroundJobOut,
     ImportJobRequest,
+    JobMetricsOut,
+    JobTypeMetricsOut,
     NotificationOutboxOut,
     NotificationSettingsOut,
     NotificationSettingsUpdate,
+    ReviewForecastDay,
+    ReviewForecastOut,
 )
 
 router = APIRouter(prefix="/tech", tags=["tech"])
@@ -63,27 +75,20 @@ async def enqueue_job(
     profile_id,
     payload: dict | None,
     db: AsyncSession,
+    dedup_key: str | None = None,
 ) -> BackgroundJob:
-    job = BackgroundJob(
-        job_type=job_type,
-        status="pending",
-        payload=payload,
-        user_id=user_id,
-        profile_id=profile_id,
-        run_after=datetime.now(timezone.utc),
-    )
-    db.add(job)
+    job_id, _created = await enqueue(db, job_type, payload, user_id, profile_id, dedup_key)
     await db.commit()
-    await db.refresh(job)
-    return job
+    return await db.get(BackgroundJob, job_id)
 
 
 @router.get("/notifications", response_model=NotificationSettingsOut)
 async def get_notification_settings(
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> NotificationSettingsOut:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
     settings = await ensure_notification_settings(user.id, profile.id, db)
     return NotificationSettingsOut(
         email=settings.email,
@@ -99,10 +104,11 @@ async def get_notification_settings(
 @router.put("/notifications", response_model=NotificationSettingsOut)
 async def update_notification_settings(
     data: NotificationSettingsUpdate,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> NotificationSettingsOut:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
     settings = await ensure_notification_settings(user.id, profile.id, db)
 
     if data.email is not None:
@@ -138,12 +144,12 @@ async def update_notification_settings(
 @router.get("/notifications/outbox", response_model=list[NotificationOutboxOut])
 async def list_notification_outbox(
     limit: int = 20,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> list[NotificationOutboxOut]:
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid limit")
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    profile = context.require_profile()
     result = await db.execute(
         select(NotificationOutbox)
         .where(NotificationOutbox.profile_id == profile.id)
@@ -164,43 +170,73 @@ async def list_notification_outbox(
     ]
 
 
+@router.get("/review-forecast", response_model=ReviewForecastOut)
+async def get_review_forecast(
+    days: int = 30,
+    context: RequestContext = Depends(get_request_context),
+    db: AsyncSession = Depends(get_db),
+) -> ReviewForecastOut:
+    if days < 1 or days > 365:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid days")
+    profile = context.require_profile()
+    forecast = await forecast_review_load(db, days, datetime.now(timezone.utc), profile_id=profile.id)
+    return ReviewForecastOut(
+        words=forecast["words"],
+        days=[
+            ReviewForecastDay(date=day, count=count)
+            for day, count in zip(forecast["dates"], forecast["totals"])
+        ],
+    )
+
+
 @router.post("/jobs/refresh-stats", response_model=BackgroundJobOut)
 async def schedule_refresh_stats(
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> BackgroundJobOut:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
-    job = await enqueue_job("refresh_stats", user.id, profile.id, {}, db)
+    user = context.user
+    profile = context.require_profile()
+    job = await enqueue_job("refresh_stats", user.id, profile.id, {}, db, f"refresh_stats:{profile.id}")
     return build_job_out(job)
 
 
 @router.post("/jobs/report", response_model=BackgroundJobOut)
 async def schedule_report(
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> BackgroundJobOut:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
-    job = await enqueue_job("generate_report", user.id, profile.id, {}, db)
+    user = context.user
+    profile = context.require_profile()
+    job = await enqueue_job("generate_report", user.id, profile.id, {}, db, f"generate_report:{profile.id}")
     return build_job_out(job)
 
 
 @router.post("/jobs/notifications", response_model=BackgroundJobOut)
 async def schedule_notifications(
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> BackgroundJobOut:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
-    job = await enqueue_job("send_review_notifications", user.id, profile.id, {}, db)
+    user = context.user
+    profile = context.require_profile()
+    job = await enqueue_job(
+        "send_review_notifications",
+        user.id,
+        profile.id,
+        {},
+        db,
+        f"send_review_notifications:{profile.id}",
+    )
     return build_job_out(job)
 
 
 @router.post("/jobs/import", response_model=BackgroundJobOut)
 async def schedule_import(
     data: ImportJobRequest,
-    user: User = Depends(get_current_user),
+    context: RequestContext = Depends(get_request_context),
     db: AsyncSession = Depends(get_db),
 ) -> BackgroundJobOut:
-    profile = await get_active_learning_profile(user.id, db, require_onboarding=True)
+    user = context.user
+    profile = context.require_profile()
     payload = {}
     if data.sqlite_dir:
         payload["sqlite_dir"] = data.sqlite_dir
@@ -227,6 +263,42 @@ async def list_jobs(
     return [build_job_out(job) for job in result.scalars().all()]
 
 
+async def require_metrics_access(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    # Scrapers authenticate with the static METRICS_TOKEN, people with an admin session.
+    if METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return
+    user = await get_current_user(request, credentials, db)
+    ensure_admin(user)
+
+
+@router.get("/metrics", response_model=JobMetricsOut, dependencies=[Depends(require_metrics_access)])
+async def get_job_metrics(db: AsyncSession = Depends(get_db)) -> JobMetricsOut:
+    now = datetime.now(timezone.utc)
+    collected = await collect_job_metrics(db, now)
+    return JobMetricsOut(
+        generated_at=now,
+        workers_alive=collected["workers_alive"],
+        job_types=[
+            JobTypeMetricsOut(job_type=job_type, **values)
+            for job_type, values in summarize(collected).items()
+        ],
+    )
+
+
+@router.get(
+    "/metrics/prometheus",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_metrics_access)],
+)
+async def get_job_metrics_prometheus(db: AsyncSession = Depends(get_db)) -> PlainTextResponse:
+    collected = await collect_job_metrics(db, datetime.now(timezone.utc))
+    return PlainTextResponse(render_prometheus(collected), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/audit", response_model=list[AuditLogOut])
 async def list_audit_logs(
     limit: int = 50,
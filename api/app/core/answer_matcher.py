@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from app.core.config import TRANSLATION_CACHE_SIZE
+
+OPTION_SPLIT_RE = re.compile(r"[;,/]")
+FUZZY_RATIO = 0.88
+
+
+def normalize_text(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def build_translation_options(translations) -> set[str]:
+    options: set[str] = set()
+    for text in translations:
+        for part in OPTION_SPLIT_RE.split(text or ""):
+            normalized = normalize_text(part)
+            if normalized:
+                options.add(normalized)
+    return options
+
+
+def edit_distance(a: str, b: str) -> int:
+    if a == b:
+        return 0
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            insert_cost = current[j - 1] + 1
+            delete_cost = previous[j] + 1
+            replace_cost = previous[j - 1] + (char_a != char_b)
+            current.append(min(insert_cost, delete_cost, replace_cost))
+        previous = current
+    return previous[-1]
+
+
+def build_peq(pattern: str) -> dict[str, int]:
+    peq: dict[str, int] = {}
+    for index, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << index)
+    return peq
+
+
+def bounded_edit_distance(peq: dict[str, int], length: int, text: str, max_distance: int) -> int:
+    # Myers/Hyyro bit-vector Levenshtein over a precompiled pattern. Returns
+    # max_distance + 1 as soon as the remaining text can no longer bring the
+    # score back under the bound.
+    if not length:
+        return min(len(text), max_distance + 1)
+    mask = (1 << length) - 1
+    high = 1 << (length - 1)
+    pv = mask
+    mv = 0
+    score = length
+    remaining = len(text)
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        remaining -= 1
+        if score - remaining > max_distance:
+            return max_distance + 1
+    return score
+
+
+class CompiledOption:
+    __slots__ = ("text", "length", "peq", "_sequence")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.length = len(text)
+        self.peq = build_peq(text)
+        self._sequence: SequenceMatcher | None = None
+
+    def ratio_at_least(self, answer: str, threshold: float) -> bool:
+        if self._sequence is None:
+            self._sequence = SequenceMatcher(None, "", self.text)
+        sequence = self._sequence
+        sequence.set_seq1(answer)
+        return (
+            sequence.real_quick_ratio() >= threshold
+            and sequence.quick_ratio() >= threshold
+            and sequence.ratio() >= threshold
+        )
+
+    def fuzzy_match(self, answer: str) -> bool:
+        if not answer or not self.text:
+            return False
+        if answer == self.text:
+            return True
+        if abs(len(answer) - self.length) > 2:
+            return False
+        min_len = min(len(answer), self.length)
+        if min_len <= 6:
+            return bounded_edit_distance(self.peq, self.length, answer, 1) <= 1
+        if min_len <= 8:
+            return bounded_edit_distance(self.peq, self.length, answer, 2) <= 2
+        return self.ratio_at_least(answer, FUZZY_RATIO)
+
+
+def is_fuzzy_match(answer: str, option: str) -> bool:
+    return CompiledOption(option).fuzzy_match(answer)
+
+
+class AnswerMatcher:
+    __slots__ = ("options", "_exact", "_compiled")
+
+    def __init__(self, translations) -> None:
+        self.options = tuple(sorted(build_translation_options(translations)))
+        self._exact = frozenset(self.options)
+        self._compiled = tuple(CompiledOption(option) for option in self.options)
+
+    def score(self, answer: str | None) -> tuple[bool, int, list[str]]:
+        normalized = normalize_text(answer or "")
+        options = list(self.options)
+        if not normalized:
+            return False, 0, options
+        if normalized in self._exact:
+            return True, 5, options
+        if any(option.fuzzy_match(normalized) for option in self._compiled):
+            return True, 4, options
+        return False, 2, options
+
+
+@lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def _compile_matcher(key: tuple[str, ...]) -> AnswerMatcher:
+    return AnswerMatcher(key)
+
+
+def compile_matcher(translations) -> AnswerMatcher:
+    return _compile_matcher(tuple(sorted(translations or ())))
+
+
+def grade_answers(
+    answers: list[tuple[int, str | None]],
+    translation_map: dict[int, list[str]],
+) -> list[tuple[bool, int, list[str]]]:
+    matchers: dict[int, AnswerMatcher] = {}
+    results = []
+    for word_id, answer in answers:
+        matcher = matchers.get(word_id)
+        if matcher is None:
+            matcher = compile_matcher(translation_map.get(word_id, []))
+            matchers[word_id] = matcher
+        results.append(matcher.score(answer))
+    return results
@@ -1,13 +1,213 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from collections import deque
 from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import Request
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
 
+from app.core.config import (
+    AUDIT_BATCH_ATTEMPTS,
+    AUDIT_BATCH_SIZE,
+    AUDIT_BLOCK_MS,
+    AUDIT_BUFFERED,
+    AUDIT_FLUSH_MS,
+    AUDIT_QUEUE_SIZE,
+)
 from app.db.session import AsyncSessionLocal
 from app.models import AuditLog
 
+logger = logging.getLogger(__name__)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    # Losing the database is worth waiting out; anything else is the entry's fault.
+    if getattr(exc, "connection_invalidated", False):
+        return True
+    return isinstance(exc, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError))
+
+
+class AuditBuffer:
+    def __init__(
+        self,
+        max_items: int,
+        batch_size: int,
+        flush_seconds: float,
+        block_seconds: float,
+        session_factory=AsyncSessionLocal,
+        max_attempts: int = AUDIT_BATCH_ATTEMPTS,
+    ) -> None:
+        self.max_items = max(1, max_items)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.block_seconds = block_seconds
+        self.session_factory = session_factory
+        self.max_attempts = max(1, max_attempts)
+        self._attempts = 0
+        self._items: deque[dict] = deque()
+        self._wake: asyncio.Event | None = None
+        self._space: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.rejected = 0
+        self.batches = 0
+        self.blocked = 0
+        self.max_depth = 0
+
+    def _start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._space = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def put(self, entry: dict) -> None:
+        if self._closed:
+            self.dropped += 1
+            return
+        self._start()
+        if len(self._items) >= self.max_items:
+            self.blocked += 1
+            self._wake.set()
+            self._space.clear()
+            try:
+                await asyncio.wait_for(self._space.wait(), self.block_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if len(self._items) >= self.max_items:
+                self.dropped += 1
+                return
+        self._items.append(entry)
+        self.queued += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        if len(self._items) >= self.batch_size:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while self._items:
+                if not await self._write_batch():
+                    await asyncio.sleep(self.flush_seconds)
+                    if self._closed:
+                        return
+
+    def _requeue(self, batch: list[dict]) -> None:
+        self.failed_batches += 1
+        self._attempts += 1
+        room = self.max_items - len(self._items)
+        keep = batch[:room] if room > 0 else []
+        self._items.extendleft(reversed(keep))
+        self.dropped += len(batch) - len(keep)
+
+    async def _write_batch(self) -> bool:
+        count = min(len(self._items), self.batch_size)
+        batch = [self._items.popleft() for _ in range(count)]
+        if self._space is not None:
+            self._space.set()
+        if self._attempts >= self.max_attempts:
+            return await self._write_rows(batch)
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(AuditLog), batch)
+                await session.commit()
+        except Exception:
+            self._requeue(batch)
+            return False
+        self._attempts = 0
+        self.batches += 1
+        self.written += len(batch)
+        return True
+
+    async def _write_rows(self, batch: list[dict]) -> bool:
+        # The batch keeps failing: write it row by row so that an entry the table
+        # rejects (too long, not JSON) is dropped alone instead of blocking the queue.
+        rejected = []
+        try:
+            async with self.session_factory() as session:
+                for entry in batch:
+                    try:
+                        async with session.begin_nested():
+                            await session.execute(insert(AuditLog), [entry])
+                    except Exception as exc:
+                        if is_transient_error(exc):
+                            raise
+                        rejected.append((entry, exc))
+                await session.commit()
+        except Exception:
+            self._requeue(batch)
+            return False
+        for entry, exc in rejected:
+            logger.warning("audit entry %s dropped: %s", entry.get("action"), exc)
+        self._attempts = 0
+        self.rejected += len(rejected)
+        self.batches += 1
+        self.written += len(batch) - len(rejected)
+        return True
+
+    async def flush(self) -> None:
+        while self._items:
+            if not await self._write_batch():
+                break
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "rejected": self.rejected,
+        }
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            self._wake.set()
+            await self._task
+        self._task = None
+        await self.flush()
+
+
+audit_buffer = AuditBuffer(AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_MS / 1000, AUDIT_BLOCK_MS / 1000)
+
+
+def build_audit_entry(
+    action: str,
+    user_id=None,
+    status: str = "success",
+    meta: dict[str, Any] | None = None,
+    request: Request | None = None,
+) -> dict:
+    ip = None
+    user_agent = None
+    if request is not None:
+        ip = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+    return {
+        "user_id": user_id,
+        "action": action,
+        "status": status,
+        "meta": meta,
+        "ip": ip,
+        "user_agent": user_agent,
+        "created_at": datetime.now(timezone.utc),
+    }
+
 
 async def log_audit_event(
     action: str,
@@ -17,24 +217,14 @@ async def log_audit_event(
     request: Request | None = None,
     db=None,
 ) -> None:
+    entry = build_audit_entry(action, user_id, status, meta, request)
+    if AUDIT_BUFFERED:
+        await audit_buffer.put(entry)
+        return
     session = db or AsyncSessionLocal()
     owns_session = db is None
     try:
-        ip = None
-        user_agent = None
-        if request is not None:
-            ip = request.client.host if request.client else None
-            user_agent = request.headers.get("user-agent")
-        entry = AuditLog(
-            user_id=user_id,
-            action=action,
-            status=status,
-            meta=meta,
-            ip=ip,
-            user_agent=user_agent,
-            created_at=datetime.now(timezone.utc),
-        )
-        session.add(entry)
+        session.add(AuditLog(**entry))
         await session.commit()
     except Exception:
         if owns_session:
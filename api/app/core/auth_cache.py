@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from app.core.config import AUTH_CACHE_SECONDS, AUTH_CACHE_SIZE
+from app.models import User
+
+
+class AuthState:
+    __slots__ = ("user_id", "email", "is_active", "email_verified_at", "created_at", "auth_version")
+
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        email: str,
+        is_active: bool,
+        email_verified_at: datetime | None,
+        created_at: datetime | None,
+        auth_version: int,
+    ) -> None:
+        self.user_id = user_id
+        self.email = email
+        self.is_active = is_active
+        self.email_verified_at = email_verified_at
+        self.created_at = created_at
+        self.auth_version = auth_version
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthState":
+        return cls(
+            user.id,
+            user.email,
+            bool(user.is_active),
+            user.email_verified_at,
+            user.created_at,
+            user.auth_version or 0,
+        )
+
+    def to_user(self) -> User:
+        return User(
+            id=self.user_id,
+            email=self.email,
+            is_active=self.is_active,
+            email_verified_at=self.email_verified_at,
+            created_at=self.created_at,
+            auth_version=self.auth_version,
+        )
+
+
+class AuthStateCache:
+    def __init__(self, max_items: int, ttl_seconds: float) -> None:
+        self.max_items = max(1, max_items)
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._items: OrderedDict[uuid.UUID, tuple[float, AuthState]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: uuid.UUID) -> AuthState | None:
+        entry = self._items.get(user_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            if entry is not None:
+                del self._items[user_id]
+            self.misses += 1
+            return None
+        self._items.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, state: AuthState, version: int | None = None) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        if version is not None and version != self.version:
+            return
+        self._items[state.user_id] = (time.monotonic(), state)
+        self._items.move_to_end(state.user_id)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self.version += 1
+        self._items.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._items.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+def bump_auth_version(user: User) -> None:
+    user.auth_version = (user.auth_version or 0) + 1
+
+
+auth_cache = AuthStateCache(AUTH_CACHE_SIZE, AUTH_CACHE_SECONDS)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+# minute, hour, day of month, month, day of week (0 and 7 are Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def parse_cron_field(value: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in value.split(","):
+        expr, _, step_value = part.partition("/")
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            first, _, last = expr.partition("-")
+            start, end = int(first), int(last)
+        else:
+            start = int(expr)
+            end = high if step_value else start
+        step = int(step_value) if step_value else 1
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"invalid cron field: {value}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    __slots__ = ("expression", "minutes", "hours", "days", "months", "weekdays", "any_day", "any_weekday")
+
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression}")
+        self.expression = " ".join(fields)
+        parsed = [parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches_day(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        # Like cron: when both day fields are restricted, either one may match.
+        if not self.any_day and not self.any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                if candidate.month == 12:
+                    candidate = candidate.replace(year=candidate.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    candidate = candidate.replace(month=candidate.month + 1, day=1, hour=0, minute=0)
+            elif not self.matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron expression never fires: {self.expression}")
+
+
+def parse_schedule(value: str) -> dict[str, CronSchedule]:
+    # "job_type=cron;job_type=cron" - cron fields use commas themselves.
+    schedule = {}
+    for item in value.split(";"):
+        job_type, _, expression = item.partition("=")
+        if job_type.strip() and expression.strip():
+            schedule[job_type.strip()] = CronSchedule(expression)
+    return schedule
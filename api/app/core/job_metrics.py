@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import JOB_HEARTBEAT_SECONDS
+from app.models import BackgroundJob, JobMetricTotal, WorkerHeartbeat
+
+WAIT_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600, 14400)
+RUN_BUCKETS = (0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+ATTEMPT_BUCKETS = (1, 2, 3, 5, 10)
+OUTCOMES = ("done", "retry", "dead")
+QUEUE_STATES = ("ready", "scheduled", "running", "dead")
+METRIC_PREFIX = "recallio_job"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, data: dict) -> None:
+        # Snapshots from a worker running with other buckets cannot be added up.
+        if tuple(data.get("le") or ()) != self.bounds or len(data.get("counts") or ()) != len(self.counts):
+            return
+        for index, count in enumerate(data["counts"]):
+            self.counts[index] += count
+        self.sum += data.get("sum", 0.0)
+        self.count += data.get("count", 0)
+
+    def quantile(self, q: float) -> float | None:
+        # Upper bound of the bucket holding the q-th observation, as with histogram_quantile.
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+    def snapshot(self) -> dict:
+        return {"le": list(self.bounds), "counts": list(self.counts), "sum": round(self.sum, 6), "count": self.count}
+
+
+class JobTypeMetrics:
+    __slots__ = ("wait", "run", "attempts", "outcomes")
+
+    def __init__(self) -> None:
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.run = Histogram(RUN_BUCKETS)
+        self.attempts = Histogram(ATTEMPT_BUCKETS)
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+
+    def failure_rate(self) -> float | None:
+        total = sum(self.outcomes.values())
+        if not total:
+            return None
+        return round((self.outcomes["retry"] + self.outcomes["dead"]) / total, 4)
+
+    def snapshot(self) -> dict:
+        return {
+            "wait": self.wait.snapshot(),
+            "run": self.run.snapshot(),
+            "attempts": self.attempts.snapshot(),
+            "outcomes": dict(self.outcomes),
+        }
+
+    def merge(self, data: dict) -> None:
+        self.wait.merge(data.get("wait") or {})
+        self.run.merge(data.get("run") or {})
+        self.attempts.merge(data.get("attempts") or {})
+        for outcome, count in (data.get("outcomes") or {}).items():
+            if outcome in self.outcomes:
+                self.outcomes[outcome] += count
+
+
+class JobMetrics:
+    def __init__(self) -> None:
+        self.types: dict[str, JobTypeMetrics] = {}
+
+    def _type(self, job_type: str) -> JobTypeMetrics:
+        metrics = self.types.get(job_type)
+        if metrics is None:
+            metrics = self.types[job_type] = JobTypeMetrics()
+        return metrics
+
+    def observe_wait(self, job_type: str, seconds: float) -> None:
+        self._type(job_type).wait.observe(max(0.0, seconds))
+
+    def observe_outcome(self, job_type: str, outcome: str, run_seconds: float, attempts: int) -> None:
+        metrics = self._type(job_type)
+        metrics.run.observe(max(0.0, run_seconds))
+        metrics.attempts.observe(attempts)
+        metrics.outcomes[outcome] += 1
+
+    def snapshot(self) -> dict:
+        return {job_type: metrics.snapshot() for job_type, metrics in sorted(self.types.items())}
+
+    def merge(self, snapshot: dict | None) -> None:
+        for job_type, data in (snapshot or {}).items():
+            self._type(job_type).merge(data)
+
+
+async def queue_depth(session: AsyncSession, now: datetime) -> dict[str, dict]:
+    # Done jobs are left out: that is the bulk of the table and says nothing about backlog.
+    ready = BackgroundJob.run_after <= now
+    rows = await session.execute(
+        select(
+            BackgroundJob.job_type,
+            BackgroundJob.status,
+            func.count().filter(ready).label("ready"),
+            func.count().filter(~ready).label("scheduled"),
+            func.min(BackgroundJob.run_after).filter(ready).label("oldest"),
+        )
+        .where(BackgroundJob.status.in_(("pending", "running", "dead")))
+        .group_by(BackgroundJob.job_type, BackgroundJob.status)
+    )
+    queues: dict[str, dict] = {}
+    for row in rows:
+        queue = queues.setdefault(
+            row.job_type,
+            {**dict.fromkeys(QUEUE_STATES, 0), "oldest_pending_seconds": 0.0},
+        )
+        if row.status == "pending":
+            queue["ready"] = row.ready
+            queue["scheduled"] = row.scheduled
+            if row.oldest is not None:
+                queue["oldest_pending_seconds"] = round(max(0.0, (now - row.oldest).total_seconds()), 3)
+        else:
+            queue[row.status] = row.ready + row.scheduled
+    return queues
+
+
+async def flush_job_metrics(session: AsyncSession, metrics: JobMetrics, now: datetime) -> None:
+    # Workers add what they observed since their last flush to one row per job
+    # type, so the exported counters only grow, whatever happens to workers.
+    delta = metrics.snapshot()
+    if not delta:
+        return
+    await session.execute(
+        insert(JobMetricTotal)
+        .values([{"job_type": job_type, "metrics": {}, "updated_at": now} for job_type in delta])
+        .on_conflict_do_nothing(index_elements=[JobMetricTotal.job_type])
+    )
+    result = await session.execute(
+        select(JobMetricTotal)
+        .where(JobMetricTotal.job_type.in_(list(delta)))
+        .order_by(JobMetricTotal.job_type)
+        .with_for_update()
+    )
+    for row in result.scalars().all():
+        # Histograms stored with other buckets are dropped by merge and start over.
+        totals = JobTypeMetrics()
+        totals.merge(row.metrics or {})
+        totals.merge(delta[row.job_type])
+        row.metrics = totals.snapshot()
+        row.updated_at = now
+
+
+async def collect_job_metrics(session: AsyncSession, now: datetime) -> dict:
+    metrics = JobMetrics()
+    result = await session.execute(select(JobMetricTotal.job_type, JobMetricTotal.metrics))
+    for row in result:
+        metrics.merge({row.job_type: row.metrics})
+    alive_after = now - timedelta(seconds=JOB_HEARTBEAT_SECONDS * 3)
+    workers = await session.scalar(
+        select(func.count()).select_from(WorkerHeartbeat).where(WorkerHeartbeat.last_seen_at >= alive_after)
+    )
+    return {"queues": await queue_depth(session, now), "metrics": metrics, "workers_alive": int(workers or 0)}
+
+
+def summarize(collected: dict) -> dict:
+    queues = collected["queues"]
+    metrics: JobMetrics = collected["metrics"]
+    job_types = sorted(set(queues) | set(metrics.types))
+    summary = {}
+    for job_type in job_types:
+        queue = queues.get(job_type) or {**dict.fromkeys(QUEUE_STATES, 0), "oldest_pending_seconds": 0.0}
+        type_metrics = metrics.types.get(job_type) or JobTypeMetrics()
+        attempts = type_metrics.attempts
+        summary[job_type] = {
+            **queue,
+            "wait_p50_seconds": type_metrics.wait.quantile(0.5),
+            "wait_p95_seconds": type_metrics.wait.quantile(0.95),
+            "run_p50_seconds": type_metrics.run.quantile(0.5),
+            "run_p95_seconds": type_metrics.run.quantile(0.95),
+            "attempts_avg": round(attempts.sum / attempts.count, 3) if attempts.count else None,
+            "failure_rate": type_metrics.failure_rate(),
+            "outcomes": dict(type_metrics.outcomes),
+        }
+    return summary
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_histogram(lines: list[str], name: str, job_type: str, histogram: Histogram) -> None:
+    label = f'job_type="{escape_label(job_type)}"'
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{label},le="{format_value(float(bound))}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{label}}} {format_value(float(histogram.sum))}")
+    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+
+
+def render_prometheus(collected: dict) -> str:
+    queues = collected["queues"]
+    metrics: JobMetrics = collected["metrics"]
+    lines = [
+        f"# HELP {METRIC_PREFIX}_workers Workers with a recent heartbeat.",
+        f"# TYPE {METRIC_PREFIX}_workers gauge",
+        f"{METRIC_PREFIX}_workers {collected['workers_alive']}",
+        f"# HELP {METRIC_PREFIX}_queue_depth Jobs by state; ready jobs are pending with run_after in the past.",
+        f"# TYPE {METRIC_PREFIX}_queue_depth gauge",
+    ]
+    for job_type, queue in sorted(queues.items()):
+        label = f'job_type="{escape_label(job_type)}"'
+        for state in QUEUE_STATES:
+            lines.append(f'{METRIC_PREFIX}_queue_depth{{{label},state="{state}"}} {queue[state]}')
+    lines += [
+        f"# HELP {METRIC_PREFIX}_oldest_pending_seconds Age of the oldest ready job.",
+        f"# TYPE {METRIC_PREFIX}_oldest_pending_seconds gauge",
+    ]
+    for job_type, queue in sorted(queues.items()):
+        lines.append(
+            f'{METRIC_PREFIX}_oldest_pending_seconds{{job_type="{escape_label(job_type)}"}} '
+            f"{format_value(float(queue['oldest_pending_seconds']))}"
+        )
+    histograms = (
+        ("wait_seconds", "Time from run_after to the claim.", "wait"),
+        ("run_seconds", "Handler run time of one attempt.", "run"),
+        ("attempts", "Attempt number at which a job finished or failed.", "attempts"),
+    )
+    for suffix, help_text, attribute in histograms:
+        name = f"{METRIC_PREFIX}_{suffix}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for job_type, type_metrics in sorted(metrics.types.items()):
+            render_histogram(lines, name, job_type, getattr(type_metrics, attribute))
+    name = f"{METRIC_PREFIX}_outcomes_total"
+    lines += [f"# HELP {name} Finished attempts by outcome.", f"# TYPE {name} counter"]
+    for job_type, type_metrics in sorted(metrics.types.items()):
+        for outcome, count in type_metrics.outcomes.items():
+            lines.append(f'{name}{{job_type="{escape_label(job_type)}",outcome="{outcome}"}} {count}')
+    return "\n".join(lines) + "\n"
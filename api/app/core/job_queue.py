@@ -0,0 +1,780 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import asyncpg
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    DATABASE_URL,
+    JOB_CONCURRENCY,
+    JOB_FALLBACK_POLL_SECONDS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_LEASE_SECONDS,
+    JOB_LISTEN,
+    JOB_NOTIFY_CHANNEL,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_RETRY_JITTER,
+    JOB_RETRY_MAX_SECONDS,
+    JOB_RETRY_POLICIES,
+    JOB_TYPE_LIMITS,
+)
+from app.core.cron import CronSchedule
+from app.core.job_metrics import JobMetrics, flush_job_metrics
+from app.db.session import AsyncSessionLocal
+from app.models import BackgroundJob, JobSchedule, WorkerHeartbeat
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, BackgroundJob], Awaitable[dict | None]]
+Clock = Callable[[], datetime]
+
+# Statuses covered by the partial unique index on dedup_key.
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class RetryPolicy:
+    __slots__ = ("base_seconds", "max_seconds", "jitter")
+
+    def __init__(self, base_seconds: float, max_seconds: float, jitter: float = JOB_RETRY_JITTER) -> None:
+        self.base_seconds = base_seconds
+        self.max_seconds = max(base_seconds, max_seconds)
+        self.jitter = min(1.0, max(0.0, jitter))
+
+    def delay(self, attempts: int, rng: random.Random | None = None) -> float:
+        delay = min(self.max_seconds, self.base_seconds * 2 ** max(0, attempts - 1))
+        # Jitter only shortens the delay so the cap still holds, and jobs that
+        # failed together (e.g. on an SMTP outage) do not all come back at once.
+        return delay * (1 - self.jitter * (rng or random).random())
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy(JOB_RETRY_BASE_SECONDS, JOB_RETRY_MAX_SECONDS)
+
+
+def parse_type_limits(value: str) -> dict[str, int]:
+    limits = {}
+    for item in value.split(","):
+        job_type, _, limit = item.partition("=")
+        if job_type.strip() and limit.strip():
+            limits[job_type.strip()] = max(1, int(limit))
+    return limits
+
+
+def parse_retry_policies(value: str) -> dict[str, RetryPolicy]:
+    policies = {}
+    for item in value.split(","):
+        job_type, _, spec = item.partition("=")
+        base, _, cap = spec.partition(":")
+        if job_type.strip() and base.strip():
+            max_seconds = float(cap) if cap.strip() else JOB_RETRY_MAX_SECONDS
+            policies[job_type.strip()] = RetryPolicy(float(base), max_seconds)
+    return policies
+
+
+async def notify_jobs(session: AsyncSession, job_type: str) -> None:
+    # Delivered by Postgres only when the enqueuing transaction commits.
+    await session.execute(select(func.pg_notify(JOB_NOTIFY_CHANNEL, job_type)))
+
+
+async def enqueue(
+    session: AsyncSession,
+    job_type: str,
+    payload: dict | None = None,
+    user_id=None,
+    profile_id=None,
+    dedup_key: str | None = None,
+    run_after: datetime | None = None,
+) -> tuple[int, bool]:
+    # Returns (job id, created). A job with the same dedup_key that is still
+    # pending or running absorbs the request instead of queueing a duplicate.
+    stmt = insert(BackgroundJob).values(
+        job_type=job_type,
+        status="pending",
+        payload=payload,
+        user_id=user_id,
+        profile_id=profile_id,
+        dedup_key=dedup_key,
+        run_after=run_after or utcnow(),
+    )
+    if dedup_key is not None:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[BackgroundJob.dedup_key],
+            index_where=text("status IN ('pending', 'running')"),
+        )
+    stmt = stmt.returning(BackgroundJob.id)
+    for _attempt in range(3):
+        job_id = (await session.execute(stmt)).scalar_one_or_none()
+        if job_id is not None:
+            await notify_jobs(session, job_type)
+            return job_id, True
+        existing = await session.execute(
+            select(BackgroundJob.id).where(
+                BackgroundJob.dedup_key == dedup_key,
+                BackgroundJob.status.in_(ACTIVE_STATUSES),
+            )
+        )
+        job_id = existing.scalar_one_or_none()
+        if job_id is not None:
+            return job_id, False
+        # The conflicting job finished between the two statements; try again.
+    raise RuntimeError(f"could not enqueue {job_type} with dedup key {dedup_key}")
+
+
+def asyncpg_dsn(url: str) -> str:
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def wait_first(events: list[asyncio.Event], timeout: float | None) -> None:
+    waiters = [asyncio.ensure_future(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+class JobListener:
+    def __init__(
+        self,
+        job_types: set[str] | None = None,
+        channel: str = JOB_NOTIFY_CHANNEL,
+        dsn: str | None = None,
+        check_seconds: float = JOB_FALLBACK_POLL_SECONDS,
+        retry_seconds: float = 5.0,
+    ) -> None:
+        self.job_types = job_types
+        self.channel = channel
+        self.dsn = dsn or asyncpg_dsn(DATABASE_URL)
+        self.check_seconds = max(1.0, check_seconds)
+        self.retry_seconds = retry_seconds
+        self.wakeup = asyncio.Event()
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+        self._lost = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        self.notifications += 1
+        if self.job_types is None or payload in self.job_types:
+            self.wakeup.set()
+
+    def _on_terminate(self, _connection) -> None:
+        self._lost.set()
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            connection.add_termination_listener(self._on_terminate)
+            await connection.add_listener(self.channel, self._on_notify)
+            self._lost.clear()
+            self.connected = True
+            # Jobs enqueued while nobody was listening are picked up by an immediate poll.
+            self.wakeup.set()
+            while not self._lost.is_set():
+                try:
+                    await asyncio.wait_for(self._lost.wait(), self.check_seconds)
+                except asyncio.TimeoutError:
+                    await asyncio.wait_for(connection.fetchval("SELECT 1"), 10)
+        finally:
+            self.connected = False
+            if not connection.is_closed():
+                connection.terminate()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning("job listener disconnected: %s", exc)
+            self.reconnects += 1
+            await asyncio.sleep(self.retry_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "channel": self.channel,
+            "connected": self.connected,
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+        }
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def claim_jobs(
+    session: AsyncSession,
+    job_type: str,
+    limit: int,
+    now: datetime | None = None,
+    worker_id: str | None = None,
+    lease_seconds: float = JOB_LEASE_SECONDS,
+) -> list[int]:
+    if limit <= 0:
+        return []
+    now = now or utcnow()
+    candidates = (
+        select(BackgroundJob.id)
+        .where(
+            BackgroundJob.status == "pending",
+            BackgroundJob.job_type == job_type,
+            BackgroundJob.run_after <= now,
+        )
+        .order_by(BackgroundJob.run_after, BackgroundJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id.in_(candidates))
+        .values(
+            status="running",
+            started_at=now,
+            attempts=BackgroundJob.attempts + 1,
+            updated_at=now,
+            worker_id=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+        )
+        .returning(BackgroundJob.id)
+        .execution_options(synchronize_session=False)
+    )
+    job_ids = sorted(result.scalars().all())
+    await session.commit()
+    return job_ids
+
+
+async def mark_done(
+    session: AsyncSession,
+    job: BackgroundJob,
+    result: dict | None = None,
+    now: datetime | None = None,
+) -> None:
+    now = now or utcnow()
+    job.status = "done"
+    job.result = result
+    job.last_error = None
+    job.lease_expires_at = None
+    job.finished_at = now
+    job.updated_at = now
+    await session.commit()
+
+
+def apply_failure(
+    job: BackgroundJob,
+    message: str,
+    now: datetime,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    rng: random.Random | None = None,
+) -> None:
+    attempts = job.attempts or 0
+    job.errors = [*(job.errors or []), {"attempt": attempts, "at": now.isoformat(), "error": message}]
+    job.last_error = message
+    job.lease_expires_at = None
+    job.updated_at = now
+    if attempts >= (job.max_attempts or 1):
+        job.status = "dead"
+        job.finished_at = now
+    else:
+        job.status = "pending"
+        job.run_after = now + timedelta(seconds=policy.delay(attempts, rng))
+
+
+async def mark_failed(
+    session: AsyncSession,
+    job: BackgroundJob,
+    message: str,
+    now: datetime | None = None,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    rng: random.Random | None = None,
+) -> None:
+    apply_failure(job, message, now or utcnow(), policy, rng)
+    await session.commit()
+
+
+async def requeue_dead_jobs(
+    session: AsyncSession,
+    job_type: str | None = None,
+    job_ids: list[int] | None = None,
+    now: datetime | None = None,
+) -> list[int]:
+    now = now or utcnow()
+    stmt = (
+        update(BackgroundJob)
+        .where(BackgroundJob.status == "dead")
+        .values(
+            status="pending",
+            attempts=0,
+            run_after=now,
+            finished_at=None,
+            lease_expires_at=None,
+            # A fresh job with the same key may have been queued since; the
+            # requeue is explicit, so it must not collide with it.
+            dedup_key=None,
+            updated_at=now,
+        )
+        .returning(BackgroundJob.id, BackgroundJob.job_type)
+        .execution_options(synchronize_session=False)
+    )
+    if job_type:
+        stmt = stmt.where(BackgroundJob.job_type == job_type)
+    if job_ids:
+        stmt = stmt.where(BackgroundJob.id.in_(job_ids))
+    rows = (await session.execute(stmt)).all()
+    for requeued_type in sorted({row.job_type for row in rows}):
+        await notify_jobs(session, requeued_type)
+    await session.commit()
+    return sorted(row.id for row in rows)
+
+
+async def extend_leases(
+    session: AsyncSession,
+    worker_id: str,
+    job_ids: list[int],
+    now: datetime,
+    lease_seconds: float = JOB_LEASE_SECONDS,
+) -> None:
+    if not job_ids:
+        return
+    await session.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.id.in_(job_ids),
+            BackgroundJob.status == "running",
+            BackgroundJob.worker_id == worker_id,
+        )
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reap_expired_jobs(
+    session: AsyncSession,
+    now: datetime,
+    policies: dict[str, RetryPolicy] | None = None,
+    rng: random.Random | None = None,
+    lease_seconds: float = JOB_LEASE_SECONDS,
+    limit: int = 100,
+) -> list[int]:
+    # A running job whose lease was not renewed belongs to a worker that died or
+    # hung; it is failed like any other attempt so retries and `dead` still apply.
+    result = await session.execute(
+        select(BackgroundJob)
+        .where(
+            BackgroundJob.status == "running",
+            or_(
+                BackgroundJob.lease_expires_at < now,
+                and_(
+                    BackgroundJob.lease_expires_at.is_(None),
+                    BackgroundJob.started_at < now - timedelta(seconds=lease_seconds),
+                ),
+            ),
+        )
+        .order_by(BackgroundJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = result.scalars().all()
+    for job in jobs:
+        policy = (policies or {}).get(job.job_type, DEFAULT_RETRY_POLICY)
+        apply_failure(job, f"lease expired on worker {job.worker_id or '-'}", now, policy, rng)
+    for job_type in sorted({job.job_type for job in jobs if job.status == "pending"}):
+        await notify_jobs(session, job_type)
+    await session.commit()
+    return [job.id for job in jobs]
+
+
+async def release_jobs(session: AsyncSession, worker_id: str, job_ids: list[int], now: datetime) -> list[int]:
+    # Jobs interrupted by a shutdown go back to the queue without using up an attempt.
+    if not job_ids:
+        return []
+    rows = (
+        await session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id.in_(job_ids),
+                BackgroundJob.status == "running",
+                BackgroundJob.worker_id == worker_id,
+            )
+            .values(
+                status="pending",
+                attempts=func.greatest(BackgroundJob.attempts - 1, 0),
+                run_after=now,
+                lease_expires_at=None,
+                updated_at=now,
+            )
+            .returning(BackgroundJob.id, BackgroundJob.job_type)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    for job_type in sorted({row.job_type for row in rows}):
+        await notify_jobs(session, job_type)
+    await session.commit()
+    return [row.id for row in rows]
+
+
+class JobScheduler:
+    def __init__(self, schedule: dict[str, CronSchedule]) -> None:
+        self.schedule = schedule
+        self.enqueued = 0
+        self.collapsed = 0
+        self._registered = False
+
+    async def register(self, session: AsyncSession, now: datetime) -> None:
+        for job_type, cron in self.schedule.items():
+            stmt = insert(JobSchedule).values(
+                name=job_type,
+                job_type=job_type,
+                cron=cron.expression,
+                next_run_at=cron.next_after(now),
+                updated_at=now,
+            )
+            # Existing rows keep their next run unless the expression changed.
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[JobSchedule.name],
+                    set_={"cron": stmt.excluded.cron, "next_run_at": stmt.excluded.next_run_at, "updated_at": now},
+                    where=JobSchedule.cron != stmt.excluded.cron,
+                )
+            )
+        await session.commit()
+        self._registered = True
+
+    async def tick(self, session: AsyncSession, now: datetime) -> list[int]:
+        if not self.schedule:
+            return []
+        if not self._registered:
+            await self.register(session, now)
+        # Every worker runs the scheduler; the row lock lets exactly one of them
+        # fire a due entry, and runs missed while no worker was up collapse into one.
+        result = await session.execute(
+            select(JobSchedule)
+            .where(JobSchedule.name.in_(list(self.schedule)), JobSchedule.next_run_at <= now)
+            .with_for_update(skip_locked=True)
+        )
+        job_ids = []
+        for entry in result.scalars().all():
+            job_id, created = await enqueue(session, entry.job_type, dedup_key=f"schedule:{entry.name}", run_after=now)
+            entry.next_run_at = self.schedule[entry.name].next_after(now)
+            entry.last_run_at = now
+            entry.last_job_id = job_id
+            entry.updated_at = now
+            if created:
+                job_ids.append(job_id)
+            else:
+                self.collapsed += 1
+        await session.commit()
+        self.enqueued += len(job_ids)
+        return job_ids
+
+
+class JobWorker:
+    def __init__(
+        self,
+        handlers: dict[str, JobHandler],
+        concurrency: int = JOB_CONCURRENCY,
+        type_limits: dict[str, int] | None = None,
+        session_factory=AsyncSessionLocal,
+        listen: bool = JOB_LISTEN,
+        fallback_interval: float = JOB_FALLBACK_POLL_SECONDS,
+        retry_policies: dict[str, RetryPolicy] | None = None,
+        clock: Clock = utcnow,
+        rng: random.Random | None = None,
+        worker_id: str | None = None,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        heartbeat_seconds: float = JOB_HEARTBEAT_SECONDS,
+        scheduler: JobScheduler | None = None,
+    ) -> None:
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency)
+        self.type_limits = parse_type_limits(JOB_TYPE_LIMITS) if type_limits is None else type_limits
+        self.session_factory = session_factory
+        self.listen = listen
+        self.fallback_interval = fallback_interval
+        self.listener: JobListener | None = None
+        self.retry_policies = parse_retry_policies(JOB_RETRY_POLICIES) if retry_policies is None else retry_policies
+        self.clock = clock
+        self.rng = rng
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.scheduler = scheduler
+        self.metrics = JobMetrics()
+        self.started_at = clock()
+        self.running: dict[int, tuple[str, asyncio.Task]] = {}
+        self._finished = asyncio.Event()
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+        self.reaped = 0
+
+    def free_slots(self) -> dict[str, int]:
+        total = self.concurrency - len(self.running)
+        if total <= 0:
+            return {}
+        busy: dict[str, int] = {}
+        for job_type, _task in self.running.values():
+            busy[job_type] = busy.get(job_type, 0) + 1
+        slots = {}
+        for job_type in self.handlers:
+            limit = min(total, self.type_limits.get(job_type, total))
+            free = limit - busy.get(job_type, 0)
+            if free > 0:
+                slots[job_type] = free
+        return slots
+
+    async def claim(self, limit: int | None = None) -> int:
+        budget = self.concurrency - len(self.running) if limit is None else limit
+        claimed = 0
+        async with self.session_factory() as session:
+            for job_type, free in self.free_slots().items():
+                if budget <= 0:
+                    break
+                job_ids = await claim_jobs(
+                    session,
+                    job_type,
+                    min(free, budget),
+                    self.clock(),
+                    self.worker_id,
+                    self.lease_seconds,
+                )
+                for job_id in job_ids:
+                    task = asyncio.get_running_loop().create_task(self._execute(job_id))
+                    self.running[job_id] = (job_type, task)
+                budget -= len(job_ids)
+                claimed += len(job_ids)
+        return claimed
+
+    async def _owned_job(self, session: AsyncSession, job_id: int) -> BackgroundJob | None:
+        # Locking the row keeps the reaper away while the outcome is written, and
+        # a job that was reaped from under a stalled worker is left to its new owner.
+        job = await session.get(BackgroundJob, job_id, with_for_update=True, populate_existing=True)
+        if job is None or job.status != "running" or job.worker_id != self.worker_id:
+            self.lost += 1
+            await session.rollback()
+            return None
+        return job
+
+    async def _execute(self, job_id: int) -> None:
+        try:
+            async with self.session_factory() as session:
+                job = await session.get(BackgroundJob, job_id)
+                if job is None:
+                    return
+                job_type = job.job_type
+                if job.started_at is not None and job.run_after is not None:
+                    self.metrics.observe_wait(job_type, (job.started_at - job.run_after).total_seconds())
+                handler = self.handlers[job_type]
+                started = time.monotonic()
+                try:
+                    result = await handler(session, job)
+                except Exception as exc:
+                    elapsed = time.monotonic() - started
+                    await session.rollback()
+                    job = await self._owned_job(session, job_id)
+                    if job is None:
+                        return
+                    message = str(exc) or type(exc).__name__
+                    logger.warning("job %s (%s) failed: %s", job_id, job_type, message)
+                    policy = self.retry_policies.get(job_type, DEFAULT_RETRY_POLICY)
+                    await mark_failed(session, job, message, self.clock(), policy, self.rng)
+                    self.failed += 1
+                    outcome = "dead" if job.status == "dead" else "retry"
+                    self.metrics.observe_outcome(job_type, outcome, elapsed, job.attempts or 0)
+                else:
+                    elapsed = time.monotonic() - started
+                    job = await self._owned_job(session, job_id)
+                    if job is None:
+                        return
+                    await mark_done(session, job, result=result, now=self.clock())
+                    self.completed += 1
+                    self.metrics.observe_outcome(job_type, "done", elapsed, job.attempts or 0)
+        finally:
+            self.running.pop(job_id, None)
+            self._finished.set()
+
+    async def heartbeat(self) -> None:
+        now = self.clock()
+        values = {
+            "hostname": socket.gethostname()[:255],
+            "pid": os.getpid(),
+            "running": len(self.running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_seen_at": now,
+        }
+        async with self.session_factory() as session:
+            await extend_leases(session, self.worker_id, list(self.running), now, self.lease_seconds)
+            await session.execute(
+                insert(WorkerHeartbeat)
+                .values(worker_id=self.worker_id, started_at=self.started_at, **values)
+                .on_conflict_do_update(index_elements=[WorkerHeartbeat.worker_id], set_=values)
+            )
+            # Rows of workers that were killed outright are kept for a day for inspection.
+            await session.execute(delete(WorkerHeartbeat).where(WorkerHeartbeat.last_seen_at < now - timedelta(days=1)))
+            await self.flush_metrics(session, now)
+
+    async def flush_metrics(self, session: AsyncSession, now: datetime) -> None:
+        # Observations since the last flush are added to the shared totals in the
+        # same transaction; if it fails they are kept for the next heartbeat.
+        pending, self.metrics = self.metrics, JobMetrics()
+        try:
+            await flush_job_metrics(session, pending, now)
+            await session.commit()
+        except BaseException:
+            self.metrics.merge(pending.snapshot())
+            raise
+
+    async def reap(self) -> int:
+        async with self.session_factory() as session:
+            job_ids = await reap_expired_jobs(
+                session,
+                self.clock(),
+                self.retry_policies,
+                self.rng,
+                self.lease_seconds,
+            )
+        if job_ids:
+            logger.warning("returned %s jobs with expired leases: %s", len(job_ids), job_ids)
+        self.reaped += len(job_ids)
+        return len(job_ids)
+
+    async def schedule(self) -> int:
+        if self.scheduler is None:
+            return 0
+        async with self.session_factory() as session:
+            job_ids = await self.scheduler.tick(session, self.clock())
+        if job_ids:
+            logger.info("scheduled %s periodic jobs: %s", len(job_ids), job_ids)
+        return len(job_ids)
+
+    async def maintain(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await self.heartbeat()
+                await self.reap()
+                await self.schedule()
+            except Exception:
+                logger.exception("worker heartbeat failed")
+            await wait_first([stop], self.heartbeat_seconds)
+
+    def _start_maintenance(self) -> tuple[asyncio.Event, asyncio.Task]:
+        stopped = asyncio.Event()
+        return stopped, asyncio.get_running_loop().create_task(self.maintain(stopped))
+
+    async def _stop_maintenance(self, stopped: asyncio.Event, task: asyncio.Task) -> None:
+        stopped.set()
+        await task
+        try:
+            async with self.session_factory() as session:
+                await session.execute(delete(WorkerHeartbeat).where(WorkerHeartbeat.worker_id == self.worker_id))
+                await self.flush_metrics(session, self.clock())
+        except Exception:
+            logger.exception("could not remove worker heartbeat")
+
+    async def shutdown(self, grace: float | None) -> None:
+        tasks = {task: job_id for job_id, (_job_type, task) in list(self.running.items())}
+        if not tasks:
+            return
+        _done, pending = await asyncio.wait(list(tasks), timeout=grace)
+        if not pending:
+            return
+        interrupted = [tasks[task] for task in pending]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        async with self.session_factory() as session:
+            released = await release_jobs(session, self.worker_id, interrupted, self.clock())
+        logger.warning("released %s interrupted jobs: %s", len(released), released)
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": len(self.running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost": self.lost,
+            "reaped": self.reaped,
+            "scheduled": self.scheduler.enqueued if self.scheduler is not None else 0,
+        }
+
+    async def drain(self) -> None:
+        tasks = [task for _job_type, task in list(self.running.values())]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_once(self, limit: int) -> int:
+        processed = 0
+        maintenance = self._start_maintenance()
+        try:
+            while processed < limit:
+                claimed = await self.claim(limit - processed)
+                if not claimed:
+                    break
+                processed += claimed
+                await self.drain()
+        finally:
+            await self._stop_maintenance(*maintenance)
+        return processed
+
+    async def run_forever(
+        self,
+        interval: float,
+        stop: asyncio.Event | None = None,
+        grace: float | None = None,
+    ) -> None:
+        stop = stop or asyncio.Event()
+        maintenance = self._start_maintenance()
+        listener = JobListener(set(self.handlers)) if self.listen else None
+        self.listener = listener
+        if listener is not None:
+            listener.start()
+        try:
+            while not stop.is_set():
+                self._finished.clear()
+                if listener is not None:
+                    listener.wakeup.clear()
+                claimed = await self.claim() if self.free_slots() else 0
+                if claimed:
+                    continue
+                events = [stop]
+                if self.running:
+                    events.append(self._finished)
+                if listener is not None and self.free_slots():
+                    events.append(listener.wakeup)
+                timeout = self.fallback_interval if listener is not None and listener.connected else interval
+                await wait_first(events, timeout)
+            await self.shutdown(grace)
+        finally:
+            if listener is not None:
+                await listener.close()
+            await self._stop_maintenance(*maintenance)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, delete, exists, func, insert, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    CorpusWordStat,
+    LearningProfile,
+    LearnQueueItem,
+    Translation,
+    UserCorpus,
+    UserWord,
+    Word,
+)
+
+
+def build_queue_source(profile_id, source_lang: str, target_lang: str):
+    has_translation = exists(
+        select(Translation.id).where(
+            Translation.word_id == CorpusWordStat.word_id,
+            Translation.target_lang == target_lang,
+        )
+    )
+    return (
+        select(
+            CorpusWordStat.word_id.label("word_id"),
+            func.min(CorpusWordStat.rank).label("rank"),
+            func.max(CorpusWordStat.count).label("count"),
+        )
+        .select_from(CorpusWordStat)
+        .join(UserCorpus, UserCorpus.corpus_id == CorpusWordStat.corpus_id)
+        .join(Word, Word.id == CorpusWordStat.word_id)
+        .outerjoin(
+            UserWord,
+            and_(UserWord.profile_id == profile_id, UserWord.word_id == CorpusWordStat.word_id),
+        )
+        .where(UserCorpus.profile_id == profile_id, UserCorpus.enabled.is_(True))
+        .where(Word.lang == source_lang)
+        .where(
+            or_(
+                UserCorpus.target_word_limit == 0,
+                CorpusWordStat.rank <= UserCorpus.target_word_limit,
+            )
+        )
+        .where(UserWord.word_id.is_(None))
+        .where(has_translation)
+        .group_by(CorpusWordStat.word_id)
+    )
+
+
+async def rebuild_learn_queue(profile: LearningProfile, db: AsyncSession) -> int:
+    source = build_queue_source(profile.id, profile.native_lang, profile.target_lang).subquery()
+    ranked = select(
+        literal(profile.id, UUID(as_uuid=True)),
+        source.c.word_id,
+        func.row_number().over(order_by=(source.c.rank.asc().nulls_last(), source.c.word_id)),
+        source.c.rank,
+        source.c.count,
+    )
+    await db.execute(delete(LearnQueueItem).where(LearnQueueItem.profile_id == profile.id))
+    result = await db.execute(
+        insert(LearnQueueItem).from_select(
+            ["profile_id", "word_id", "position", "rank", "count"],
+            ranked,
+        )
+    )
+    profile.learn_queue_built_at = datetime.now(timezone.utc)
+    return int(result.rowcount or 0)
+
+
+async def ensure_learn_queue(profile: LearningProfile, db: AsyncSession) -> None:
+    if profile.learn_queue_built_at is not None:
+        return
+    await rebuild_learn_queue(profile, db)
+    await db.commit()
+
+
+async def read_learn_queue(
+    profile_id,
+    limit: int,
+    exclude_word_ids: list[int],
+    db: AsyncSession,
+):
+    stmt = (
+        select(
+            LearnQueueItem.word_id,
+            Word.lemma,
+            LearnQueueItem.rank,
+            LearnQueueItem.count,
+        )
+        .select_from(LearnQueueItem)
+        .join(Word, Word.id == LearnQueueItem.word_id)
+        .outerjoin(
+            UserWord,
+            and_(UserWord.profile_id == profile_id, UserWord.word_id == LearnQueueItem.word_id),
+        )
+        .where(LearnQueueItem.profile_id == profile_id, UserWord.word_id.is_(None))
+        .order_by(LearnQueueItem.position)
+        .limit(limit)
+    )
+    if exclude_word_ids:
+        stmt = stmt.where(LearnQueueItem.word_id.notin_(exclude_word_ids))
+    result = await db.execute(stmt)
+    return result.fetchall()
+
+
+async def consume_learn_queue(profile_id, word_ids: list[int], db: AsyncSession) -> None:
+    if not word_ids:
+        return
+    await db.execute(
+        delete(LearnQueueItem).where(
+            LearnQueueItem.profile_id == profile_id,
+            LearnQueueItem.word_id.in_(word_ids),
+        )
+    )
+
+
+async def invalidate_learn_queues(db: AsyncSession, profile_ids=None) -> None:
+    stmt = update(LearningProfile).values(learn_queue_built_at=None)
+    if profile_ids is not None:
+        stmt = stmt.where(LearningProfile.id.in_(profile_ids))
+    await db.execute(stmt)
+
+
+async def check_learn_queue(profile: LearningProfile, db: AsyncSession) -> dict:
+    source = build_queue_source(profile.id, profile.native_lang, profile.target_lang).subquery()
+    expected_result = await db.execute(
+        select(source.c.word_id).order_by(source.c.rank.asc().nulls_last(), source.c.word_id)
+    )
+    expected = [row.word_id for row in expected_result.fetchall()]
+    queued_result = await db.execute(
+        select(LearnQueueItem.word_id)
+        .where(LearnQueueItem.profile_id == profile.id)
+        .order_by(LearnQueueItem.position)
+    )
+    queued = [row.word_id for row in queued_result.fetchall()]
+
+    expected_set = set(expected)
+    queued_set = set(queued)
+    common_expected = [word_id for word_id in expected if word_id in queued_set]
+    common_queued = [word_id for word_id in queued if word_id in expected_set]
+    missing = len(expected_set - queued_set)
+    stale = len(queued_set - expected_set)
+    misordered = common_expected != common_queued
+    return {
+        "profile_id": str(profile.id),
+        "built": profile.learn_queue_built_at is not None,
+        "expected": len(expected),
+        "queued": len(queued),
+        "missing": missing,
+        "stale": stale,
+        "misordered": misordered,
+        "consistent": not missing and not stale and not misordered,
+    }
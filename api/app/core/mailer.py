@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import smtplib
+import time
+from email.message import EmailMessage
+
+from app.core.config import (
+    SMTP_FROM,
+    SMTP_HOST,
+    SMTP_IDLE_SECONDS,
+    SMTP_PASSWORD,
+    SMTP_POOL_SIZE,
+    SMTP_PORT,
+    SMTP_TLS,
+    SMTP_USER,
+)
+
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def build_email(to_email: str, subject: str, body: str, sender: str | None = None) -> EmailMessage:
+    sender = sender or SMTP_FROM or SMTP_USER
+    if not sender:
+        raise RuntimeError("SMTP sender not configured")
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = to_email
+    message.set_content(body)
+    return message
+
+
+def is_permanent_error(exc: Exception) -> bool:
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(exc, smtplib.SMTPDataError) and 500 <= exc.smtp_code < 600
+
+
+class SMTPConnection:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        tls: bool,
+        idle_seconds: float,
+        timeout: float = 10,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.tls = tls
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.smtp: smtplib.SMTP | None = None
+        self.last_used = 0.0
+        self.connects = 0
+        self.sent = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if not self.host:
+            raise RuntimeError("SMTP not configured")
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.tls:
+                smtp.ehlo()
+                smtp.starttls()
+                smtp.ehlo()
+            if self.user:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connects += 1
+        return smtp
+
+    def send(self, message: EmailMessage) -> None:
+        if self.smtp is not None and time.monotonic() - self.last_used > self.idle_seconds:
+            self.close()
+        if self.smtp is None:
+            self.smtp = self._connect()
+        try:
+            self.smtp.send_message(message)
+        except RECONNECT_ERRORS:
+            self.close()
+            self.smtp = self._connect()
+            self.smtp.send_message(message)
+        finally:
+            self.last_used = time.monotonic()
+        self.sent += 1
+
+    def close(self) -> None:
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+        self.smtp = None
+
+
+class SMTPPool:
+    def __init__(self, size: int, **settings) -> None:
+        self.connections = [SMTPConnection(**settings) for _ in range(max(1, size))]
+        self.configured = bool(settings.get("host"))
+        self._idle: asyncio.Queue[SMTPConnection] | None = None
+
+    def _queue(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for connection in self.connections:
+                self._idle.put_nowait(connection)
+        return self._idle
+
+    async def send(self, message: EmailMessage) -> None:
+        idle = self._queue()
+        connection = await idle.get()
+        try:
+            await asyncio.to_thread(connection.send, message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            raise
+        except Exception:
+            await asyncio.to_thread(connection.close)
+            raise
+        finally:
+            idle.put_nowait(connection)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.connections),
+            "open": sum(1 for connection in self.connections if connection.smtp is not None),
+            "connects": sum(connection.connects for connection in self.connections),
+            "sent": sum(connection.sent for connection in self.connections),
+        }
+
+    async def close(self) -> None:
+        for connection in self.connections:
+            await asyncio.to_thread(connection.close)
+        self._idle = None
+
+
+def create_smtp_pool(size: int = SMTP_POOL_SIZE) -> SMTPPool:
+    return SMTPPool(
+        size,
+        host=SMTP_HOST,
+        port=SMTP_PORT,
+        user=SMTP_USER,
+        password=SMTP_PASSWORD,
+        tls=SMTP_TLS,
+        idle_seconds=SMTP_IDLE_SECONDS,
+    )
+
+
+smtp_pool = create_smtp_pool()
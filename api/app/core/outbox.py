@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import mailer, telegram
+from app.core.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_DISPATCH_IN_API,
+    OUTBOX_EMAIL_RATE,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_BASE_SECONDS,
+    OUTBOX_RETRY_MAX_SECONDS,
+    OUTBOX_TELEGRAM_RATE,
+)
+from app.core.job_queue import wait_first
+from app.core.mailer import SMTPPool, build_email, smtp_pool
+from app.core.review_notifications import build_review_reminder
+from app.core.telegram import TelegramError, TelegramPool, telegram_pool
+from app.db.session import AsyncSessionLocal
+from app.models import NotificationOutbox, NotificationSettings, User
+
+logger = logging.getLogger(__name__)
+
+# Payloads of these kinds carry one-time links and are scrubbed once delivered.
+LINK_KINDS = ("verify", "reset")
+
+
+def queue_email(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    to_email: str,
+    kind: str,
+    subject: str,
+    body: str,
+) -> NotificationOutbox:
+    item = NotificationOutbox(
+        user_id=user_id,
+        channel="email",
+        payload={"kind": kind, "to": to_email, "subject": subject, "body": body},
+        status="pending",
+        scheduled_at=datetime.now(timezone.utc),
+    )
+    db.add(item)
+    return item
+
+
+def queue_telegram(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    chat_id: str,
+    kind: str,
+    text: str,
+) -> NotificationOutbox:
+    item = NotificationOutbox(
+        user_id=user_id,
+        channel="telegram",
+        payload={"kind": kind, "chat_id": chat_id, "text": text},
+        status="pending",
+        scheduled_at=datetime.now(timezone.utc),
+    )
+    db.add(item)
+    return item
+
+
+def retry_delay(attempts: int) -> float:
+    return min(OUTBOX_RETRY_MAX_SECONDS, OUTBOX_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+class UndeliverableError(Exception):
+    pass
+
+
+class RateLimiter:
+    def __init__(self, per_second: float) -> None:
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class OutboxChannel:
+    name = ""
+
+    def __init__(self, pool, rate: float) -> None:
+        self.pool = pool
+        self.rate = rate
+        self.limiter = RateLimiter(rate)
+
+    @property
+    def configured(self) -> bool:
+        return self.pool.configured
+
+    def render(self, payload: dict, recipient):
+        raise NotImplementedError
+
+    async def send(self, message) -> None:
+        raise NotImplementedError
+
+    def is_permanent(self, exc: Exception) -> bool:
+        return isinstance(exc, UndeliverableError)
+
+    def retry_after(self, exc: Exception) -> float | None:
+        return None
+
+    async def deliver(self, payload: dict, recipient=None) -> Exception | None:
+        try:
+            message = self.render(payload, recipient)
+            await self.limiter.wait()
+            await self.send(message)
+        except Exception as exc:
+            return exc
+        return None
+
+    def stats(self) -> dict:
+        return {"configured": self.configured, "rate": self.rate, **self.pool.stats()}
+
+
+class EmailChannel(OutboxChannel):
+    name = "email"
+
+    def __init__(self, pool: SMTPPool, rate: float = OUTBOX_EMAIL_RATE) -> None:
+        super().__init__(pool, rate)
+
+    def render(self, payload: dict, recipient) -> EmailMessage:
+        if "subject" in payload:
+            return build_email(payload["to"], payload["subject"], payload["body"])
+        if "review_due" in payload:
+            to_email = recipient and (recipient.email or recipient.user_email)
+            if not to_email:
+                raise UndeliverableError("no email address")
+            return build_email(to_email, *build_review_reminder(payload["review_due"]))
+        raise UndeliverableError("unsupported payload")
+
+    async def send(self, message: EmailMessage) -> None:
+        await self.pool.send(message)
+
+    def is_permanent(self, exc: Exception) -> bool:
+        return super().is_permanent(exc) or mailer.is_permanent_error(exc)
+
+
+class TelegramChannel(OutboxChannel):
+    name = "telegram"
+
+    def __init__(self, pool: TelegramPool, rate: float = OUTBOX_TELEGRAM_RATE) -> None:
+        super().__init__(pool, rate)
+
+    def render(self, payload: dict, recipient) -> tuple[str, str]:
+        if "text" in payload:
+            return payload["chat_id"], payload["text"]
+        if "review_due" in payload:
+            chat_id = recipient and recipient.telegram_chat_id
+            if not chat_id:
+                raise UndeliverableError("no telegram chat")
+            _subject, body = build_review_reminder(payload["review_due"])
+            return chat_id, body
+        raise UndeliverableError("unsupported payload")
+
+    async def send(self, message: tuple[str, str]) -> None:
+        await self.pool.send(*message)
+
+    def is_permanent(self, exc: Exception) -> bool:
+        return super().is_permanent(exc) or telegram.is_permanent_error(exc)
+
+    def retry_after(self, exc: Exception) -> float | None:
+        return exc.retry_after if isinstance(exc, TelegramError) else None
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        channels: list[OutboxChannel],
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        lease_seconds: float = OUTBOX_LEASE_SECONDS,
+        session_factory=AsyncSessionLocal,
+    ) -> None:
+        self.channels = {channel.name: channel for channel in channels}
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.session_factory = session_factory
+        self.wakeup = asyncio.Event()
+        self.totals = {"sent": 0, "retried": 0, "failed": 0}
+        self.errors = 0
+
+    async def claim(self, session: AsyncSession, channel: str, limit: int) -> list:
+        # Claimed rows are leased by pushing scheduled_at forward, so a batch lost
+        # with its worker becomes claimable again once the lease runs out.
+        now = datetime.now(timezone.utc)
+        candidates = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.channel == channel,
+                NotificationOutbox.status.in_(("pending", "sending")),
+                NotificationOutbox.scheduled_at <= now,
+            )
+            .order_by(NotificationOutbox.scheduled_at, NotificationOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(candidates))
+            .values(
+                status="sending",
+                attempts=NotificationOutbox.attempts + 1,
+                scheduled_at=now + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.profile_id,
+                NotificationOutbox.payload,
+                NotificationOutbox.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await session.commit()
+        return rows
+
+    async def load_recipients(self, session: AsyncSession, rows: list) -> dict:
+        profile_ids = {row.profile_id for row in rows if row.profile_id and "review_due" in (row.payload or {})}
+        if not profile_ids:
+            return {}
+        result = await session.execute(
+            select(
+                NotificationSettings.profile_id,
+                NotificationSettings.email,
+                NotificationSettings.telegram_chat_id,
+                User.email.label("user_email"),
+            )
+            .join(User, User.id == NotificationSettings.user_id)
+            .where(NotificationSettings.profile_id.in_(profile_ids))
+        )
+        return {row.profile_id: row for row in result.all()}
+
+    async def record(self, session: AsyncSession, channel: OutboxChannel, rows: list, errors: list) -> dict:
+        finished_at = datetime.now(timezone.utc)
+        sent_ids: list[int] = []
+        scrubbed: list[dict] = []
+        retried: list[dict] = []
+        failed: list[dict] = []
+        for row, error in zip(rows, errors):
+            payload = row.payload or {}
+            if error is None:
+                if payload.get("kind") in LINK_KINDS:
+                    scrubbed.append(
+                        {
+                            "id": row.id,
+                            "status": "sent",
+                            "sent_at": finished_at,
+                            "error": None,
+                            "payload": {"kind": payload["kind"], "to": payload.get("to")},
+                        }
+                    )
+                else:
+                    sent_ids.append(row.id)
+                continue
+            message = f"{type(error).__name__}: {error}"
+            if channel.is_permanent(error) or row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                failed.append({"id": row.id, "status": "failed", "error": message})
+            else:
+                delay = max(retry_delay(row.attempts), channel.retry_after(error) or 0)
+                retried.append(
+                    {
+                        "id": row.id,
+                        "status": "pending",
+                        "error": message,
+                        "scheduled_at": finished_at + timedelta(seconds=delay),
+                    }
+                )
+        if sent_ids:
+            await session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(sent_ids))
+                .values(status="sent", sent_at=finished_at, error=None)
+                .execution_options(synchronize_session=False)
+            )
+        for params in (scrubbed, retried, failed):
+            if params:
+                await session.execute(update(NotificationOutbox), params)
+        await session.commit()
+        return {"sent": len(sent_ids) + len(scrubbed), "retried": len(retried), "failed": len(failed)}
+
+    async def dispatch_channel(self, name: str, limit: int | None = None) -> dict:
+        summary = {"sent": 0, "retried": 0, "failed": 0}
+        channel = self.channels.get(name)
+        if channel is None or not channel.configured:
+            return summary
+        async with self.session_factory() as session:
+            rows = await self.claim(session, name, limit or self.batch_size)
+            if not rows:
+                return summary
+            recipients = await self.load_recipients(session, rows)
+            errors = await asyncio.gather(
+                *(channel.deliver(row.payload or {}, recipients.get(row.profile_id)) for row in rows)
+            )
+            summary = await self.record(session, channel, rows, errors)
+        for key, value in summary.items():
+            self.totals[key] += value
+        return summary
+
+    async def dispatch(self, limit: int | None = None) -> dict:
+        summaries = await asyncio.gather(*(self.dispatch_channel(name, limit) for name in self.channels))
+        return {key: sum(summary[key] for summary in summaries) for key in self.totals}
+
+    def kick(self) -> None:
+        self.wakeup.set()
+
+    async def run_forever(self, interval: float, stop: asyncio.Event, max_backoff: float = 300.0) -> None:
+        failures = 0
+        while not stop.is_set():
+            self.wakeup.clear()
+            try:
+                summary = await self.dispatch()
+            except Exception:
+                # A dropped connection or a Postgres restart must not end delivery
+                # for the lifetime of the worker; back off and try again.
+                failures += 1
+                self.errors += 1
+                delay = min(max_backoff, interval * 2 ** (failures - 1))
+                logger.exception("outbox dispatch failed, retrying in %.0fs", delay)
+                await wait_first([stop], delay)
+                continue
+            failures = 0
+            if sum(summary.values()) >= self.batch_size:
+                continue
+            await wait_first([stop, self.wakeup], interval)
+
+    def stats(self) -> dict:
+        return {
+            "totals": dict(self.totals),
+            "loop_errors": self.errors,
+            "channels": {name: channel.stats() for name, channel in self.channels.items()},
+        }
+
+    async def close(self) -> None:
+        for channel in self.channels.values():
+            await channel.pool.close()
+
+
+outbox_dispatcher = OutboxDispatcher([EmailChannel(smtp_pool), TelegramChannel(telegram_pool)])
+
+
+class OutboxKicker:
+    def __init__(self, enabled: bool, dispatcher: OutboxDispatcher = outbox_dispatcher) -> None:
+        self.enabled = enabled
+        self.dispatcher = dispatcher
+        self._task: asyncio.Task | None = None
+        self._again = False
+        self.runs = 0
+        self.errors = 0
+
+    def kick(self) -> None:
+        if not self.enabled:
+            return
+        if self._task is not None and not self._task.done():
+            self._again = True
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._again = False
+            self.runs += 1
+            try:
+                summary = await self.dispatcher.dispatch_channel("email")
+            except Exception:
+                self.errors += 1
+                logger.exception("outbox kick failed")
+                return
+            if not self._again and sum(summary.values()) < self.dispatcher.batch_size:
+                return
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "runs": self.runs, "errors": self.errors, **self.dispatcher.stats()}
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.dispatcher.close()
+
+
+outbox_kicker = OutboxKicker(OUTBOX_DISPATCH_IN_API)
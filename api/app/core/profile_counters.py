@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import Date, and_, cast, delete, exists, func, or_, select, union, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.word_index import word_index
+from app.models import (
+    CorpusWordStat,
+    LearningProfile,
+    ProfileCounter,
+    ProfileDailyStat,
+    Translation,
+    UserCorpus,
+    UserCustomWord,
+    UserWord,
+    Word,
+)
+
+KNOWN_STATUSES = ("known", "learned")
+# First half of the two-key advisory lock guarding a profile's counter deltas.
+PROFILE_COUNTERS_LOCK = 0x50434E54
+
+
+def utc_day(column):
+    return cast(func.timezone("UTC", column), Date)
+
+
+def utc_date(value: datetime) -> date:
+    return value.astimezone(timezone.utc).date()
+
+
+async def lock_profile_counters(db: AsyncSession, profile_id) -> None:
+    # Deltas are "after minus before"; a second writer reading the same before
+    # state would subtract it twice, so writers of one profile take turns until
+    # commit. The relative updates in apply_counter_delta stay lock-free.
+    key = int.from_bytes(uuid.UUID(str(profile_id)).bytes[:4], "big", signed=True)
+    await db.execute(select(func.pg_advisory_xact_lock(PROFILE_COUNTERS_LOCK, key)))
+
+
+def custom_word_exists(profile_id, target_lang: str, word_id_column):
+    return exists(
+        select(UserCustomWord.word_id).where(
+            UserCustomWord.profile_id == profile_id,
+            UserCustomWord.word_id == word_id_column,
+            UserCustomWord.target_lang == target_lang,
+        )
+    )
+
+
+def corpus_word_exists(profile_id, word_id_column):
+    return exists(
+        select(CorpusWordStat.word_id)
+        .join(UserCorpus, UserCorpus.corpus_id == CorpusWordStat.corpus_id)
+        .where(
+            CorpusWordStat.word_id == word_id_column,
+            UserCorpus.profile_id == profile_id,
+            UserCorpus.enabled.is_(True),
+            or_(
+                UserCorpus.target_word_limit == 0,
+                CorpusWordStat.rank <= UserCorpus.target_word_limit,
+            ),
+        )
+    )
+
+
+def reviewable_condition(profile_id, target_lang: str, word_id_column):
+    return or_(
+        exists(
+            select(Translation.id).where(
+                Translation.word_id == word_id_column,
+                Translation.target_lang == target_lang,
+            )
+        ),
+        custom_word_exists(profile_id, target_lang, word_id_column),
+    )
+
+
+class CounterDelta:
+    def __init__(self) -> None:
+        self.known_words = 0
+        self.learn_available = 0
+        self.days: dict[date, list[int]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.known_words or self.learn_available or self.days)
+
+    def bump(self, day: date, index: int, amount: int) -> None:
+        values = self.days.setdefault(day, [0, 0])
+        values[index] += amount
+        if not values[0] and not values[1]:
+            del self.days[day]
+
+    def add_word(
+        self,
+        present: bool,
+        status: str | None,
+        learned_at: datetime | None,
+        next_review_at: datetime | None,
+        eligible: bool,
+        reviewable: bool,
+        sign: int = 1,
+    ) -> None:
+        if not present:
+            if eligible:
+                self.learn_available += sign
+            return
+        if status in KNOWN_STATUSES:
+            self.known_words += sign
+            if learned_at is not None:
+                self.bump(utc_date(learned_at), 0, sign)
+        if next_review_at is not None and reviewable:
+            self.bump(utc_date(next_review_at), 1, sign)
+
+    def add_state(self, state, sign: int = 1) -> None:
+        self.add_word(
+            state.present,
+            state.status,
+            state.learned_at,
+            state.next_review_at,
+            state.eligible,
+            state.reviewable,
+            sign,
+        )
+
+
+async def load_word_states(profile: LearningProfile, word_ids: list[int], db: AsyncSession):
+    if not word_ids:
+        return []
+    stmt = (
+        select(
+            Word.id.label("word_id"),
+            UserWord.word_id.is_not(None).label("present"),
+            UserWord.status,
+            UserWord.learned_at,
+            UserWord.next_review_at,
+            or_(
+                corpus_word_exists(profile.id, Word.id),
+                custom_word_exists(profile.id, profile.target_lang, Word.id),
+            ).label("eligible"),
+            reviewable_condition(profile.id, profile.target_lang, Word.id).label("reviewable"),
+        )
+        .select_from(Word)
+        .outerjoin(UserWord, and_(UserWord.profile_id == profile.id, UserWord.word_id == Word.id))
+        .where(Word.id.in_(word_ids), Word.lang == profile.native_lang)
+    )
+    result = await db.execute(stmt)
+    return result.fetchall()
+
+
+async def snapshot_counters(
+    profile: LearningProfile,
+    word_ids: list[int],
+    db: AsyncSession,
+    delta: CounterDelta | None = None,
+    sign: int = 1,
+) -> CounterDelta:
+    if sign < 0:
+        await lock_profile_counters(db, profile.id)
+    delta = delta if delta is not None else CounterDelta()
+    for state in await load_word_states(profile, word_ids, db):
+        delta.add_state(state, sign)
+    return delta
+
+
+async def apply_counter_delta(profile_id, delta: CounterDelta, db: AsyncSession) -> None:
+    if not delta:
+        return
+    result = await db.execute(
+        update(ProfileCounter)
+        .where(ProfileCounter.profile_id == profile_id)
+        .values(
+            known_words=ProfileCounter.known_words + delta.known_words,
+            learn_available=ProfileCounter.learn_available + delta.learn_available,
+            updated_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount or not delta.days:
+        return
+    stmt = insert(ProfileDailyStat).values(
+        [
+            {"profile_id": profile_id, "day": day, "learned": learned, "due": due}
+            for day, (learned, due) in delta.days.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["profile_id", "day"],
+        set_={
+            "learned": ProfileDailyStat.learned + stmt.excluded.learned,
+            "due": ProfileDailyStat.due + stmt.excluded.due,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_inserted_words(profile: LearningProfile, word_ids: list[int], db: AsyncSession) -> None:
+    if not word_ids:
+        return
+    await lock_profile_counters(db, profile.id)
+    delta = CounterDelta()
+    for state in await load_word_states(profile, word_ids, db):
+        delta.add_word(False, None, None, None, state.eligible, state.reviewable, -1)
+        delta.add_state(state)
+    await apply_counter_delta(profile.id, delta, db)
+
+
+async def count_available_words(profile: LearningProfile, db: AsyncSession) -> int:
+    return await word_index.count_available(profile, db, fresh=True)
+
+
+async def compute_profile_counters(profile: LearningProfile, db: AsyncSession) -> dict:
+    known_result = await db.execute(
+        select(func.count())
+        .select_from(UserWord)
+        .join(Word, Word.id == UserWord.word_id)
+        .where(
+            UserWord.profile_id == profile.id,
+            UserWord.status.in_(KNOWN_STATUSES),
+            Word.lang == profile.native_lang,
+        )
+    )
+    learn_available = await count_available_words(profile, db)
+
+    days: dict[date, list[int]] = {}
+    learned_day = utc_day(UserWord.learned_at)
+    learned_result = await db.execute(
+        select(learned_day.label("day"), func.count().label("total"))
+        .select_from(UserWord)
+        .join(Word, Word.id == UserWord.word_id)
+        .where(
+            UserWord.profile_id == profile.id,
+            UserWord.learned_at.is_not(None),
+            UserWord.status.in_(KNOWN_STATUSES),
+            Word.lang == profile.native_lang,
+        )
+        .group_by(learned_day)
+    )
+    for row in learned_result.fetchall():
+        days.setdefault(row.day, [0, 0])[0] = int(row.total)
+
+    due_day = utc_day(UserWord.next_review_at)
+    due_result = await db.execute(
+        select(due_day.label("day"), func.count().label("total"))
+        .select_from(UserWord)
+        .join(Word, Word.id == UserWord.word_id)
+        .where(
+            UserWord.profile_id == profile.id,
+            UserWord.next_review_at.is_not(None),
+            Word.lang == profile.native_lang,
+            reviewable_condition(profile.id, profile.target_lang, UserWord.word_id),
+        )
+        .group_by(due_day)
+    )
+    for row in due_result.fetchall():
+        days.setdefault(row.day, [0, 0])[1] = int(row.total)
+
+    return {
+        "known_words": int(known_result.scalar() or 0),
+        "learn_available": learn_available,
+        "days": days,
+    }
+
+
+async def rebuild_profile_counters(profile: LearningProfile, db: AsyncSession) -> dict:
+    await lock_profile_counters(db, profile.id)
+    values = await compute_profile_counters(profile, db)
+    await db.execute(delete(ProfileDailyStat).where(ProfileDailyStat.profile_id == profile.id))
+    stmt = insert(ProfileCounter).values(
+        profile_id=profile.id,
+        known_words=values["known_words"],
+        learn_available=values["learn_available"],
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["profile_id"],
+        set_={
+            "known_words": stmt.excluded.known_words,
+            "learn_available": stmt.excluded.learn_available,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+    if values["days"]:
+        await db.execute(
+            insert(ProfileDailyStat).values(
+                [
+                    {"profile_id": profile.id, "day": day, "learned": learned, "due": due}
+                    for day, (learned, due) in values["days"].items()
+                ]
+            )
+        )
+    return values
+
+
+async def ensure_profile_counters(profile: LearningProfile, db: AsyncSession) -> tuple[int, int]:
+    result = await db.execute(
+        select(ProfileCounter.known_words, ProfileCounter.learn_available).where(
+            ProfileCounter.profile_id == profile.id
+        )
+    )
+    row = result.first()
+    if row is not None:
+        return int(row.known_words), int(row.learn_available)
+    values = await rebuild_profile_counters(profile, db)
+    await db.commit()
+    return values["known_words"], values["learn_available"]
+
+
+async def read_dashboard_counters(profile: LearningProfile, now: datetime, days: int, db: AsyncSession) -> dict:
+    known_words, learn_available = await ensure_profile_counters(profile, db)
+    today = utc_date(now)
+    start_date = today - timedelta(days=days - 1)
+    result = await db.execute(
+        select(ProfileDailyStat.day, ProfileDailyStat.learned, ProfileDailyStat.due).where(
+            ProfileDailyStat.profile_id == profile.id,
+            or_(
+                and_(ProfileDailyStat.day >= start_date, ProfileDailyStat.day <= today),
+                and_(ProfileDailyStat.day < today, ProfileDailyStat.due != 0),
+            ),
+        )
+    )
+    learned: dict[date, int] = {}
+    overdue = 0
+    for row in result.fetchall():
+        if row.day >= start_date:
+            learned[row.day] = int(row.learned)
+        if row.day < today:
+            overdue += int(row.due)
+
+    today_start = datetime.combine(today, time.min, tzinfo=timezone.utc)
+    due_today_result = await db.execute(
+        select(func.count())
+        .select_from(UserWord)
+        .join(Word, Word.id == UserWord.word_id)
+        .where(
+            UserWord.profile_id == profile.id,
+            UserWord.next_review_at >= today_start,
+            UserWord.next_review_at <= now,
+            Word.lang == profile.native_lang,
+            reviewable_condition(profile.id, profile.target_lang, UserWord.word_id),
+        )
+    )
+    return {
+        "known_words": known_words,
+        "learn_available": learn_available,
+        "review_available": overdue + int(due_today_result.scalar() or 0),
+        "start_date": start_date,
+        "learned": learned,
+    }
+
+
+def profiles_with_words(word_ids: list[int]):
+    return union(
+        select(UserWord.profile_id).where(UserWord.word_id.in_(word_ids)),
+        select(UserCustomWord.profile_id).where(UserCustomWord.word_id.in_(word_ids)),
+        select(UserCorpus.profile_id)
+        .join(CorpusWordStat, CorpusWordStat.corpus_id == UserCorpus.corpus_id)
+        .where(CorpusWordStat.word_id.in_(word_ids), UserCorpus.enabled.is_(True)),
+    )
+
+
+async def invalidate_profile_counters(db: AsyncSession, profile_ids=None) -> None:
+    counters_stmt = delete(ProfileCounter)
+    daily_stmt = delete(ProfileDailyStat)
+    if profile_ids is not None:
+        counters_stmt = counters_stmt.where(ProfileCounter.profile_id.in_(profile_ids))
+        daily_stmt = daily_stmt.where(ProfileDailyStat.profile_id.in_(profile_ids))
+    await db.execute(counters_stmt)
+    await db.execute(daily_stmt)
+
+
+async def check_profile_counters(profile: LearningProfile, db: AsyncSession) -> dict:
+    expected = await compute_profile_counters(profile, db)
+    counter_result = await db.execute(
+        select(ProfileCounter.known_words, ProfileCounter.learn_available).where(
+            ProfileCounter.profile_id == profile.id
+        )
+    )
+    counter = counter_result.first()
+    daily_result = await db.execute(
+        select(ProfileDailyStat.day, ProfileDailyStat.learned, ProfileDailyStat.due).where(
+            ProfileDailyStat.profile_id == profile.id
+        )
+    )
+    stored_days = {
+        row.day: [int(row.learned), int(row.due)]
+        for row in daily_result.fetchall()
+        if row.learned or row.due
+    }
+    drifted_days = sorted(
+        day
+        for day in set(stored_days) | set(expected["days"])
+        if stored_days.get(day, [0, 0]) != expected["days"].get(day, [0, 0])
+    )
+    built = counter is not None
+    known_drift = int(counter.known_words) - expected["known_words"] if built else 0
+    available_drift = int(counter.learn_available) - expected["learn_available"] if built else 0
+    return {
+        "profile_id": str(profile.id),
+        "built": built,
+        "known_words": expected["known_words"],
+        "known_drift": known_drift,
+        "learn_available": expected["learn_available"],
+        "available_drift": available_drift,
+        "drifted_days": [day.isoformat() for day in drifted_days],
+        "consistent": not built or (not known_drift and not available_drift and not drifted_days),
+    }
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from app.core.config import (
+    CACHE_BACKEND,
+    CACHE_LOCK_SECONDS,
+    CACHE_MEMORY_SIZE,
+    CACHE_PREFIX,
+    CACHE_REDIS_RETRY_SECONDS,
+    REDIS_URL,
+)
+
+try:
+    from redis import asyncio as redis_asyncio
+    from redis.exceptions import RedisError, WatchError
+except ImportError:
+    redis_asyncio = None
+    RedisError = OSError
+    WatchError = OSError
+
+LOCK_POLL_SECONDS = 0.05
+VERSION_TTL_SECONDS = 30 * 24 * 3600
+
+
+class MemoryBackend:
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max(1, max_items)
+        self._items: OrderedDict[str, tuple[float | None, bytes]] = OrderedDict()
+
+    def _live(self, key: str, now: float) -> bytes | None:
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= now:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: bytes, ttl: float | None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._items[key] = (expires_at, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        now = time.monotonic()
+        return [self._live(key, now) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._store(key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if self._live(key, time.monotonic()) is not None:
+            return False
+        self._store(key, value, ttl)
+        return True
+
+    async def incr(self, key: str, ttl: float) -> int:
+        current = self._live(key, time.monotonic())
+        value = int(current or 0) + 1
+        self._store(key, str(value).encode(), ttl)
+        return value
+
+    async def delete(self, keys: list[str]) -> None:
+        for key in keys:
+            self._items.pop(key, None)
+
+    async def delete_if(self, key: str, value: bytes) -> bool:
+        if self._live(key, time.monotonic()) != value:
+            return False
+        del self._items[key]
+        return True
+
+    async def close(self) -> None:
+        self._items.clear()
+
+
+class RedisBackend:
+    def __init__(self, client) -> None:
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        return cls(redis_asyncio.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5))
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000), nx=True))
+
+    async def incr(self, key: str, ttl: float) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, int(ttl))
+            value, _ = await pipe.execute()
+        return int(value)
+
+    async def delete(self, keys: list[str]) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def delete_if(self, key: str, value: bytes) -> bool:
+        # WATCH makes the delete fail if the key changed after the comparison.
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                if await pipe.get(key) != value:
+                    await pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        backend=None,
+        fallback: MemoryBackend | None = None,
+        prefix: str = "cache",
+        lock_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+    ) -> None:
+        self.backend = backend
+        self.fallback = fallback or MemoryBackend(10000)
+        self.prefix = prefix
+        self.lock_seconds = lock_seconds
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _version_key(self, profile_id) -> str:
+        return f"{self.prefix}:ver:{profile_id}"
+
+    def _value_key(self, namespace: str, profile_id, variant: str) -> str:
+        return f"{self.prefix}:{namespace}:{profile_id}:{variant}"
+
+    def _active(self):
+        if self.backend is not None and time.monotonic() >= self._down_until:
+            return self.backend
+        return self.fallback
+
+    async def _call(self, method: str, *args):
+        backend = self._active()
+        try:
+            return await getattr(backend, method)(*args)
+        except (RedisError, OSError):
+            if backend is self.fallback:
+                raise
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry_seconds
+            return await getattr(self.fallback, method)(*args)
+
+    async def _lookup(self, key: str, version_key: str) -> tuple[bool, Any, int]:
+        raw_value, raw_version = await self._call("get_many", [key, version_key])
+        version = int(raw_version or 0)
+        if raw_value is None:
+            return False, None, version
+        entry = json.loads(raw_value)
+        if entry.get("v") != version:
+            return False, None, version
+        return True, entry.get("data"), version
+
+    async def get(self, namespace: str, profile_id, variant: str = "default") -> Any | None:
+        found, data, _ = await self._lookup(
+            self._value_key(namespace, profile_id, variant),
+            self._version_key(profile_id),
+        )
+        return data if found else None
+
+    async def set(self, namespace: str, profile_id, data: Any, ttl: float, variant: str = "default") -> None:
+        version = await self.profile_version(profile_id)
+        await self._store(self._value_key(namespace, profile_id, variant), version, data, ttl)
+
+    async def _store(self, key: str, version: int, data: Any, ttl: float) -> None:
+        payload = json.dumps({"v": version, "data": data}, ensure_ascii=False, separators=(",", ":"))
+        await self._call("set", key, payload.encode(), ttl)
+
+    async def get_or_set(
+        self,
+        namespace: str,
+        profile_id,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        variant: str = "default",
+        refresh: bool = False,
+    ) -> Any:
+        key = self._value_key(namespace, profile_id, variant)
+        version_key = self._version_key(profile_id)
+        while not refresh:
+            found, data, version = await self._lookup(key, version_key)
+            if found:
+                self.hits += 1
+                return data
+            pending = self._inflight.get(f"{key}@{version}")
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leader's client went away; the waiters' clients did not, so
+                # they look again and one of them loads the data instead.
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+        if refresh:
+            version = await self.profile_version(profile_id)
+        self.misses += 1
+
+        flight_key = f"{key}@{version}"
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex.encode()
+        locked = False
+        try:
+            if not refresh:
+                locked = await self._call("add", lock_key, token, self.lock_seconds)
+                if not locked:
+                    found, data = await self._wait_for(key, version_key)
+                    if found:
+                        self.coalesced += 1
+                        future.set_result(data)
+                        return data
+            data = await loader()
+            await self._store(key, version, data, ttl)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(flight_key) is future:
+                del self._inflight[flight_key]
+            if locked:
+                await self._release(lock_key, token)
+
+    async def _wait_for(self, key: str, version_key: str) -> tuple[bool, Any]:
+        deadline = time.monotonic() + self.lock_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            found, data, _ = await self._lookup(key, version_key)
+            if found:
+                return True, data
+        return False, None
+
+    async def _release(self, lock_key: str, token: bytes) -> None:
+        try:
+            await self._call("delete_if", lock_key, token)
+        except (RedisError, OSError):
+            pass
+
+    async def profile_version(self, profile_id) -> int:
+        return int((await self._call("get_many", [self._version_key(profile_id)]))[0] or 0)
+
+    async def invalidate_profile(self, profile_id) -> None:
+        await self._call("incr", self._version_key(profile_id), VERSION_TTL_SECONDS)
+        if self._active() is not self.fallback:
+            await self.fallback.incr(self._version_key(profile_id), VERSION_TTL_SECONDS)
+
+    async def invalidate_profiles(self, profile_ids) -> None:
+        for profile_id in set(profile_ids):
+            await self.invalidate_profile(profile_id)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self._active() is not self.fallback else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+        await self.fallback.close()
+
+
+def create_response_cache() -> ResponseCache:
+    backend = None
+    if CACHE_BACKEND == "redis" and redis_asyncio is not None:
+        backend = RedisBackend.from_url(REDIS_URL)
+    return ResponseCache(
+        backend=backend,
+        fallback=MemoryBackend(CACHE_MEMORY_SIZE),
+        prefix=CACHE_PREFIX,
+        lock_seconds=CACHE_LOCK_SECONDS,
+        retry_seconds=CACHE_REDIS_RETRY_SECONDS,
+    )
+
+
+response_cache = create_response_cache()
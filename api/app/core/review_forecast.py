@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, Numeric, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.scheduler import DEFAULT_EASE, simulate_grouped_review_load
+from app.models import NotificationSettings, UserWord
+
+DEFAULT_REVIEW_HOUR = 9
+
+
+async def load_review_calendar(profile_id, now: datetime, exclude_word_ids: list[int], db: AsyncSession) -> dict[int, int]:
+    due_date = cast(func.timezone("UTC", UserWord.next_review_at), Date)
+    stmt = (
+        select(due_date.label("due_date"), func.count().label("total"))
+        .where(UserWord.profile_id == profile_id, UserWord.next_review_at > now)
+        .group_by(due_date)
+    )
+    if exclude_word_ids:
+        stmt = stmt.where(UserWord.word_id.notin_(exclude_word_ids))
+    result = await db.execute(stmt)
+    today = now.date()
+    return {(row.due_date - today).days: int(row.total) for row in result.fetchall()}
+
+
+async def forecast_review_load(
+    db: AsyncSession,
+    days: int,
+    now: datetime,
+    profile_id=None,
+    success_rate: float = 0.85,
+) -> dict:
+    # Words are counted per schedule state in SQL; the simulator only ever sees
+    # distinct states, so the global forecast does not load user_words rows.
+    scheduled = UserWord.next_review_at.is_not(None)
+    if profile_id is not None:
+        scheduled = scheduled & (UserWord.profile_id == profile_id)
+    due_date = cast(func.timezone("UTC", UserWord.next_review_at), Date)
+    states = (
+        select(
+            func.coalesce(NotificationSettings.review_hour, DEFAULT_REVIEW_HOUR).label("review_hour"),
+            func.coalesce(UserWord.repetitions, 0).label("repetitions"),
+            func.coalesce(UserWord.interval_days, 0).label("interval_days"),
+            func.round(cast(func.coalesce(UserWord.ease_factor, DEFAULT_EASE), Numeric), 2).label("ease_factor"),
+            func.greatest(func.least(due_date - now.date(), max(days, 0)), 0).label("due_in_days"),
+        )
+        .outerjoin(NotificationSettings, NotificationSettings.profile_id == UserWord.profile_id)
+        .where(scheduled)
+        .subquery()
+    )
+    stmt = (
+        select(*states.c, func.count().label("words"))
+        .group_by(*states.c)
+        .order_by(states.c.review_hour)
+    )
+    rows = (await db.execute(stmt)).fetchall()
+    profiles = await db.scalar(select(func.count(func.distinct(UserWord.profile_id))).where(scheduled))
+
+    groups: dict[int, list] = {}
+    for row in rows:
+        groups.setdefault(row.review_hour, []).append(row)
+
+    totals = [0] * max(days, 0)
+    by_hour: dict[int, list[int]] = {}
+    for hour, items in groups.items():
+        counts = simulate_grouped_review_load(
+            [item.repetitions for item in items],
+            [item.interval_days for item in items],
+            [float(item.ease_factor) for item in items],
+            [item.due_in_days for item in items],
+            [item.words for item in items],
+            days,
+            success_rate=success_rate,
+            seed=hour,
+        )
+        by_hour[hour] = counts
+        totals = [total + count for total, count in zip(totals, counts)]
+
+    start = now.date()
+    return {
+        "profiles": int(profiles or 0),
+        "words": sum(row.words for row in rows),
+        "dates": [start + timedelta(days=offset) for offset in range(max(days, 0))],
+        "totals": totals,
+        "by_hour": by_hour,
+    }
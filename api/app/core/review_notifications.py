@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Select, and_, exists, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import APP_BASE_URL, REVIEW_NOTIFY_CHUNK_SIZE
+from app.db.session import AsyncSessionLocal
+from app.models import (
+    LearningProfile,
+    NotificationOutbox,
+    NotificationSettings,
+    Translation,
+    UserCustomWord,
+    UserWord,
+)
+
+
+def build_review_reminder(review_due: int) -> tuple[str, str]:
+    link = f"{APP_BASE_URL.rstrip('/')}/review"
+    subject = f"Words to review: {review_due}"
+    body = (
+        f"You have {review_due} words to review today:\n"
+        f"{link}\n\n"
+        f"\u0421\u043b\u043e\u0432 \u043a \u043f\u043e\u0432\u0442\u043e\u0440\u0435\u043d\u0438\u044e: {review_due}\n"
+        f"{link}"
+    )
+    return subject, body
+
+
+def start_of_day(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def not_notified_today(now: datetime):
+    return or_(
+        NotificationSettings.last_notified_at.is_(None),
+        NotificationSettings.last_notified_at < start_of_day(now),
+    )
+
+
+def eligible_profiles(now: datetime, profile_id: uuid.UUID | None = None) -> Select:
+    stmt = (
+        select(
+            NotificationSettings.profile_id,
+            NotificationSettings.user_id,
+            NotificationSettings.email_enabled,
+            NotificationSettings.telegram_enabled,
+            NotificationSettings.push_enabled,
+        )
+        .join(LearningProfile, LearningProfile.id == NotificationSettings.profile_id)
+        .where(
+            or_(
+                NotificationSettings.email_enabled,
+                NotificationSettings.telegram_enabled,
+                NotificationSettings.push_enabled,
+            ),
+            or_(NotificationSettings.review_hour.is_(None), NotificationSettings.review_hour <= now.hour),
+            not_notified_today(now),
+        )
+    )
+    if profile_id:
+        stmt = stmt.where(NotificationSettings.profile_id == profile_id)
+    return stmt
+
+
+async def count_due_reviews(
+    session: AsyncSession,
+    profile_ids: list[uuid.UUID],
+    now: datetime,
+) -> dict[uuid.UUID, int]:
+    # A due word counts when it has a translation into the profile's target language,
+    # either shared or the profile's own custom one.
+    has_translation = exists().where(
+        Translation.word_id == UserWord.word_id,
+        Translation.target_lang == LearningProfile.target_lang,
+    )
+    has_custom = exists().where(
+        UserCustomWord.profile_id == UserWord.profile_id,
+        UserCustomWord.word_id == UserWord.word_id,
+        UserCustomWord.target_lang == LearningProfile.target_lang,
+    )
+    result = await session.execute(
+        select(UserWord.profile_id, func.count())
+        .join(LearningProfile, LearningProfile.id == UserWord.profile_id)
+        .where(
+            UserWord.profile_id.in_(profile_ids),
+            UserWord.next_review_at.is_not(None),
+            UserWord.next_review_at <= now,
+            or_(has_translation, has_custom),
+        )
+        .group_by(UserWord.profile_id)
+    )
+    return {profile_id: int(count) for profile_id, count in result.all()}
+
+
+def notification_channels(row) -> list[str]:
+    channels = []
+    if row.email_enabled:
+        channels.append("email")
+    if row.telegram_enabled:
+        channels.append("telegram")
+    if row.push_enabled:
+        channels.append("push")
+    return channels
+
+
+async def notify_chunk(session: AsyncSession, rows: list, now: datetime) -> tuple[int, int]:
+    due = await count_due_reviews(session, [row.profile_id for row in rows], now)
+    if not due:
+        return 0, 0
+    # Marking first and inserting only for the rows we actually flipped keeps a
+    # concurrent or restarted run from queueing the same profile twice in a day.
+    marked = set(
+        (
+            await session.execute(
+                update(NotificationSettings)
+                .where(and_(NotificationSettings.profile_id.in_(list(due)), not_notified_today(now)))
+                .values(last_notified_at=now)
+                .returning(NotificationSettings.profile_id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    outbox_rows = [
+        {
+            "profile_id": row.profile_id,
+            "user_id": row.user_id,
+            "channel": channel,
+            "payload": {"review_due": due[row.profile_id]},
+            "status": "pending",
+            "scheduled_at": now,
+        }
+        for row in rows
+        if row.profile_id in marked
+        for channel in notification_channels(row)
+    ]
+    if outbox_rows:
+        await session.execute(insert(NotificationOutbox), outbox_rows)
+    return len(marked), len(outbox_rows)
+
+
+async def notify_due_profiles(
+    session: AsyncSession,
+    stmt: Select,
+    now: datetime,
+    chunk_size: int = REVIEW_NOTIFY_CHUNK_SIZE,
+    session_factory=AsyncSessionLocal,
+) -> dict:
+    scanned = notified = created = chunks = 0
+    # The candidate list is read through a server-side cursor on its own connection so
+    # that each chunk can be committed without closing it.
+    async with session_factory() as reader:
+        result = await reader.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            chunk_notified, chunk_created = await notify_chunk(session, rows, now)
+            await session.commit()
+            scanned += len(rows)
+            notified += chunk_notified
+            created += chunk_created
+            chunks += 1
+    return {
+        "notifications_created": created,
+        "profiles_notified": notified,
+        "profiles_scanned": scanned,
+        "chunks": chunks,
+    }
+
+
+async def fan_out_review_notifications(
+    session: AsyncSession,
+    profile_id: uuid.UUID | None = None,
+    now: datetime | None = None,
+    chunk_size: int = REVIEW_NOTIFY_CHUNK_SIZE,
+) -> dict:
+    now = now or datetime.now(timezone.utc)
+    return await notify_due_profiles(session, eligible_profiles(now, profile_id), now, chunk_size)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Float, case, cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.vocabulary import word_lemma
+from app.models import ReviewEvent, UserWord, Word, WordReviewStat
+
+WEAK_WORD_SORTS = {"wrong", "correct", "accuracy", "alpha"}
+# First half of the two-key advisory lock guarding a profile's review stats.
+REVIEW_STATS_LOCK = 0x52535754
+
+
+def review_stats_lock_key(profile_id) -> int:
+    return int.from_bytes(uuid.UUID(str(profile_id)).bytes[:4], "big", signed=True)
+
+
+async def lock_review_stats(db: AsyncSession, profile_ids, shared: bool = False) -> None:
+    # Submits take the lock shared before their first write, so they never block
+    # each other; a rebuild takes it exclusively, waits for submits in flight to
+    # commit and holds new ones back until its own transaction ends.
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    for key in sorted({review_stats_lock_key(profile_id) for profile_id in profile_ids}):
+        await db.execute(select(lock(REVIEW_STATS_LOCK, key)))
+
+
+def weak_word_order(sort: str, order: str) -> list:
+    descending = order == "desc"
+    if sort == "alpha":
+        columns = [(WordReviewStat.lemma, False)]
+    elif sort == "accuracy":
+        columns = [(WordReviewStat.accuracy, False), (WordReviewStat.wrong_count, True)]
+    elif sort == "correct":
+        columns = [(WordReviewStat.correct_count, False), (WordReviewStat.wrong_count, True)]
+    else:
+        columns = [(WordReviewStat.wrong_count, False), (WordReviewStat.correct_count, True)]
+    return [
+        column.desc() if descending != reverse else column.asc()
+        for column, reverse in columns
+    ]
+
+
+async def apply_review_results(profile_id, results: dict[int, bool], now: datetime, db: AsyncSession) -> None:
+    if not results:
+        return
+    rows = []
+    for word_id, correct in results.items():
+        rows.append(
+            {
+                "profile_id": profile_id,
+                "word_id": word_id,
+                "lemma": word_lemma(word_id),
+                "wrong_count": 0 if correct else 1,
+                "correct_count": 1 if correct else 0,
+                "accuracy": 1.0 if correct else 0.0,
+                "last_result": "correct" if correct else "wrong",
+                "last_review_at": now,
+            }
+        )
+    stmt = insert(WordReviewStat).values(rows)
+    wrong_count = WordReviewStat.wrong_count + stmt.excluded.wrong_count
+    correct_count = WordReviewStat.correct_count + stmt.excluded.correct_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["profile_id", "word_id"],
+        set_={
+            "wrong_count": wrong_count,
+            "correct_count": correct_count,
+            "accuracy": cast(correct_count, Float) / (wrong_count + correct_count),
+            "last_result": stmt.excluded.last_result,
+            "last_review_at": stmt.excluded.last_review_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+def aggregate_review_events(profile_ids=None, word_ids=None):
+    wrong_count = func.sum(case((ReviewEvent.result == "wrong", 1), else_=0))
+    correct_count = func.sum(case((ReviewEvent.result == "correct", 1), else_=0))
+    stmt = (
+        select(
+            ReviewEvent.profile_id,
+            ReviewEvent.word_id,
+            func.min(Word.lemma).label("lemma"),
+            wrong_count.label("wrong_count"),
+            correct_count.label("correct_count"),
+            case(
+                (wrong_count + correct_count > 0, cast(correct_count, Float) / (wrong_count + correct_count)),
+                else_=0.0,
+            ).label("accuracy"),
+            func.array_agg(aggregate_order_by(ReviewEvent.result, ReviewEvent.id.desc()))[1].label("last_result"),
+            func.max(ReviewEvent.created_at).label("last_review_at"),
+        )
+        .join(Word, Word.id == ReviewEvent.word_id)
+        .group_by(ReviewEvent.profile_id, ReviewEvent.word_id)
+    )
+    if profile_ids is not None:
+        stmt = stmt.where(ReviewEvent.profile_id.in_(profile_ids))
+    if word_ids is not None:
+        stmt = stmt.where(ReviewEvent.word_id.in_(word_ids))
+    return stmt
+
+
+async def rebuild_review_stats(db: AsyncSession, profile_ids=None, word_ids=None) -> int:
+    locked = profile_ids
+    if locked is None:
+        events = select(ReviewEvent.profile_id).distinct()
+        if word_ids is not None:
+            events = events.where(ReviewEvent.word_id.in_(word_ids))
+        locked = (await db.execute(events)).scalars().all()
+    await lock_review_stats(db, locked)
+    delete_stmt = delete(WordReviewStat)
+    if profile_ids is not None:
+        delete_stmt = delete_stmt.where(WordReviewStat.profile_id.in_(profile_ids))
+    if word_ids is not None:
+        delete_stmt = delete_stmt.where(WordReviewStat.word_id.in_(word_ids))
+    await db.execute(delete_stmt)
+    source = aggregate_review_events(profile_ids, word_ids).subquery()
+    columns = [
+        "profile_id",
+        "word_id",
+        "lemma",
+        "wrong_count",
+        "correct_count",
+        "accuracy",
+        "last_result",
+        "last_review_at",
+    ]
+    stmt = insert(WordReviewStat).from_select(columns, select(source))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["profile_id", "word_id"],
+        set_={name: getattr(stmt.excluded, name) for name in columns[2:]},
+    )
+    result = await db.execute(stmt)
+
+    sync_stmt = (
+        update(UserWord)
+        .where(UserWord.profile_id == WordReviewStat.profile_id, UserWord.word_id == WordReviewStat.word_id)
+        .values(
+            wrong_count=WordReviewStat.wrong_count,
+            correct_count=WordReviewStat.correct_count,
+            accuracy=WordReviewStat.accuracy,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if profile_ids is not None:
+        sync_stmt = sync_stmt.where(WordReviewStat.profile_id.in_(profile_ids))
+    if word_ids is not None:
+        sync_stmt = sync_stmt.where(WordReviewStat.word_id.in_(word_ids))
+    await db.execute(sync_stmt)
+    return result.rowcount or 0
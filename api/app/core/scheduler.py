@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+FUZZ_MIN_INTERVAL = 3
+FUZZ_FACTOR = 0.05
+SEED_MASK = (1 << 64) - 1
+
+
+def sm2_arrays(quality, repetitions, interval_days, ease_factor) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    quality = np.asarray(quality, dtype=np.int64)
+    repetitions = np.asarray(repetitions, dtype=np.int64)
+    interval_days = np.asarray(interval_days, dtype=np.int64)
+    ease = np.asarray(ease_factor, dtype=np.float64)
+
+    ease = np.where(ease == 0, DEFAULT_EASE, ease)
+    miss = 5 - quality
+    ease = np.maximum(MIN_EASE, ease + (0.1 - miss * (0.08 + miss * 0.02)))
+
+    passed = quality >= 3
+    grown = np.maximum(1, np.round(interval_days * ease)).astype(np.int64)
+    next_interval = np.where(repetitions <= 0, 1, np.where(repetitions == 1, 6, grown))
+    next_interval = np.where(passed, next_interval, 1)
+    next_repetitions = np.where(passed, repetitions + 1, 0)
+    return next_repetitions, next_interval, ease
+
+
+def fuzz_spread(interval_days) -> np.ndarray:
+    interval_days = np.asarray(interval_days, dtype=np.int64)
+    spread = np.rint(interval_days * FUZZ_FACTOR).astype(np.int64) + 1
+    return np.where(interval_days < FUZZ_MIN_INTERVAL, 0, spread)
+
+
+def seeded_unit(word_ids, repetitions, seed: int) -> np.ndarray:
+    x = np.asarray(word_ids, dtype=np.int64).astype(np.uint64)
+    x = x ^ (np.asarray(repetitions, dtype=np.int64).astype(np.uint64) << np.uint64(40))
+    x = x ^ np.uint64(seed & SEED_MASK)
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def smooth_intervals(
+    interval_days,
+    word_ids,
+    repetitions,
+    seed: int,
+    calendar: dict[int, int] | None = None,
+    capacity: int = 0,
+    offset: int = 0,
+) -> np.ndarray:
+    interval_days = np.asarray(interval_days, dtype=np.int64)
+    spread = fuzz_spread(interval_days)
+    unit = seeded_unit(word_ids, repetitions, seed)
+    fuzzed = interval_days + np.rint((unit * 2 - 1) * spread).astype(np.int64)
+    if calendar is None or capacity <= 0:
+        return fuzzed
+
+    result = fuzzed.tolist()
+    for index, (interval, delta) in enumerate(zip(interval_days.tolist(), spread.tolist())):
+        target = result[index]
+        if delta:
+            lo = max(1, interval - delta)
+            window = sorted(range(lo, interval + delta + 1), key=lambda day: (abs(day - target), day))
+            free = [day for day in window if calendar.get(offset + day, 0) < capacity]
+            if free:
+                target = free[0]
+            else:
+                target = min(window, key=lambda day: calendar.get(offset + day, 0))
+            result[index] = target
+        calendar[offset + target] = calendar.get(offset + target, 0) + 1
+    return np.asarray(result, dtype=np.int64)
+
+
+def sm2_schedule(
+    quality: list[int],
+    repetitions: list[int],
+    interval_days: list[int],
+    ease_factor: list[float],
+    now: datetime,
+    word_ids: list[int] | None = None,
+    fuzz_seed: int | None = None,
+    calendar: dict[int, int] | None = None,
+    capacity: int = 0,
+) -> list[tuple[int, int, float, datetime]]:
+    if not quality:
+        return []
+    next_repetitions, next_interval, ease = sm2_arrays(quality, repetitions, interval_days, ease_factor)
+    if fuzz_seed is not None and word_ids is not None:
+        next_interval = smooth_intervals(next_interval, word_ids, next_repetitions, fuzz_seed, calendar, capacity)
+    intervals = next_interval.tolist()
+    due_at = {days: now + timedelta(days=days) for days in set(intervals)}
+    return [
+        (reps, days, ef, due_at[days])
+        for reps, days, ef in zip(next_repetitions.tolist(), intervals, ease.tolist())
+    ]
+
+
+def simulate_review_load(
+    repetitions,
+    interval_days,
+    ease_factor,
+    due_in_days,
+    days: int,
+    success_rate: float = 0.85,
+    seed: int = 0,
+    word_ids=None,
+    fuzz_seed: int | None = None,
+    capacity: int = 0,
+) -> list[int]:
+    if days <= 0:
+        return []
+    repetitions = np.asarray(repetitions, dtype=np.int64).copy()
+    interval_days = np.asarray(interval_days, dtype=np.int64).copy()
+    ease = np.asarray(ease_factor, dtype=np.float64).copy()
+    due = np.maximum(np.asarray(due_in_days, dtype=np.int64), 0)
+    rng = np.random.default_rng(seed)
+    smoothing = fuzz_seed is not None and word_ids is not None
+    if smoothing:
+        word_ids = np.asarray(word_ids, dtype=np.int64)
+        calendar = dict(zip(*(item.tolist() for item in np.unique(due, return_counts=True))))
+    counts: list[int] = []
+    for day in range(days):
+        mask = due <= day
+        total = int(mask.sum())
+        counts.append(total)
+        if not total:
+            continue
+        quality = np.where(rng.random(total) < success_rate, 4, 2)
+        reps, interval, ef = sm2_arrays(quality, repetitions[mask], interval_days[mask], ease[mask])
+        if smoothing:
+            interval = smooth_intervals(interval, word_ids[mask], reps, fuzz_seed, calendar, capacity, day)
+        repetitions[mask] = reps
+        interval_days[mask] = interval
+        ease[mask] = ef
+        due[mask] = day + interval
+    return counts
+
+
+def merge_states(repetitions, interval_days, ease, due, weights) -> tuple[np.ndarray, ...]:
+    keep = weights > 0
+    keys = np.column_stack([repetitions[keep], interval_days[keep], ease[keep], due[keep]]).astype(np.float64)
+    if not len(keys):
+        return tuple(np.zeros(0, dtype=dtype) for dtype in (np.int64, np.int64, np.float64, np.int64, np.int64))
+    states, inverse = np.unique(keys, axis=0, return_inverse=True)
+    merged = np.rint(np.bincount(inverse.reshape(-1), weights=weights[keep])).astype(np.int64)
+    return (
+        states[:, 0].astype(np.int64),
+        states[:, 1].astype(np.int64),
+        states[:, 2],
+        states[:, 3].astype(np.int64),
+        merged,
+    )
+
+
+def simulate_grouped_review_load(
+    repetitions,
+    interval_days,
+    ease_factor,
+    due_in_days,
+    weights,
+    days: int,
+    success_rate: float = 0.85,
+    seed: int = 0,
+) -> list[int]:
+    # Each row is a schedule state shared by `weights` words. A due row splits
+    # into a passed and a failed share and equal states are merged again, so the
+    # cost follows the number of distinct states rather than the number of words.
+    if days <= 0:
+        return []
+    repetitions = np.asarray(repetitions, dtype=np.int64)
+    interval_days = np.asarray(interval_days, dtype=np.int64)
+    ease = np.round(np.asarray(ease_factor, dtype=np.float64), 2)
+    due = np.clip(np.asarray(due_in_days, dtype=np.int64), 0, days)
+    weights = np.asarray(weights, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    counts: list[int] = []
+    for day in range(days):
+        mask = due <= day
+        due_words = weights[mask]
+        total = int(due_words.sum())
+        counts.append(total)
+        if not total:
+            continue
+        held = ~mask
+        passed = rng.binomial(due_words, success_rate)
+        size = len(due_words)
+        quality = np.concatenate([np.full(size, 4), np.full(size, 2)])
+        reps, interval, ef = sm2_arrays(
+            quality,
+            np.tile(repetitions[mask], 2),
+            np.tile(interval_days[mask], 2),
+            np.tile(ease[mask], 2),
+        )
+        repetitions, interval_days, ease, due, weights = merge_states(
+            np.concatenate([repetitions[held], reps]),
+            np.concatenate([interval_days[held], interval]),
+            np.concatenate([ease[held], np.round(ef, 2)]),
+            np.concatenate([due[held], np.minimum(day + interval, days)]),
+            np.concatenate([weights[held], passed, due_words - passed]),
+        )
+    return counts
+
+
+def days_until(timestamps: list[datetime], now: datetime) -> np.ndarray:
+    if not timestamps:
+        return np.zeros(0, dtype=np.int64)
+    start = datetime.combine(now.date(), datetime.min.time(), tzinfo=now.tzinfo).timestamp()
+    seconds = np.asarray([value.timestamp() for value in timestamps], dtype=np.float64)
+    return np.floor((seconds - start) / 86400).astype(np.int64)
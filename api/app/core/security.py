@@ -1,11 +1,13 @@
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from app.core.config import JWT_ALGORITHM, JWT_EXPIRE_MINUTES, JWT_SECRET
+from app.core.config import AUTH_TOKEN_CACHE_SIZE, JWT_ALGORITHM, JWT_EXPIRE_MINUTES, JWT_SECRET
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
@@ -21,18 +23,79 @@ def verify_password(password: str, hashed_password: str) -> bool:
         return False
 
 
-def create_access_token(subject: uuid.UUID | str) -> str:
+def create_access_token(subject: uuid.UUID | str, auth_version: int = 0) -> str:
     expires = datetime.now(timezone.utc) + timedelta(minutes=JWT_EXPIRE_MINUTES)
-    payload = {"sub": str(subject), "exp": expires}
+    payload = {"sub": str(subject), "exp": expires, "ver": auth_version}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
-def decode_access_token(token: str) -> str:
+class TokenCache:
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._items: OrderedDict[str, tuple[float, tuple[str, int]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> tuple[str, int] | None:
+        entry = self._items.get(token)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._items[token]
+            self.misses += 1
+            return None
+        self._items.move_to_end(token)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, token: str, claims: tuple[str, int], expires_at: float) -> None:
+        if self.max_items <= 0:
+            return
+        self._items[token] = (expires_at, claims)
+        self._items.move_to_end(token)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+def read_access_claims(token: str) -> tuple[str, int, float]:
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        subject = payload.get("sub")
-        if not subject:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return str(subject)
     except JWTError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
+    subject = payload.get("sub")
+    if not subject:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    try:
+        auth_version = int(payload.get("ver") or 0)
+        expires_at = float(payload["exp"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
+    return str(subject), auth_version, expires_at
+
+
+def decode_access_claims(token: str) -> tuple[str, int]:
+    claims = token_cache.get(token)
+    if claims is None:
+        subject, auth_version, expires_at = read_access_claims(token)
+        claims = (subject, auth_version)
+        token_cache.set(token, claims, expires_at)
+    return claims
+
+
+def decode_access_token(token: str) -> str:
+    return decode_access_claims(token)[0]
+
+
+def bearer_token(authorization: str | None) -> str | None:
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import time
+import urllib.parse
+
+from app.core.config import (
+    TELEGRAM_API_URL,
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_IDLE_SECONDS,
+    TELEGRAM_POOL_SIZE,
+)
+
+RECONNECT_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionError)
+
+
+class TelegramError(Exception):
+    def __init__(self, status: int, description: str, retry_after: float | None = None) -> None:
+        super().__init__(f"{status} {description}")
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+
+
+def is_permanent_error(exc: Exception) -> bool:
+    # 400 (chat not found), 403 (bot blocked) and 404 do not get better on retry;
+    # 429 and 5xx do.
+    return isinstance(exc, TelegramError) and exc.status in (400, 403, 404)
+
+
+class TelegramConnection:
+    def __init__(self, base_url: str, token: str, idle_seconds: float, timeout: float = 10) -> None:
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname or ""
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip("/")
+        self.token = token
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.conn: http.client.HTTPConnection | None = None
+        self.last_used = 0.0
+        self.connects = 0
+        self.sent = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if not self.token:
+            raise RuntimeError("Telegram bot token is not configured")
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = connection_class(self.host, self.port, timeout=self.timeout)
+        self.connects += 1
+        return conn
+
+    def _post(self, path: str, body: bytes) -> tuple[int, bytes]:
+        self.conn.request(
+            "POST",
+            path,
+            body=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded", "Connection": "keep-alive"},
+        )
+        response = self.conn.getresponse()
+        data = response.read()
+        if response.will_close:
+            self.close()
+        return response.status, data
+
+    def send(self, chat_id: str, text: str) -> None:
+        if self.conn is not None and time.monotonic() - self.last_used > self.idle_seconds:
+            self.close()
+        if self.conn is None:
+            self.conn = self._connect()
+        path = f"{self.prefix}/bot{self.token}/sendMessage"
+        body = urllib.parse.urlencode({"chat_id": chat_id, "text": text}).encode("utf-8")
+        try:
+            try:
+                status, data = self._post(path, body)
+            except RECONNECT_ERRORS:
+                self.close()
+                self.conn = self._connect()
+                status, data = self._post(path, body)
+        finally:
+            self.last_used = time.monotonic()
+        if status != 200:
+            try:
+                result = json.loads(data)
+            except ValueError:
+                result = {}
+            retry_after = (result.get("parameters") or {}).get("retry_after")
+            raise TelegramError(status, result.get("description") or "request failed", retry_after)
+        self.sent += 1
+
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        self.conn.close()
+        self.conn = None
+
+
+class TelegramPool:
+    def __init__(self, size: int, **settings) -> None:
+        self.connections = [TelegramConnection(**settings) for _ in range(max(1, size))]
+        self.configured = bool(settings.get("token"))
+        self._idle: asyncio.Queue[TelegramConnection] | None = None
+
+    def _queue(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for connection in self.connections:
+                self._idle.put_nowait(connection)
+        return self._idle
+
+    async def send(self, chat_id: str, text: str) -> None:
+        idle = self._queue()
+        connection = await idle.get()
+        try:
+            await asyncio.to_thread(connection.send, chat_id, text)
+        except TelegramError:
+            raise
+        except Exception:
+            await asyncio.to_thread(connection.close)
+            raise
+        finally:
+            idle.put_nowait(connection)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.connections),
+            "open": sum(1 for connection in self.connections if connection.conn is not None),
+            "connects": sum(connection.connects for connection in self.connections),
+            "sent": sum(connection.sent for connection in self.connections),
+        }
+
+    async def close(self) -> None:
+        for connection in self.connections:
+            await asyncio.to_thread(connection.close)
+        self._idle = None
+
+
+def create_telegram_pool(size: int = TELEGRAM_POOL_SIZE) -> TelegramPool:
+    return TelegramPool(
+        size,
+        base_url=TELEGRAM_API_URL,
+        token=TELEGRAM_BOT_TOKEN,
+        idle_seconds=TELEGRAM_IDLE_SECONDS,
+    )
+
+
+telegram_pool = create_telegram_pool()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+
+from app.core.config import (
+    TRANSLATION_CACHE_PROFILES,
+    TRANSLATION_CACHE_SIZE,
+    TRANSLATION_CACHE_TTL_SECONDS,
+)
+
+
+class TranslationCache:
+    def __init__(self, max_items: int, max_profiles: int, ttl_seconds: float) -> None:
+        self.max_items = max(1, max_items)
+        self.max_profiles = max(1, max_profiles)
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._items: OrderedDict[tuple[int, str], tuple[float, tuple[str, ...]]] = OrderedDict()
+        self._custom: OrderedDict[tuple[str, str], tuple[float, dict[int, tuple[str, ...]]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return now - stored_at > self.ttl_seconds
+
+    def get_many(self, word_ids: list[int], target_lang: str) -> tuple[dict[int, tuple[str, ...]], list[int]]:
+        now = time.monotonic()
+        found: dict[int, tuple[str, ...]] = {}
+        missing: list[int] = []
+        for word_id in word_ids:
+            key = (word_id, target_lang)
+            entry = self._items.get(key)
+            if entry is None or self._expired(entry[0], now):
+                if entry is not None:
+                    del self._items[key]
+                missing.append(word_id)
+                continue
+            self._items.move_to_end(key)
+            found[word_id] = entry[1]
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def set_many(
+        self,
+        values: dict[int, tuple[str, ...]],
+        target_lang: str,
+        version: int | None = None,
+    ) -> None:
+        if version is not None and version != self.version:
+            return
+        now = time.monotonic()
+        for word_id, translations in values.items():
+            key = (word_id, target_lang)
+            self._items[key] = (now, tuple(translations))
+            self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def get_custom(self, profile_id, target_lang: str) -> dict[int, tuple[str, ...]] | None:
+        key = (str(profile_id), target_lang)
+        entry = self._custom.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[0], time.monotonic()):
+            del self._custom[key]
+            return None
+        self._custom.move_to_end(key)
+        return entry[1]
+
+    def set_custom(
+        self,
+        profile_id,
+        target_lang: str,
+        values: dict[int, tuple[str, ...]],
+        version: int | None = None,
+    ) -> None:
+        if version is not None and version != self.version:
+            return
+        key = (str(profile_id), target_lang)
+        self._custom[key] = (time.monotonic(), values)
+        self._custom.move_to_end(key)
+        while len(self._custom) > self.max_profiles:
+            self._custom.popitem(last=False)
+
+    def invalidate_words(self, word_ids) -> None:
+        self.version += 1
+        targets = set(word_ids)
+        for key in [key for key in self._items if key[0] in targets]:
+            del self._items[key]
+
+    def invalidate_profile(self, profile_id) -> None:
+        self.version += 1
+        profile_key = str(profile_id)
+        for key in [key for key in self._custom if key[0] == profile_key]:
+            del self._custom[key]
+
+    def invalidate_custom(self) -> None:
+        self.version += 1
+        self._custom.clear()
+
+    def clear(self) -> None:
+        self.version += 1
+        self._items.clear()
+        self._custom.clear()
+
+
+translation_cache = TranslationCache(
+    max_items=TRANSLATION_CACHE_SIZE,
+    max_profiles=TRANSLATION_CACHE_PROFILES,
+    ttl_seconds=TRANSLATION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import exists, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CorpusWordStat, UserWord, Word, WordReviewStat
+
+WORD_STATUSES = ("new", "learned", "known")
+VOCABULARY_SORTS = {
+    "errors": UserWord.wrong_count,
+    "accuracy": UserWord.accuracy,
+    "next_review": UserWord.next_review_at,
+    "learned": UserWord.learned_at,
+    "lemma": UserWord.lemma,
+}
+DATETIME_SORTS = {"next_review", "learned"}
+DEFAULT_ORDERS = {
+    "errors": "desc",
+    "accuracy": "asc",
+    "next_review": "asc",
+    "learned": "desc",
+    "lemma": "asc",
+}
+VOCABULARY_COLUMNS = (
+    UserWord.word_id,
+    UserWord.lemma,
+    UserWord.status,
+    UserWord.wrong_count,
+    UserWord.correct_count,
+    UserWord.accuracy,
+    UserWord.learned_at,
+    UserWord.next_review_at,
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def word_lemma(word_id):
+    return select(Word.lemma).where(Word.id == word_id).scalar_subquery()
+
+
+async def propagate_lemma(word_id: int, lemma: str, db: AsyncSession) -> None:
+    await db.execute(update(UserWord).where(UserWord.word_id == word_id).values(lemma=lemma))
+    await db.execute(update(WordReviewStat).where(WordReviewStat.word_id == word_id).values(lemma=lemma))
+
+
+def encode_cursor(sort: str, order: str, row) -> str:
+    value = getattr(row, VOCABULARY_SORTS[sort].key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort, "o": order, "v": value, "w": row.word_id, "n": value is None}
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> tuple[object, int, bool]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        word_id = int(payload["w"])
+        null_phase = bool(payload["n"])
+        value = payload["v"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise InvalidCursor("Cursor does not match sort")
+    if not null_phase and value is None:
+        raise InvalidCursor("Invalid cursor")
+    if value is not None and sort in DATETIME_SORTS:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as exc:
+            raise InvalidCursor("Invalid cursor") from exc
+    return value, word_id, null_phase
+
+
+def status_query(profile_id, status: str, corpus_id: int | None):
+    stmt = select(*VOCABULARY_COLUMNS).where(UserWord.profile_id == profile_id, UserWord.status == status)
+    if corpus_id is not None:
+        stmt = stmt.where(
+            exists(
+                select(CorpusWordStat.word_id).where(
+                    CorpusWordStat.corpus_id == corpus_id,
+                    CorpusWordStat.word_id == UserWord.word_id,
+                )
+            )
+        )
+    return stmt
+
+
+async def fetch_status_page(
+    profile_id,
+    status: str,
+    sort: str,
+    descending: bool,
+    after: tuple[object, int, bool] | None,
+    corpus_id: int | None,
+    limit: int,
+    db: AsyncSession,
+) -> tuple[list, list]:
+    column = VOCABULARY_SORTS[sort]
+    keyed = []
+    if after is None or not after[2]:
+        stmt = status_query(profile_id, status, corpus_id).where(column.is_not(None))
+        if after is not None:
+            key = tuple_(column, UserWord.word_id)
+            bound = tuple_(after[0], after[1])
+            stmt = stmt.where(key < bound if descending else key > bound)
+        if descending:
+            stmt = stmt.order_by(column.desc(), UserWord.word_id.desc())
+        else:
+            stmt = stmt.order_by(column.asc(), UserWord.word_id.asc())
+        keyed = (await db.execute(stmt.limit(limit))).all()
+    empty = []
+    if len(keyed) < limit:
+        stmt = status_query(profile_id, status, corpus_id).where(column.is_(None))
+        if after is not None and after[2]:
+            stmt = stmt.where(UserWord.word_id > after[1])
+        stmt = stmt.order_by(UserWord.word_id.asc()).limit(limit - len(keyed))
+        empty = (await db.execute(stmt)).all()
+    return keyed, empty
+
+
+async def browse_vocabulary(
+    profile_id,
+    sort: str,
+    order: str,
+    statuses: tuple[str, ...],
+    corpus_id: int | None,
+    limit: int,
+    cursor: str | None,
+    db: AsyncSession,
+) -> tuple[list, str | None]:
+    after = decode_cursor(cursor, sort, order) if cursor else None
+    descending = order == "desc"
+    keyed = []
+    empty = []
+    for status in statuses:
+        status_keyed, status_empty = await fetch_status_page(
+            profile_id, status, sort, descending, after, corpus_id, limit + 1, db
+        )
+        keyed.extend(status_keyed)
+        empty.extend(status_empty)
+    key_name = VOCABULARY_SORTS[sort].key
+    keyed.sort(key=lambda row: (getattr(row, key_name), row.word_id), reverse=descending)
+    empty.sort(key=lambda row: row.word_id)
+    rows = (keyed + empty)[: limit + 1]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort, order, rows[-1])
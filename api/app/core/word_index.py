@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    WORD_INDEX_CHECK_SECONDS,
+    WORD_INDEX_PATH,
+    WORD_INDEX_PROFILE_TTL_SECONDS,
+    WORD_INDEX_PROFILES,
+)
+from app.core.job_queue import enqueue
+from app.core.response_cache import response_cache
+from app.models import CorpusWordStat, LearningProfile, UserCorpus, UserCustomWord, UserWord, Word
+
+ARRAY_CONTAINER_LIMIT = 4096
+CONTAINER_BITS = 65536
+RANK_MISSING = np.iinfo(np.uint32).max
+EMPTY_IDS = np.empty(0, dtype=np.uint32)
+REBUILD_JOB_TYPE = "rebuild_word_index"
+
+
+class RoaringBitmap:
+    __slots__ = ("keys", "containers", "cardinalities")
+
+    def __init__(self, keys: np.ndarray, containers: list[np.ndarray], cardinalities: list[int]) -> None:
+        self.keys = keys
+        self.containers = containers
+        self.cardinalities = cardinalities
+
+    @classmethod
+    def from_values(cls, values) -> "RoaringBitmap":
+        values = np.unique(np.asarray(values, dtype=np.uint32))
+        if not values.size:
+            return cls(np.empty(0, dtype=np.uint16), [], [])
+        high = (values >> 16).astype(np.uint16)
+        low = (values & 0xFFFF).astype(np.uint16)
+        keys, starts = np.unique(high, return_index=True)
+        ends = np.append(starts[1:], values.size)
+        containers = []
+        cardinalities = []
+        for start, end in zip(starts, ends):
+            chunk = low[start:end]
+            if chunk.size > ARRAY_CONTAINER_LIMIT:
+                bits = np.zeros(CONTAINER_BITS, dtype=bool)
+                bits[chunk] = True
+                containers.append(np.packbits(bits, bitorder="little"))
+            else:
+                containers.append(chunk)
+            cardinalities.append(int(chunk.size))
+        return cls(keys, containers, cardinalities)
+
+    def __len__(self) -> int:
+        return sum(self.cardinalities)
+
+    def _container_mask(self, container: np.ndarray, low: np.ndarray) -> np.ndarray:
+        if container.dtype == np.uint8:
+            return ((container[low >> 3] >> (low & 7).astype(np.uint8)) & 1).astype(bool)
+        positions = np.minimum(np.searchsorted(container, low), container.size - 1)
+        return container[positions] == low
+
+    def contains_many(self, values) -> np.ndarray:
+        values = np.asarray(values, dtype=np.uint32)
+        mask = np.zeros(values.size, dtype=bool)
+        if not values.size or not self.keys.size:
+            return mask
+        high = (values >> 16).astype(np.uint16)
+        low = (values & 0xFFFF).astype(np.uint16)
+        slots = np.minimum(np.searchsorted(self.keys, high), self.keys.size - 1)
+        present = self.keys[slots] == high
+        for slot in np.unique(slots[present]):
+            selected = np.flatnonzero(present & (slots == slot))
+            mask[selected] = self._container_mask(self.containers[slot], low[selected])
+        return mask
+
+    def intersection_cardinality(self, other: "RoaringBitmap") -> int:
+        total = 0
+        _common, left_slots, right_slots = np.intersect1d(self.keys, other.keys, return_indices=True)
+        for left_slot, right_slot in zip(left_slots, right_slots):
+            left = self.containers[left_slot]
+            right = other.containers[right_slot]
+            if left.dtype == np.uint8 and right.dtype == np.uint8:
+                total += int(np.unpackbits(left & right).sum())
+            elif left.dtype == np.uint8:
+                total += int(self._container_mask(left, right).sum())
+            elif right.dtype == np.uint8:
+                total += int(self._container_mask(right, left).sum())
+            else:
+                total += int(np.intersect1d(left, right, assume_unique=True).size)
+        return total
+
+    def to_array(self) -> np.ndarray:
+        parts = []
+        for key, container in zip(self.keys, self.containers):
+            if container.dtype == np.uint8:
+                low = np.flatnonzero(np.unpackbits(container, bitorder="little")).astype(np.uint32)
+            else:
+                low = container.astype(np.uint32)
+            parts.append((np.uint32(key) << np.uint32(16)) | low)
+        return np.concatenate(parts) if parts else EMPTY_IDS
+
+
+class CorpusIndex:
+    __slots__ = ("corpus_id", "lang", "word_ids", "ranks", "bitmap")
+
+    def __init__(self, corpus_id: int, lang: str, word_ids: np.ndarray, ranks: np.ndarray) -> None:
+        self.corpus_id = corpus_id
+        self.lang = lang
+        self.word_ids = word_ids
+        self.ranks = ranks
+        self.bitmap = RoaringBitmap.from_values(word_ids)
+
+    def prefix_size(self, limit: int) -> int:
+        if limit <= 0:
+            return int(self.word_ids.size)
+        return int(np.searchsorted(self.ranks, limit, side="right"))
+
+    def prefix(self, limit: int) -> np.ndarray:
+        return self.word_ids[: self.prefix_size(limit)]
+
+
+class ProfileWords:
+    __slots__ = ("version", "loaded_at", "bitmap", "positions")
+
+    def __init__(self, version: int, bitmap: RoaringBitmap) -> None:
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.bitmap = bitmap
+        self.positions: dict[tuple[int, str], np.ndarray] = {}
+
+    def learned_positions(self, corpus: CorpusIndex) -> np.ndarray:
+        key = (corpus.corpus_id, corpus.lang)
+        positions = self.positions.get(key)
+        if positions is None:
+            positions = np.flatnonzero(self.bitmap.contains_many(corpus.word_ids))
+            self.positions[key] = positions
+        return positions
+
+
+class WordIndex:
+    def __init__(self, path: str, check_seconds: float, max_profiles: int, profile_ttl_seconds: float) -> None:
+        self.path = Path(path)
+        self.check_seconds = check_seconds
+        self.max_profiles = max(1, max_profiles)
+        self.profile_ttl_seconds = profile_ttl_seconds
+        self.corpora: dict[tuple[int, str], CorpusIndex] = {}
+        self.loaded_mtime: float | None = None
+        self.built = False
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self._profiles: OrderedDict[str, ProfileWords] = OrderedDict()
+
+    def _file_mtime(self) -> float | None:
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return None
+
+    async def ensure(self, db: AsyncSession) -> None:
+        now = time.monotonic()
+        if self.built and now - self._checked_at < self.check_seconds:
+            return
+        async with self._lock:
+            if self.built and time.monotonic() - self._checked_at < self.check_seconds:
+                return
+            mtime = self._file_mtime()
+            if mtime is not None and mtime != self.loaded_mtime:
+                self.load()
+            if not self.built:
+                # Only a process starting with no file on disk builds here; later
+                # changes arrive as a new file written by the rebuild job.
+                await self.rebuild(db)
+            self._checked_at = time.monotonic()
+
+    async def rebuild(self, db: AsyncSession) -> dict:
+        result = await db.execute(
+            select(CorpusWordStat.corpus_id, Word.lang, CorpusWordStat.word_id, CorpusWordStat.rank)
+            .join(Word, Word.id == CorpusWordStat.word_id)
+            .order_by(
+                CorpusWordStat.corpus_id,
+                Word.lang,
+                CorpusWordStat.rank.asc().nulls_last(),
+                CorpusWordStat.count.desc(),
+                CorpusWordStat.word_id,
+            )
+        )
+        grouped: dict[tuple[int, str], tuple[list[int], list[int]]] = {}
+        for row in result.all():
+            word_ids, ranks = grouped.setdefault((row.corpus_id, row.lang), ([], []))
+            word_ids.append(row.word_id)
+            ranks.append(RANK_MISSING if row.rank is None else row.rank)
+        corpora = {
+            key: CorpusIndex(key[0], key[1], np.array(word_ids, dtype=np.uint32), np.array(ranks, dtype=np.uint32))
+            for key, (word_ids, ranks) in grouped.items()
+        }
+        self._install(corpora)
+        self.save()
+        return {"corpora": len(corpora), "words": sum(item.word_ids.size for item in corpora.values())}
+
+    def _install(self, corpora: dict[tuple[int, str], CorpusIndex]) -> None:
+        self.corpora = corpora
+        self.built = True
+        for entry in self._profiles.values():
+            entry.positions.clear()
+
+    def save(self) -> None:
+        keys = sorted(self.corpora)
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        for index, key in enumerate(keys):
+            offsets[index + 1] = offsets[index] + self.corpora[key].word_ids.size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                corpus_ids=np.array([key[0] for key in keys], dtype=np.int64),
+                langs=np.array([key[1] for key in keys], dtype="U8"),
+                offsets=offsets,
+                word_ids=np.concatenate([self.corpora[key].word_ids for key in keys]) if keys else EMPTY_IDS,
+                ranks=np.concatenate([self.corpora[key].ranks for key in keys]) if keys else EMPTY_IDS,
+            )
+        os.replace(tmp_path, self.path)
+        self.loaded_mtime = self._file_mtime()
+
+    def load(self) -> bool:
+        mtime = self._file_mtime()
+        try:
+            with np.load(self.path) as data:
+                corpus_ids = data["corpus_ids"]
+                langs = data["langs"]
+                offsets = data["offsets"]
+                word_ids = data["word_ids"]
+                ranks = data["ranks"]
+        except (OSError, KeyError, ValueError):
+            return False
+        corpora = {}
+        for index, (corpus_id, lang) in enumerate(zip(corpus_ids, langs)):
+            start, end = int(offsets[index]), int(offsets[index + 1])
+            key = (int(corpus_id), str(lang))
+            corpora[key] = CorpusIndex(key[0], key[1], word_ids[start:end], ranks[start:end])
+        self._install(corpora)
+        self.loaded_mtime = mtime
+        return True
+
+    async def queue_rebuild(self, db: AsyncSession, user_id=None) -> None:
+        # One worker rebuilds and saves the file; every other process sees the new
+        # mtime in ensure() and loads it instead of scanning corpus_word_stats.
+        await enqueue(db, REBUILD_JOB_TYPE, user_id=user_id, dedup_key=REBUILD_JOB_TYPE)
+        self._profiles.clear()
+
+    async def _load_learned(self, profile_id, db: AsyncSession) -> RoaringBitmap:
+        result = await db.execute(select(UserWord.word_id).where(UserWord.profile_id == profile_id))
+        return RoaringBitmap.from_values(result.scalars().all())
+
+    async def profile_words(self, profile_id, db: AsyncSession, fresh: bool = False) -> ProfileWords:
+        if fresh:
+            return ProfileWords(-1, await self._load_learned(profile_id, db))
+        key = str(profile_id)
+        version = await response_cache.profile_version(profile_id)
+        entry = self._profiles.get(key)
+        if (
+            entry is not None
+            and entry.version == version
+            and time.monotonic() - entry.loaded_at <= self.profile_ttl_seconds
+        ):
+            self._profiles.move_to_end(key)
+            return entry
+        entry = ProfileWords(version, await self._load_learned(profile_id, db))
+        self._profiles[key] = entry
+        self._profiles.move_to_end(key)
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return entry
+
+    def corpus(self, corpus_id: int, lang: str) -> CorpusIndex | None:
+        return self.corpora.get((corpus_id, lang))
+
+    async def corpus_coverage(
+        self,
+        profile_id,
+        corpus_id: int,
+        lang: str,
+        limits: list[int],
+        db: AsyncSession,
+    ) -> dict:
+        await self.ensure(db)
+        corpus = self.corpus(corpus_id, lang)
+        if corpus is None:
+            return {"words_total": 0, "known_total": 0, "items": [coverage_point(limit, 0, 0) for limit in limits]}
+        if profile_id is None:
+            positions = EMPTY_IDS
+            known_total = 0
+        else:
+            words = await self.profile_words(profile_id, db)
+            positions = words.learned_positions(corpus)
+            known_total = int(positions.size)
+        items = []
+        for limit in limits:
+            size = corpus.prefix_size(limit)
+            known = int(np.searchsorted(positions, size, side="left"))
+            items.append(coverage_point(limit, size, known))
+        return {"words_total": int(corpus.word_ids.size), "known_total": known_total, "items": items}
+
+    async def count_available(self, profile: LearningProfile, db: AsyncSession, fresh: bool = False) -> int:
+        await self.ensure(db)
+        corpora_result = await db.execute(
+            select(UserCorpus.corpus_id, UserCorpus.target_word_limit).where(
+                UserCorpus.profile_id == profile.id,
+                UserCorpus.enabled.is_(True),
+            )
+        )
+        custom_result = await db.execute(
+            select(UserCustomWord.word_id)
+            .join(Word, Word.id == UserCustomWord.word_id)
+            .where(
+                and_(
+                    UserCustomWord.profile_id == profile.id,
+                    UserCustomWord.target_lang == profile.target_lang,
+                    Word.lang == profile.native_lang,
+                )
+            )
+        )
+        parts = [np.array(custom_result.scalars().all(), dtype=np.uint32)]
+        for row in corpora_result.all():
+            corpus = self.corpus(row.corpus_id, profile.native_lang)
+            if corpus is not None:
+                parts.append(corpus.prefix(row.target_word_limit or 0))
+        candidates = np.unique(np.concatenate(parts))
+        if not candidates.size:
+            return 0
+        words = await self.profile_words(profile.id, db, fresh=fresh)
+        return int(candidates.size - words.bitmap.contains_many(candidates).sum())
+
+    def stats(self) -> dict:
+        return {
+            "built": self.built,
+            "corpora": len(self.corpora),
+            "words": int(sum(item.word_ids.size for item in self.corpora.values())),
+            "profiles": len(self._profiles),
+            "path": str(self.path),
+        }
+
+
+def coverage_point(limit: int, size: int, known: int) -> dict:
+    return {
+        "limit": limit,
+        "words": size,
+        "known": known,
+        "available": size - known,
+        "coverage": round(known / size * 100, 2) if size else 0.0,
+    }
+
+
+word_index = WordIndex(
+    WORD_INDEX_PATH,
+    check_seconds=WORD_INDEX_CHECK_SECONDS,
+    max_profiles=WORD_INDEX_PROFILES,
+    profile_ttl_seconds=WORD_INDEX_PROFILE_TTL_SECONDS,
+)
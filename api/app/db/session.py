@@ -1,11 +1,34 @@
+import asyncio
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from app.core.config import DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_SECONDS, DB_POOL_SIZE
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def warm_up_pool(connections: int) -> int:
+    # Opens up to pool_size connections at once so a long-running process starts
+    # with them checked in, instead of connecting on the first burst of work.
+    count = max(0, min(connections, DB_POOL_SIZE))
+    opened = await asyncio.gather(*(engine.connect() for _ in range(count)))
+    try:
+        for connection in opened:
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            await connection.close()
+    return count
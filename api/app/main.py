@@ -1,10 +1,8 @@
-import uuid
-
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from app.api.auth import router as auth_router
+from app.api.auth import authenticate_request, router as auth_router
 from app.api.admin import router as admin_router
 from app.api.admin_content import router as admin_content_router
 from app.api.custom_words import router as custom_words_router
@@ -18,8 +16,10 @@ from app.api.stats import router as stats_router
 from app.api.study import router as study_router
 from app.api.tech import router as tech_router
 from app.api.support import router as support_router
-from app.core.audit import log_audit_event
-from app.core.security import decode_access_token
+from app.core.audit import audit_buffer, log_audit_event
+from app.core.outbox import outbox_kicker
+from app.core.password_hashing import password_hasher
+from app.core.response_cache import response_cache
 
 
 class UTF8JSONResponse(JSONResponse):
@@ -30,16 +30,8 @@ def create_app() -> FastAPI:
     app = FastAPI(title="Recallio API", version="0.1.0", default_response_class=UTF8JSONResponse)
     @app.middleware("http")
     async def audit_middleware(request: Request, call_next):
-        user_id = None
-        auth_header = request.headers.get("authorization") or ""
-        if auth_header.lower().startswith("bearer "):
-            token = auth_header.split(" ", 1)[1].strip()
-            if token:
-                try:
-                    subject = decode_access_token(token)
-                    user_id = uuid.UUID(subject)
-                except Exception:
-                    user_id = None
+        claims = getattr(request.state, "auth_claims", None)
+        user_id = claims[0] if claims else None
 
         try:
             response = await call_next(request)
@@ -67,6 +59,11 @@ def create_app() -> FastAPI:
             )
         return response
 
+    @app.middleware("http")
+    async def auth_middleware(request: Request, call_next):
+        authenticate_request(request)
+        return await call_next(request)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
@@ -88,6 +85,14 @@ def create_app() -> FastAPI:
     app.include_router(tech_router)
     app.include_router(reports_router)
     app.include_router(support_router)
+
+    @app.on_event("shutdown")
+    async def close_response_cache() -> None:
+        await response_cache.close()
+        await outbox_kicker.close()
+        password_hasher.close()
+        await audit_buffer.close()
+
     return app
 
 
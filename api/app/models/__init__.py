@@ -11,13 +11,19 @@ from app.models.core import (
     Friendship,
     GroupChallenge,
     GroupChallengeMember,
+    JobMetricTotal,
+    JobSchedule,
+    LearnQueueItem,
     LearningProfile,
     NotificationOutbox,
     NotificationSettings,
+    ProfileCounter,
+    ProfileDailyStat,
     UserChallenge,
     UserFollow,
     UserPublicProfile,
     ReviewEvent,
+    WordReviewStat,
     StudySession,
     Translation,
     User,
@@ -26,9 +32,8 @@ from app.models.core import (
     UserProfile,
     UserSettings,
     UserWord,
-    DashboardCache,
-    WeakWordsCache,
     Word,
+    WorkerHeartbeat,
 )
 
 __all__ = [
@@ -44,13 +49,19 @@ __all__ = [
     "Friendship",
     "GroupChallenge",
     "GroupChallengeMember",
+    "JobMetricTotal",
+    "JobSchedule",
+    "LearnQueueItem",
     "LearningProfile",
     "NotificationOutbox",
     "NotificationSettings",
+    "ProfileCounter",
+    "ProfileDailyStat",
     "UserChallenge",
     "UserFollow",
     "UserPublicProfile",
     "ReviewEvent",
+    "WordReviewStat",
     "StudySession",
     "Translation",
     "User",
@@ -59,7 +70,6 @@ __all__ = [
     "UserProfile",
     "UserSettings",
     "UserWord",
-    "DashboardCache",
-    "WeakWordsCache",
     "Word",
+    "WorkerHeartbeat",
 ]
@@ -1,9 +1,10 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from sqlalchemy import (
     BigInteger,
     Boolean,
+    Date,
     DateTime,
     Float,
     ForeignKey,
@@ -13,6 +14,7 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
@@ -30,6 +32,7 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     email_verified_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    auth_version: Mapped[int] = mapped_column(Integer, default=0)
 
 
 class AuthToken(Base):
@@ -87,6 +90,7 @@ class LearningProfile(Base):
     native_lang: Mapped[str] = mapped_column(String(2))
     target_lang: Mapped[str] = mapped_column(String(2))
     onboarding_done: Mapped[bool] = mapped_column(Boolean, default=False)
+    learn_queue_built_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -283,12 +287,14 @@ class NotificationOutbox(Base):
     __table_args__ = (
         Index("ix_notification_outbox_status", "status"),
         Index("ix_notification_outbox_scheduled", "scheduled_at"),
+        Index("ix_notification_outbox_dispatch", "status", "channel", "scheduled_at"),
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    profile_id: Mapped[uuid.UUID] = mapped_column(
+    profile_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("learning_profiles.id", ondelete="CASCADE"),
+        nullable=True,
     )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -300,6 +306,7 @@ class NotificationOutbox(Base):
     scheduled_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -308,6 +315,24 @@ class BackgroundJob(Base):
     __table_args__ = (
         Index("ix_background_jobs_status", "status"),
         Index("ix_background_jobs_run_after", "run_after"),
+        Index(
+            "ix_background_jobs_claim",
+            "job_type",
+            "run_after",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_background_jobs_lease",
+            "lease_expires_at",
+            postgresql_where=text("status = 'running'"),
+        ),
+        Index(
+            "ux_background_jobs_dedup",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
@@ -321,34 +346,73 @@ class BackgroundJob(Base):
     attempts: Mapped[int] = mapped_column(Integer, default=0)
     max_attempts: Mapped[int] = mapped_column(Integer, default=3)
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    errors: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    dedup_key: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    worker_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
-class DashboardCache(Base):
-    __tablename__ = "dashboard_cache"
+class WorkerHeartbeat(Base):
+    __tablename__ = "worker_heartbeats"
+
+    worker_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    hostname: Mapped[str] = mapped_column(String(255))
+    pid: Mapped[int] = mapped_column(Integer)
+    running: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class JobMetricTotal(Base):
+    __tablename__ = "job_metric_totals"
+
+    job_type: Mapped[str] = mapped_column(String(32), primary_key=True)
+    metrics: Mapped[dict] = mapped_column(JSON)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class JobSchedule(Base):
+    __tablename__ = "job_schedules"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    job_type: Mapped[str] = mapped_column(String(32))
+    cron: Mapped[str] = mapped_column(String(64))
+    next_run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_run_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_job_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class ProfileCounter(Base):
+    __tablename__ = "profile_counters"
 
     profile_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("learning_profiles.id", ondelete="CASCADE"),
         primary_key=True,
     )
-    data: Mapped[dict] = mapped_column(JSON)
+    known_words: Mapped[int] = mapped_column(Integer, default=0)
+    learn_available: Mapped[int] = mapped_column(Integer, default=0)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
-class WeakWordsCache(Base):
-    __tablename__ = "weak_words_cache"
+class ProfileDailyStat(Base):
+    __tablename__ = "profile_daily_stats"
 
     profile_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("learning_profiles.id", ondelete="CASCADE"),
         primary_key=True,
     )
-    data: Mapped[dict] = mapped_column(JSON)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    learned: Mapped[int] = mapped_column(Integer, default=0)
+    due: Mapped[int] = mapped_column(Integer, default=0)
 
 
 class AuditLog(Base):
@@ -554,6 +618,12 @@ class UserWord(Base):
     __tablename__ = "user_words"
     __table_args__ = (
         Index("ix_user_words_next_review", "next_review_at"),
+        Index("ix_user_words_profile_next_review", "profile_id", "next_review_at"),
+        Index("ix_user_words_vocab_errors", "profile_id", "status", "wrong_count", "word_id"),
+        Index("ix_user_words_vocab_accuracy", "profile_id", "status", "accuracy", "word_id"),
+        Index("ix_user_words_vocab_next_review", "profile_id", "status", "next_review_at", "word_id"),
+        Index("ix_user_words_vocab_learned", "profile_id", "status", "learned_at", "word_id"),
+        Index("ix_user_words_vocab_lemma", "profile_id", "status", "lemma", "word_id"),
     )
 
     profile_id: Mapped[uuid.UUID] = mapped_column(
@@ -579,6 +649,30 @@ class UserWord(Base):
     next_review_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     correct_streak: Mapped[int] = mapped_column(Integer, default=0)
     wrong_streak: Mapped[int] = mapped_column(Integer, default=0)
+    lemma: Mapped[str | None] = mapped_column(String(255, collation="C"), nullable=True)
+    wrong_count: Mapped[int] = mapped_column(Integer, default=0)
+    correct_count: Mapped[int] = mapped_column(Integer, default=0)
+    accuracy: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+class LearnQueueItem(Base):
+    __tablename__ = "learn_queue"
+    __table_args__ = (
+        Index("ix_learn_queue_profile_position", "profile_id", "position"),
+    )
+
+    profile_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("learning_profiles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    word_id: Mapped[int] = mapped_column(
+        ForeignKey("words.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    position: Mapped[int] = mapped_column(Integer)
+    rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
 
 class StudySession(Base):
@@ -599,6 +693,7 @@ class StudySession(Base):
 
 class ReviewEvent(Base):
     __tablename__ = "review_events"
+    __table_args__ = (Index("ix_review_events_profile_word", "profile_id", "word_id"),)
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     profile_id: Mapped[uuid.UUID] = mapped_column(
@@ -609,3 +704,44 @@ class ReviewEvent(Base):
     word_id: Mapped[int] = mapped_column(ForeignKey("words.id", ondelete="CASCADE"))
     result: Mapped[str] = mapped_column(String(16))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class WordReviewStat(Base):
+    __tablename__ = "word_review_stats"
+
+    profile_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("learning_profiles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    word_id: Mapped[int] = mapped_column(
+        ForeignKey("words.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    lemma: Mapped[str] = mapped_column(String(255))
+    wrong_count: Mapped[int] = mapped_column(Integer, default=0)
+    correct_count: Mapped[int] = mapped_column(Integer, default=0)
+    accuracy: Mapped[float] = mapped_column(Float, default=0.0)
+    last_result: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    last_review_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+Index(
+    "ix_word_review_stats_errors",
+    WordReviewStat.profile_id,
+    WordReviewStat.wrong_count,
+    WordReviewStat.correct_count.desc(),
+)
+Index(
+    "ix_word_review_stats_correct",
+    WordReviewStat.profile_id,
+    WordReviewStat.correct_count,
+    WordReviewStat.wrong_count.desc(),
+)
+Index(
+    "ix_word_review_stats_accuracy",
+    WordReviewStat.profile_id,
+    WordReviewStat.accuracy,
+    WordReviewStat.wrong_count.desc(),
+)
+Index("ix_word_review_stats_lemma", WordReviewStat.profile_id, WordReviewStat.lemma)
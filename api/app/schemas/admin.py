@@ -1,6 +1,8 @@
 ﻿from datetime import datetime
 from pydantic import BaseModel
 
+from app.schemas.tech import ReviewForecastDay
+
 
 class AdminSummaryOut(BaseModel):
     total_users: int
@@ -43,6 +45,28 @@ class AdminUserUpdate(BaseModel):
     theme: str | None = None
 
 
+class AdminJobRequeue(BaseModel):
+    job_type: str | None = None
+    job_ids: list[int] | None = None
+
+
+class AdminJobRequeueOut(BaseModel):
+    requeued: int
+    job_ids: list[int]
+
+
+class AdminWorkerOut(BaseModel):
+    worker_id: str
+    hostname: str
+    pid: int
+    running: int
+    completed: int
+    failed: int
+    started_at: datetime
+    last_seen_at: datetime
+    alive: bool
+
+
 class AdminAuditOut(BaseModel):
     id: int
     user_id: str | None = None
@@ -53,3 +77,16 @@ class AdminAuditOut(BaseModel):
     ip: str | None = None
     user_agent: str | None = None
     created_at: datetime
+
+
+class AdminReviewForecastHour(BaseModel):
+    review_hour: int
+    peak: int
+    total: int
+
+
+class AdminReviewForecastOut(BaseModel):
+    profiles: int
+    words: int
+    days: list[ReviewForecastDay]
+    hours: list[AdminReviewForecastHour]
@@ -56,6 +56,22 @@ class CorpusPreviewOut(BaseModel):
     words: list[CorpusPreviewWordOut]
 
 
+class CorpusCoveragePointOut(BaseModel):
+    limit: int
+    words: int
+    known: int
+    available: int
+    coverage: float
+
+
+class CorpusCoverageOut(BaseModel):
+    corpus_id: int
+    lang: str
+    words_total: int
+    known_total: int
+    items: list[CorpusCoveragePointOut]
+
+
 class KnownWordsImportRequest(BaseModel):
     text: str
 
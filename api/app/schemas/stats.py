@@ -17,3 +17,20 @@ class WeakWordOut(BaseModel):
 class WeakWordsOut(BaseModel):
     total: int
     items: list[WeakWordOut]
+
+
+class VocabularyWordOut(BaseModel):
+    word_id: int
+    word: str
+    status: str
+    translations: list[str]
+    wrong_count: int
+    correct_count: int
+    accuracy: float | None
+    learned_at: datetime | None
+    next_review_at: datetime | None
+
+
+class VocabularyPageOut(BaseModel):
+    items: list[VocabularyWordOut]
+    next_cursor: str | None
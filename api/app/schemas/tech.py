@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
 from pydantic import BaseModel
@@ -58,3 +58,35 @@ class AuditLogOut(BaseModel):
     ip: str | None
     user_agent: str | None
     created_at: datetime
+
+
+class ReviewForecastDay(BaseModel):
+    date: date
+    count: int
+
+
+class ReviewForecastOut(BaseModel):
+    words: int
+    days: list[ReviewForecastDay]
+
+
+class JobTypeMetricsOut(BaseModel):
+    job_type: str
+    ready: int
+    scheduled: int
+    running: int
+    dead: int
+    oldest_pending_seconds: float
+    wait_p50_seconds: float | None
+    wait_p95_seconds: float | None
+    run_p50_seconds: float | None
+    run_p95_seconds: float | None
+    attempts_avg: float | None
+    failure_rate: float | None
+    outcomes: dict[str, int]
+
+
+class JobMetricsOut(BaseModel):
+    generated_at: datetime
+    workers_alive: int
+    job_types: list[JobTypeMetricsOut]
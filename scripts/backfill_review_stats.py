@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.review_stats import rebuild_review_stats  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import LearningProfile  # noqa: E402
+
+
+async def load_profile_ids(session, profile_id: uuid.UUID | None, after: uuid.UUID | None, limit: int):
+    stmt = select(LearningProfile.id).order_by(LearningProfile.id).limit(limit)
+    if profile_id is not None:
+        stmt = stmt.where(LearningProfile.id == profile_id)
+    if after is not None:
+        stmt = stmt.where(LearningProfile.id > after)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def run(profile_id: uuid.UUID | None, chunk_size: int, pause: float) -> None:
+    after = None
+    profiles = 0
+    rows = 0
+    started = time.perf_counter()
+    while True:
+        async with AsyncSessionLocal() as session:
+            profile_ids = await load_profile_ids(session, profile_id, after, chunk_size)
+            if not profile_ids:
+                break
+            inserted = await rebuild_review_stats(session, profile_ids=profile_ids)
+            await session.commit()
+        profiles += len(profile_ids)
+        rows += inserted
+        after = profile_ids[-1]
+        print(f"profiles={profiles} rows={rows} last={after}")
+        if profile_id is not None:
+            break
+        if pause:
+            await asyncio.sleep(pause)
+    await engine.dispose()
+    print(f"Done: {profiles} profiles, {rows} word stats in {time.perf_counter() - started:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile-id", type=uuid.UUID, default=None)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.0)
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    asyncio.run(run(args.profile_id, args.chunk_size, args.pause))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.answer_matcher import compile_matcher, edit_distance, normalize_text  # noqa: E402
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def legacy_score_answer(answer: str, translations: list[str]) -> tuple[bool, int, list[str]]:
+    options: set[str] = set()
+    for text in translations:
+        for part in re.split(r"[;,/]", text or ""):
+            normalized_part = normalize_text(part)
+            if normalized_part:
+                options.add(normalized_part)
+    ordered = sorted(options)
+    normalized = normalize_text(answer or "")
+    if not normalized:
+        return False, 0, ordered
+    if normalized in ordered:
+        return True, 5, ordered
+    for option in ordered:
+        if abs(len(normalized) - len(option)) > 2:
+            continue
+        min_len = min(len(normalized), len(option))
+        if min_len <= 6:
+            matched = edit_distance(normalized, option) <= 1
+        elif min_len <= 8:
+            matched = edit_distance(normalized, option) <= 2
+        else:
+            matched = SequenceMatcher(None, normalized, option).ratio() >= 0.88
+        if matched:
+            return True, 4, ordered
+    return False, 2, ordered
+
+
+def random_word(rng: random.Random, min_len: int = 3, max_len: int = 14) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(min_len, max_len)))
+
+
+def mutate(rng: random.Random, value: str) -> str:
+    chars = list(value)
+    for _ in range(rng.randint(0, 3)):
+        if not chars:
+            break
+        index = rng.randrange(len(chars))
+        op = rng.choice(("replace", "delete", "insert"))
+        if op == "replace":
+            chars[index] = rng.choice(ALPHABET)
+        elif op == "delete":
+            del chars[index]
+        else:
+            chars.insert(index, rng.choice(ALPHABET))
+    return "".join(chars)
+
+
+def build_cases(count: int, seed: int) -> list[tuple[str, list[str]]]:
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        translations = [
+            ", ".join(random_word(rng) for _ in range(rng.randint(1, 3)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        source = rng.choice(rng.choice(translations).split(", "))
+        answer = mutate(rng, source) if rng.random() < 0.8 else random_word(rng)
+        cases.append((answer, translations))
+    return cases
+
+
+def measure(label: str, func, cases, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for answer, translations in cases:
+            func(answer, translations)
+    elapsed = time.perf_counter() - started
+    per_answer = elapsed / (rounds * len(cases)) * 1_000_000
+    print(f"{label:<10} {per_answer:8.2f} us/answer")
+    return per_answer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    cases = build_cases(args.cases, args.seed)
+    mismatches = sum(
+        1
+        for answer, translations in cases
+        if legacy_score_answer(answer, translations) != compile_matcher(translations).score(answer)
+    )
+    print(f"cases={len(cases)} rounds={args.rounds} mismatches={mismatches}")
+
+    before = measure("before", legacy_score_answer, cases, args.rounds)
+    after = measure("after", lambda answer, translations: compile_matcher(translations).score(answer), cases, args.rounds)
+    print(f"speedup    {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import delete, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core import audit  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import AuditLog, User, UserProfile, UserWord  # noqa: E402
+
+BENCH_ACTION = "bench.audit"
+
+
+async def call(method: str, path: str, token: str, payload: dict) -> int:
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"authorization", f"Bearer {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    sent = False
+    status_code = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+def report(label: str, timings: list[float], elapsed: float, extra: str = "") -> None:
+    ordered = sorted(timings)
+    print(
+        f"{label:<10} n={len(ordered):<6} rate={len(ordered) / elapsed:8.1f}/s "
+        f"p50={statistics.median(ordered):7.2f}ms p99={ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:7.2f}ms"
+        f"{extra}"
+    )
+
+
+async def run_events(events: int, concurrency: int) -> None:
+    for buffered in (False, True):
+        audit.AUDIT_BUFFERED = buffered
+        timings: list[float] = []
+        queue = iter(range(events))
+
+        async def worker() -> None:
+            for index in queue:
+                started = time.perf_counter()
+                await audit.log_audit_event(BENCH_ACTION, meta={"index": index})
+                timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        await audit.audit_buffer.flush()
+        elapsed = time.perf_counter() - started
+        report("buffered" if buffered else "direct", timings, elapsed, f" {audit.audit_buffer.stats()}" if buffered else "")
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(AuditLog).where(AuditLog.action == BENCH_ACTION))
+        await session.commit()
+
+
+async def load_review_words(user_id: uuid.UUID, limit: int) -> tuple[str, list[int]]:
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+        profile_id = await session.scalar(select(UserProfile.active_profile_id).where(UserProfile.user_id == user_id))
+        result = await session.execute(
+            select(UserWord.word_id)
+            .where(UserWord.profile_id == profile_id, UserWord.status == "learned")
+            .order_by(UserWord.word_id)
+            .limit(limit)
+        )
+        word_ids = [row.word_id for row in result.fetchall()]
+    return create_access_token(user.id, user.auth_version or 0), word_ids
+
+
+async def run_submit(user_id: uuid.UUID, duration: float, concurrency: int, words: int, seed: int) -> None:
+    token, word_ids = await load_review_words(user_id, max(words * concurrency, words))
+    if len(word_ids) < words:
+        print(f"profile has only {len(word_ids)} learned words")
+        return
+    rng = random.Random(seed)
+    for buffered in (False, True):
+        audit.AUDIT_BUFFERED = buffered
+        timings: list[float] = []
+        statuses: dict[int, int] = {}
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int) -> None:
+            chunk = word_ids[offset:offset + words] or word_ids[:words]
+            while time.perf_counter() < deadline:
+                payload = {"words": [{"word_id": word_id, "quality": rng.randint(2, 5)} for word_id in chunk]}
+                started = time.perf_counter()
+                status_code = await call("POST", "/study/review/submit", token, payload)
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses[status_code] = statuses.get(status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index * words) for index in range(concurrency)))
+        await audit.audit_buffer.flush()
+        report("buffered" if buffered else "direct", timings, time.perf_counter() - started, f" statuses={statuses}")
+
+
+async def run(args) -> None:
+    try:
+        if args.user_id is None:
+            await run_events(args.events, args.concurrency)
+        else:
+            await run_submit(args.user_id, args.duration, args.concurrency, args.words, args.seed)
+    finally:
+        await audit.audit_buffer.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--words", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
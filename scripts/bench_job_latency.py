@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import delete, event
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.api.tech import enqueue_job  # noqa: E402
+from app.core.job_queue import JobWorker  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import BackgroundJob  # noqa: E402
+
+JOB_TYPE = "bench_latency"
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *_args) -> None:
+        self.count += 1
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_mode(listen: bool, args, counter: QueryCounter) -> None:
+    run_id = uuid.uuid4().hex
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def handle(session, job: BackgroundJob) -> dict:
+        latencies.append(time.time() - job.payload["t"])
+        if len(latencies) >= args.jobs:
+            done.set()
+        return {}
+
+    worker = JobWorker({JOB_TYPE: handle}, concurrency=4, type_limits={}, listen=listen)
+    stop = asyncio.Event()
+    task = asyncio.create_task(worker.run_forever(args.interval, stop))
+    try:
+        await asyncio.sleep(1.0)
+        if listen and not (worker.listener and worker.listener.connected):
+            print("FAIL  listener did not connect")
+            return
+        counter.count = 0
+        await asyncio.sleep(args.idle)
+        idle_queries = counter.count
+        for _ in range(args.jobs):
+            async with AsyncSessionLocal() as session:
+                await enqueue_job(JOB_TYPE, None, None, {"run": run_id, "t": time.time()}, session)
+            await asyncio.sleep(args.gap)
+        try:
+            await asyncio.wait_for(done.wait(), args.interval * 2 + 5)
+        except asyncio.TimeoutError:
+            pass
+    finally:
+        stop.set()
+        await task
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                delete(BackgroundJob).where(
+                    BackgroundJob.job_type == JOB_TYPE,
+                    BackgroundJob.payload["run"].as_string() == run_id,
+                )
+            )
+            await session.commit()
+    label = "listen" if listen else f"poll {args.interval:g}s"
+    if not latencies:
+        print(f"{label:<10} no jobs picked up")
+        return
+    per_minute = idle_queries * 60 / args.idle
+    print(
+        f"{label:<10} jobs={len(latencies)}/{args.jobs} "
+        f"p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms "
+        f"idle_queries={idle_queries} ({per_minute:.1f}/min)"
+    )
+
+
+async def run(args) -> None:
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        modes = {"listen": [True], "poll": [False], "both": [True, False]}[args.mode]
+        for listen in modes:
+            await run_mode(listen, args, counter)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["listen", "poll", "both"], default="both")
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--gap", type=float, default=0.3)
+    parser.add_argument("--interval", type=float, default=15)
+    parser.add_argument("--idle", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
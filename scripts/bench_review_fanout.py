@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, event, func, insert, select, update
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core.review_notifications import eligible_profiles, notify_due_profiles  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import (  # noqa: E402
+    LearningProfile,
+    NotificationOutbox,
+    NotificationSettings,
+    Translation,
+    User,
+    UserCustomWord,
+    UserWord,
+)
+
+EMAIL_PREFIX = "bench-fanout-"
+SEED_BATCH = 5000
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *_args) -> None:
+        self.count += 1
+
+
+def bench_users():
+    return select(User.id).where(User.email.like(f"{EMAIL_PREFIX}%"))
+
+
+async def insert_batched(session, model, rows) -> None:
+    for start in range(0, len(rows), SEED_BATCH):
+        await session.execute(insert(model), rows[start : start + SEED_BATCH])
+
+
+async def seed(profiles: int, words_per_profile: int) -> None:
+    async with AsyncSessionLocal() as session:
+        pool = (
+            await session.execute(
+                select(Translation.target_lang, Translation.word_id).distinct().limit(20000)
+            )
+        ).all()
+        if not pool:
+            raise SystemExit("FAIL  translations table is empty, import a corpus first")
+        by_lang: dict[str, list[int]] = {}
+        for lang, word_id in pool:
+            by_lang.setdefault(lang, []).append(word_id)
+        target_lang, word_ids = max(by_lang.items(), key=lambda item: len(item[1]))
+        native_lang = "ru" if target_lang != "ru" else "en"
+        now = datetime.now(timezone.utc)
+        rng = random.Random(7)
+        for start in range(0, profiles, SEED_BATCH):
+            count = min(SEED_BATCH, profiles - start)
+            users, learning, settings, words = [], [], [], []
+            for index in range(start, start + count):
+                user_id = uuid.uuid4()
+                profile_id = uuid.uuid4()
+                users.append({"id": user_id, "email": f"{EMAIL_PREFIX}{index}@example.invalid", "hashed_password": "-"})
+                learning.append(
+                    {"id": profile_id, "user_id": user_id, "native_lang": native_lang, "target_lang": target_lang}
+                )
+                settings.append(
+                    {
+                        "profile_id": profile_id,
+                        "user_id": user_id,
+                        "email_enabled": index % 2 == 0,
+                        "telegram_enabled": index % 3 == 0,
+                        "push_enabled": index % 5 == 0,
+                        "review_hour": 0,
+                    }
+                )
+                for word_id in rng.sample(word_ids, min(words_per_profile, len(word_ids))):
+                    due = rng.random() < 0.5
+                    words.append(
+                        {
+                            "profile_id": profile_id,
+                            "user_id": user_id,
+                            "word_id": word_id,
+                            "status": "learning",
+                            "next_review_at": now - timedelta(hours=1) if due else now + timedelta(days=3),
+                        }
+                    )
+            await insert_batched(session, User, users)
+            await insert_batched(session, LearningProfile, learning)
+            await insert_batched(session, NotificationSettings, settings)
+            await insert_batched(session, UserWord, words)
+            await session.commit()
+    print(f"seeded {profiles} profiles x {words_per_profile} words (target_lang={target_lang})")
+
+
+async def reset() -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(NotificationOutbox).where(NotificationOutbox.user_id.in_(bench_users())))
+        await session.execute(
+            update(NotificationSettings)
+            .where(NotificationSettings.user_id.in_(bench_users()))
+            .values(last_notified_at=None)
+        )
+        await session.commit()
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(User).where(User.email.like(f"{EMAIL_PREFIX}%")))
+        await session.commit()
+
+
+async def collected() -> dict:
+    async with AsyncSessionLocal() as session:
+        rows = (
+            await session.execute(
+                select(NotificationOutbox.profile_id, NotificationOutbox.channel, NotificationOutbox.payload).where(
+                    NotificationOutbox.user_id.in_(bench_users())
+                )
+            )
+        ).all()
+    return {(row.profile_id, row.channel): row.payload["review_due"] for row in rows}
+
+
+async def legacy_fan_out(session, now: datetime) -> dict:
+    # The per-profile implementation this benchmark compares against.
+    settings_rows = (
+        (await session.execute(select(NotificationSettings).where(NotificationSettings.user_id.in_(bench_users()))))
+        .scalars()
+        .all()
+    )
+    created = 0
+    for settings in settings_rows:
+        if not (settings.email_enabled or settings.telegram_enabled or settings.push_enabled):
+            continue
+        if settings.review_hour is not None and now.hour < settings.review_hour:
+            continue
+        if settings.last_notified_at and settings.last_notified_at.date() == now.date():
+            continue
+        learning_profile = (
+            await session.execute(select(LearningProfile).where(LearningProfile.id == settings.profile_id))
+        ).scalar_one_or_none()
+        if not learning_profile:
+            continue
+        due_subq = (
+            select(UserWord.word_id)
+            .where(
+                UserWord.profile_id == settings.profile_id,
+                UserWord.next_review_at.is_not(None),
+                UserWord.next_review_at <= now,
+            )
+            .subquery()
+        )
+        translation_subq = select(Translation.word_id).where(
+            Translation.word_id.in_(select(due_subq.c.word_id)),
+            Translation.target_lang == learning_profile.target_lang,
+        )
+        custom_subq = select(UserCustomWord.word_id).where(
+            UserCustomWord.profile_id == settings.profile_id,
+            UserCustomWord.target_lang == learning_profile.target_lang,
+            UserCustomWord.word_id.in_(select(due_subq.c.word_id)),
+        )
+        review_due = int(
+            (
+                await session.execute(select(func.count()).select_from(translation_subq.union(custom_subq).subquery()))
+            ).scalar()
+            or 0
+        )
+        if review_due == 0:
+            continue
+        for channel, enabled in (
+            ("email", settings.email_enabled),
+            ("telegram", settings.telegram_enabled),
+            ("push", settings.push_enabled),
+        ):
+            if enabled:
+                session.add(
+                    NotificationOutbox(
+                        profile_id=settings.profile_id,
+                        user_id=settings.user_id,
+                        channel=channel,
+                        payload={"review_due": review_due},
+                        status="pending",
+                        scheduled_at=now,
+                    )
+                )
+                created += 1
+        settings.last_notified_at = now
+    await session.commit()
+    return {"notifications_created": created}
+
+
+async def measure(label: str, runner, counter: QueryCounter) -> dict:
+    await reset()
+    now = datetime.now(timezone.utc)
+    counter.count = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        summary = await runner(session, now)
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} {elapsed:8.2f}s  queries={counter.count:<8} peak_mem={peak / 1024 / 1024:7.1f}MB  "
+        f"created={summary['notifications_created']}"
+    )
+    return await collected()
+
+
+async def run(args) -> None:
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        if not args.keep:
+            await cleanup()
+            await seed(args.profiles, args.words)
+
+        async def set_based(session, now):
+            stmt = eligible_profiles(now).where(NotificationSettings.user_id.in_(bench_users()))
+            return await notify_due_profiles(session, stmt, now, args.chunk_size)
+
+        expected = None
+        if not args.skip_legacy:
+            expected = await measure("legacy", legacy_fan_out, counter)
+        produced = await measure("set-based", set_based, counter)
+        if expected is not None:
+            if expected == produced:
+                print("ok    legacy and set-based outboxes match")
+            else:
+                print(f"FAIL  outboxes differ: legacy={len(expected)} set-based={len(produced)}")
+        await reset()
+        if args.cleanup:
+            await cleanup()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=30)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="reuse previously seeded profiles")
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
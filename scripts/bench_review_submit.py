@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.api.study import (  # noqa: E402
+    REVIEW_STATE_COLUMNS,
+    apply_review_updates,
+    build_review_update,
+    insert_review_events,
+    schedule_reviews,
+    sm2_next,
+)
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import LearningProfile, ReviewEvent, UserWord  # noqa: E402
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if executemany and parameters:
+            self.count += len(parameters)
+        else:
+            self.count += 1
+
+
+async def legacy_apply(session, profile: LearningProfile, answers: list[tuple[int, int, bool]]) -> None:
+    now = datetime.now(timezone.utc)
+    word_ids = [word_id for word_id, _quality, _correct in answers]
+    rows_result = await session.execute(
+        select(UserWord).where(UserWord.profile_id == profile.id, UserWord.word_id.in_(word_ids))
+    )
+    user_words = {row.word_id: row for row in rows_result.scalars().all()}
+    review_events = []
+    for word_id, quality, correct in answers:
+        current = user_words[word_id]
+        repetitions, interval_days, ease_factor, next_review_at = sm2_next(
+            quality,
+            current.repetitions or 0,
+            current.interval_days or 0,
+            current.ease_factor or 2.5,
+            now,
+        )
+        current.repetitions = repetitions
+        current.interval_days = interval_days
+        current.ease_factor = ease_factor
+        current.stage = repetitions
+        current.last_review_at = now
+        current.next_review_at = next_review_at
+        if correct:
+            current.correct_streak = (current.correct_streak or 0) + 1
+            current.wrong_streak = 0
+            if current.status not in {"known", "learned"}:
+                current.status = "learned"
+        else:
+            current.correct_streak = 0
+            current.wrong_streak = (current.wrong_streak or 0) + 1
+        review_events.append(
+            ReviewEvent(
+                profile_id=profile.id,
+                user_id=profile.user_id,
+                word_id=word_id,
+                result="correct" if correct else "wrong",
+            )
+        )
+    session.add_all(review_events)
+    await session.flush()
+
+
+async def bulk_apply(session, profile: LearningProfile, answers: list[tuple[int, int, bool]]) -> None:
+    now = datetime.now(timezone.utc)
+    word_ids = [word_id for word_id, _quality, _correct in answers]
+    rows_result = await session.execute(
+        select(*REVIEW_STATE_COLUMNS).where(
+            UserWord.profile_id == profile.id,
+            UserWord.word_id.in_(word_ids),
+        )
+    )
+    user_words = {row.word_id: row for row in rows_result.fetchall()}
+    entries = [(user_words[word_id], quality, correct) for word_id, quality, correct in answers]
+    updates = [
+        build_review_update(current, schedule, correct)
+        for (current, _quality, correct), schedule in zip(entries, schedule_reviews(entries, now))
+    ]
+    events = []
+    for word_id, _quality, correct in answers:
+        events.append(
+            {
+                "profile_id": profile.id,
+                "user_id": profile.user_id,
+                "word_id": word_id,
+                "result": "correct" if correct else "wrong",
+            }
+        )
+    await apply_review_updates(profile.id, updates, now, session)
+    await insert_review_events(events, session)
+
+
+async def run_case(label: str, apply, profile_id: uuid.UUID, word_ids: list[int], rounds: int, rng: random.Random):
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    timings: list[float] = []
+    statements = 0
+    try:
+        for _ in range(rounds):
+            answers = []
+            for word_id in word_ids:
+                quality = rng.randint(0, 5)
+                answers.append((word_id, quality, quality >= 3))
+            async with AsyncSessionLocal() as session:
+                profile = await session.get(LearningProfile, profile_id)
+                await session.flush()
+                counter.count = 0
+                started = time.perf_counter()
+                await apply(session, profile, answers)
+                timings.append((time.perf_counter() - started) * 1000)
+                statements = counter.count
+                await session.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label:<7} words={len(word_ids):<4} statements={statements:<4} p50={p50:7.2f}ms p99={p99:7.2f}ms")
+
+
+async def run(profile_id: uuid.UUID, sizes: list[int], rounds: int, seed: int) -> None:
+    rng = random.Random(seed)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(UserWord.word_id)
+            .where(UserWord.profile_id == profile_id)
+            .order_by(UserWord.word_id)
+            .limit(max(sizes))
+        )
+        available = [row.word_id for row in result.fetchall()]
+    for size in sizes:
+        if size > len(available):
+            print(f"skip words={size}: profile has only {len(available)} user_words")
+            continue
+        word_ids = available[:size]
+        await run_case("legacy", legacy_apply, profile_id, word_ids, rounds, rng)
+        await run_case("bulk", bulk_apply, profile_id, word_ids, rounds, rng)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile-id", type=uuid.UUID, required=True)
+    parser.add_argument("--sizes", default="10,50,200")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sizes = [int(item) for item in args.sizes.split(",") if item.strip()]
+    asyncio.run(run(args.profile_id, sizes, args.rounds, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from starlette.requests import Request  # noqa: E402
+
+from app.api.auth import authenticate_request, request_token_claims  # noqa: E402
+from app.core.security import bearer_token, create_access_token, read_access_claims, token_cache  # noqa: E402
+
+
+def build_request(token: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/dashboard",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+    )
+
+
+def legacy_auth(request: Request) -> None:
+    token = bearer_token(request.headers.get("authorization"))
+    uuid.UUID(read_access_claims(token)[0])
+    uuid.UUID(read_access_claims(token)[0])
+
+
+def middleware_auth(request: Request) -> None:
+    authenticate_request(request)
+    request_token_claims(request, request.state.auth_token)
+
+
+def middleware_auth_cold(request: Request) -> None:
+    token_cache.clear()
+    middleware_auth(request)
+
+
+def measure(func, tokens: list[str], rounds: int) -> list[float]:
+    timings = []
+    for index in range(rounds):
+        request = build_request(tokens[index % len(tokens)])
+        started = time.perf_counter()
+        func(request)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings
+
+
+def run(rounds: int, users: int) -> None:
+    tokens = [create_access_token(uuid.uuid4()) for _ in range(users)]
+    cases = [
+        ("two decodes (before)", legacy_auth),
+        ("middleware, cold cache", middleware_auth_cold),
+        ("middleware, warm cache", middleware_auth),
+    ]
+    for label, func in cases:
+        token_cache.clear()
+        measure(func, tokens, min(rounds, 1000))
+        timings = measure(func, tokens, rounds)
+        ordered = sorted(timings)
+        print(
+            f"{label:<24} mean={statistics.fmean(timings):7.1f}us "
+            f"p50={ordered[len(ordered) // 2]:7.1f}us p99={ordered[int(len(ordered) * 0.99)]:7.1f}us"
+        )
+    print(f"token cache: {token_cache.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+    run(args.rounds, args.users)
+
+
+if __name__ == "__main__":
+    main()
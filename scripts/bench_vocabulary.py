@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.vocabulary import VOCABULARY_SORTS, WORD_STATUSES, browse_vocabulary  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import UserWord  # noqa: E402
+
+
+async def pick_profile(session, profile_id: uuid.UUID | None) -> uuid.UUID | None:
+    if profile_id is not None:
+        return profile_id
+    result = await session.execute(
+        select(UserWord.profile_id)
+        .group_by(UserWord.profile_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def walk(session, profile_id, sort: str, order: str, statuses, corpus_id, limit: int, max_pages: int):
+    timings = []
+    seen = set()
+    cursor = None
+    while len(timings) < max_pages:
+        started = time.perf_counter()
+        rows, cursor = await browse_vocabulary(profile_id, sort, order, statuses, corpus_id, limit, cursor, session)
+        timings.append((time.perf_counter() - started) * 1000)
+        for row in rows:
+            if row.word_id in seen:
+                raise AssertionError(f"{sort}/{order}: word {row.word_id} returned twice")
+            seen.add(row.word_id)
+        if cursor is None:
+            break
+    return timings, len(seen)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(profile_id: uuid.UUID | None, corpus_id: int | None, limit: int, max_pages: int) -> None:
+    async with AsyncSessionLocal() as session:
+        profile_id = await pick_profile(session, profile_id)
+        if profile_id is None:
+            print("No user_words rows")
+            await engine.dispose()
+            return
+        total = (
+            await session.execute(select(func.count()).where(UserWord.profile_id == profile_id))
+        ).scalar_one()
+        print(f"profile={profile_id} words={total} page={limit}")
+        status_sets = [("all", WORD_STATUSES)] + [(status, (status,)) for status in WORD_STATUSES]
+        for sort in VOCABULARY_SORTS:
+            for order in ("asc", "desc"):
+                for label, statuses in status_sets:
+                    timings, seen = await walk(
+                        session, profile_id, sort, order, statuses, corpus_id, limit, max_pages
+                    )
+                    print(
+                        f"{sort:<12} {order:<4} {label:<7} pages={len(timings):<5} rows={seen:<7} "
+                        f"p50={statistics.median(timings):.2f}ms p99={percentile(timings, 0.99):.2f}ms "
+                        f"max={max(timings):.2f}ms"
+                    )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile-id", type=uuid.UUID, default=None)
+    parser.add_argument("--corpus-id", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--max-pages", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.profile_id, args.corpus_id, args.limit, args.max_pages))
+
+
+if __name__ == "__main__":
+    main()
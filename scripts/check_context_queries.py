@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, event, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core.auth_cache import auth_cache  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import (  # noqa: E402
+    BackgroundJob,
+    Corpus,
+    CorpusWordStat,
+    LearningProfile,
+    Translation,
+    User,
+    UserCorpus,
+    UserProfile,
+    UserSettings,
+    UserWord,
+    Word,
+)
+
+SEED_WORDS = 5
+REVIEW_START = "/study/review/start?limit=5"
+
+
+def review_answers(state: dict) -> dict:
+    # Seeded words are reviewable whether or not they are due, so the submit
+    # keeps its shape after the first round moves them into the future.
+    started = state.get(REVIEW_START) or {}
+    words = [{"word_id": word_id, "answer": "", "quality": 3} for word_id in state["word_ids"]]
+    return {"session_id": started.get("session_id"), "words": words}
+
+
+def custom_word(state: dict) -> dict:
+    state["custom_words"] = state.get("custom_words", 0) + 1
+    return {"word": f"check{state['suffix']}c{state['custom_words']}", "translation": "проверка"}
+
+
+def custom_words_import(state: dict) -> dict:
+    state["custom_words"] = state.get("custom_words", 0) + 1
+    return {"text": f"check{state['suffix']}i{state['custom_words']} - импорт"}
+
+
+ENDPOINTS = [
+    ("GET", "/dashboard", None),
+    ("GET", "/stats/weak-words", None),
+    ("GET", "/tech/notifications", None),
+    ("GET", "/tech/notifications/outbox", None),
+    ("GET", "/tech/review-forecast?days=7", None),
+    ("GET", "/custom-words", None),
+    ("GET", "/social/challenges/my", None),
+    ("POST", "/study/review/seed?limit=5", None),
+    ("POST", REVIEW_START, None),
+    ("POST", "/study/review/submit", review_answers),
+    ("POST", "/study/learn/start", None),
+    ("PUT", "/tech/notifications", {"review_hour": 9, "push_enabled": True}),
+    ("POST", "/custom-words", custom_word),
+    ("POST", "/custom-words/import", custom_words_import),
+    ("POST", "/tech/jobs/refresh-stats", None),
+]
+CONTEXT_TABLES_RE = re.compile(r"\bFROM (users|user_profile|learning_profiles|user_settings)\b")
+
+
+class StatementLog:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def context_queries(self) -> int:
+        return sum(1 for statement in self.statements if CONTEXT_TABLES_RE.search(statement))
+
+
+async def call(method: str, path: str, token: str, payload: dict | None = None) -> tuple[int, bytes]:
+    raw_path, _, query = path.partition("?")
+    body = b"" if payload is None else json.dumps(payload).encode()
+    headers = [(b"authorization", f"Bearer {token}".encode()), (b"host", b"localhost")]
+    if payload is not None:
+        headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    messages = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    status_code = next(message["status"] for message in messages if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+    return status_code, body
+
+
+async def seed_user() -> dict:
+    suffix = uuid.uuid4().hex[:12]
+    async with AsyncSessionLocal() as session:
+        user = User(
+            email=f"check-context-{suffix}@example.com",
+            hashed_password=hash_password(suffix),
+            email_verified_at=datetime.now(timezone.utc),
+        )
+        corpus = Corpus(slug=f"check-context-{suffix}", name=f"check context {suffix}")
+        words = [Word(lemma=f"check{suffix}w{index}", lang="en") for index in range(SEED_WORDS)]
+        session.add_all([user, corpus, *words])
+        await session.flush()
+        profile = LearningProfile(user_id=user.id, native_lang="en", target_lang="ru", onboarding_done=True)
+        session.add(profile)
+        await session.flush()
+        session.add_all(
+            [
+                UserProfile(
+                    user_id=user.id,
+                    interface_lang="ru",
+                    theme="light",
+                    native_lang="en",
+                    target_lang="ru",
+                    onboarding_done=True,
+                    active_profile_id=profile.id,
+                ),
+                UserSettings(profile_id=profile.id, user_id=user.id),
+                UserCorpus(profile_id=profile.id, user_id=user.id, corpus_id=corpus.id),
+            ]
+        )
+        for rank, word in enumerate(words, start=1):
+            session.add(CorpusWordStat(corpus_id=corpus.id, word_id=word.id, count=1, rank=rank))
+            session.add(Translation(word_id=word.id, target_lang="ru", translation=f"слово{rank}", source="check"))
+        await session.commit()
+        return {
+            "suffix": suffix,
+            "user_id": user.id,
+            "corpus_id": corpus.id,
+            "word_ids": [word.id for word in words],
+        }
+
+
+async def drop_seed(state: dict) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(BackgroundJob).where(BackgroundJob.user_id == state["user_id"]))
+        await session.execute(delete(User).where(User.id == state["user_id"]))
+        await session.execute(delete(Word).where(Word.id.in_(state["word_ids"])))
+        await session.execute(delete(Corpus).where(Corpus.id == state["corpus_id"]))
+        await session.commit()
+
+
+async def existing_user(user_id: uuid.UUID) -> dict:
+    async with AsyncSessionLocal() as session:
+        profile_id = await session.scalar(
+            select(UserProfile.active_profile_id).where(UserProfile.user_id == user_id)
+        )
+        word_ids = []
+        if profile_id is not None:
+            result = await session.execute(
+                select(UserWord.word_id).where(UserWord.profile_id == profile_id).limit(SEED_WORDS)
+            )
+            word_ids = [row.word_id for row in result]
+    return {"suffix": uuid.uuid4().hex[:12], "user_id": user_id, "word_ids": word_ids}
+
+
+async def issue_token(user_id: uuid.UUID) -> str:
+    async with AsyncSessionLocal() as session:
+        auth_version = await session.scalar(select(User.auth_version).where(User.id == user_id))
+    return create_access_token(user_id, auth_version or 0)
+
+
+async def measure(method: str, path: str, payload, token: str, state: dict) -> tuple[int, bytes, StatementLog]:
+    if callable(payload):
+        payload = payload(state)
+    log = StatementLog()
+    event.listen(engine.sync_engine, "before_cursor_execute", log)
+    try:
+        status_code, body = await call(method, path, token, payload)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", log)
+    if status_code < 400:
+        state[path] = json.loads(body or b"null")
+    return status_code, body, log
+
+
+async def bench(token: str, state: dict, requests: int) -> None:
+    ttl_seconds = auth_cache.ttl_seconds
+    for label, ttl in (("auth cache off", 0.0), ("auth cache on", ttl_seconds or 30.0)):
+        auth_cache.ttl_seconds = ttl
+        auth_cache.clear()
+        statements = 0
+        context_queries = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            for method, path, payload in ENDPOINTS:
+                _status_code, _body, log = await measure(method, path, payload, token, state)
+                statements += len(log.statements)
+                context_queries += log.context_queries()
+        elapsed = time.perf_counter() - started
+        total = requests * len(ENDPOINTS)
+        print(
+            f"{label:<15} requests={total} statements/request={statements / total:.2f} "
+            f"context_queries/request={context_queries / total:.2f} avg={elapsed / total * 1000:.2f}ms"
+        )
+    auth_cache.ttl_seconds = ttl_seconds
+
+
+async def run(user_id: uuid.UUID | None, requests: int) -> int:
+    state = await existing_user(user_id) if user_id else await seed_user()
+    failures = 0
+    try:
+        token = await issue_token(state["user_id"])
+        for method, path, payload in ENDPOINTS:
+            if payload is review_answers and not state["word_ids"]:
+                print(f"skip  {method} {path}: user has no words to review")
+                continue
+            auth_cache.clear()
+            status_code, body, log = await measure(method, path, payload, token, state)
+            _warm_status, _warm_body, warm_log = await measure(method, path, payload, token, state)
+            context_queries = log.context_queries()
+            ok = status_code < 400 and context_queries <= 1
+            failures += 0 if ok else 1
+            detail = "" if status_code < 400 else f" detail={json.loads(body or b'{}').get('detail')}"
+            print(
+                f"{'ok' if ok else 'FAIL':<5} {method:<4} {path:<32} status={status_code} "
+                f"statements={len(log.statements):<3} context_queries={context_queries} "
+                f"warm_context_queries={warm_log.context_queries()}{detail}"
+            )
+        if requests:
+            await bench(token, state, requests)
+    finally:
+        if user_id is None:
+            await drop_seed(state)
+        await engine.dispose()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    # Without --user-id a throwaway user with its own corpus is created and removed afterwards.
+    parser.add_argument("--user-id", type=uuid.UUID)
+    parser.add_argument("--requests", type=int, default=0)
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.user_id, args.requests))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+os.environ.setdefault("SMTP_FROM", "app@example.com")
+
+from app.core.mailer import SMTPPool, build_email, is_permanent_error  # noqa: E402
+from app.core.outbox import EmailChannel, OutboxDispatcher, queue_email, retry_delay  # noqa: E402
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+class RecordingHandler:
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+        self.fail_data = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("refused@"):
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_data:
+            self.fail_data -= 1
+            return "451 try again later"
+        self.messages.append(envelope.content)
+        return "250 Message accepted"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_pool(port: int, size: int) -> SMTPPool:
+    return SMTPPool(size, host="127.0.0.1", port=port, user="", password="", tls=False, idle_seconds=60)
+
+
+async def check_reuse(handler: RecordingHandler, port: int, messages: int) -> None:
+    pool = make_pool(port, 2)
+    await asyncio.gather(
+        *(pool.send(build_email(f"user{index}@example.com", "hello", "body", "app@example.com")) for index in range(messages))
+    )
+    stats = pool.stats()
+    await pool.close()
+    assert len(handler.messages) == messages, len(handler.messages)
+    assert stats["connects"] <= 2, stats
+
+
+async def check_reconnect(handler: RecordingHandler, port: int) -> None:
+    pool = make_pool(port, 1)
+    await pool.send(build_email("a@example.com", "one", "body", "app@example.com"))
+    pool.connections[0].smtp.sock.shutdown(socket.SHUT_RDWR)
+    await pool.send(build_email("a@example.com", "two", "body", "app@example.com"))
+    stats = pool.stats()
+    await pool.close()
+    assert stats["connects"] == 2, stats
+    assert stats["sent"] == 2, stats
+
+
+async def check_errors(handler: RecordingHandler, port: int) -> None:
+    pool = make_pool(port, 1)
+    handler.fail_data = 1
+    transient = await deliver_message(pool, "a@example.com")
+    assert transient is not None and not is_permanent_error(transient), transient
+    assert await deliver_message(pool, "a@example.com") is None
+    permanent = await deliver_message(pool, "refused@example.com")
+    assert permanent is not None and is_permanent_error(permanent), permanent
+    assert await deliver_message(pool, "b@example.com") is None
+    stats = pool.stats()
+    await pool.close()
+    assert stats["connects"] == 1, stats
+
+
+async def deliver_message(pool: SMTPPool, to_email: str) -> Exception | None:
+    return await EmailChannel(pool, 0).deliver({"to": to_email, "subject": "check", "body": "body"})
+
+
+def check_backoff() -> None:
+    delays = [retry_delay(attempt) for attempt in range(1, 10)]
+    assert delays == sorted(delays), delays
+    assert delays[1] == delays[0] * 2, delays
+
+
+async def check_database(user_id: uuid.UUID, port: int, handler: RecordingHandler) -> None:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.models import NotificationOutbox, User
+
+    pool = make_pool(port, 2)
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+        item = queue_email(session, user.id, user.email, "verify", "check", "outbox check")
+        await session.commit()
+        item_id = item.id
+    before = len(handler.messages)
+    summary = await OutboxDispatcher([EmailChannel(pool, 0)]).dispatch_channel("email")
+    async with AsyncSessionLocal() as session:
+        item = await session.get(NotificationOutbox, item_id)
+        assert item.status == "sent", (item.status, item.error)
+        assert "body" not in (item.payload or {}), item.payload
+        await session.delete(item)
+        await session.commit()
+    await pool.close()
+    await engine.dispose()
+    assert summary["sent"] >= 1 and len(handler.messages) > before, summary
+
+
+async def run(user_id: uuid.UUID | None, messages: int) -> int:
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    checks = [
+        ("pooled connections", lambda: check_reuse(handler, port, messages)),
+        ("reconnect after drop", lambda: check_reconnect(handler, port)),
+        ("transient vs permanent", lambda: check_errors(handler, port)),
+    ]
+    if user_id is not None:
+        checks.append(("dispatch from outbox", lambda: check_database(user_id, port, handler)))
+    failures = 0
+    try:
+        check_backoff()
+        print("ok    backoff grows exponentially")
+    except AssertionError as exc:
+        failures += 1
+        print(f"FAIL  backoff: {exc}")
+    try:
+        for label, check in checks:
+            handler.messages.clear()
+            try:
+                await check()
+                print(f"ok    {label}")
+            except AssertionError as exc:
+                failures += 1
+                print(f"FAIL  {label}: {exc}")
+    finally:
+        controller.stop()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+    if Controller is None:
+        print("aiosmtpd is not installed: pip install aiosmtpd")
+        sys.exit(2)
+    failures = asyncio.run(run(args.user_id, args.messages))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, insert, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core.job_queue import JobWorker  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import BackgroundJob  # noqa: E402
+
+JOB_TYPE = "check_claim"
+
+
+async def remaining(run_id: str) -> int:
+    async with AsyncSessionLocal() as session:
+        return int(
+            await session.scalar(
+                select(func.count())
+                .select_from(BackgroundJob)
+                .where(
+                    BackgroundJob.job_type == JOB_TYPE,
+                    BackgroundJob.payload["run"].as_string() == run_id,
+                    BackgroundJob.status.in_(["pending", "running"]),
+                )
+            )
+            or 0
+        )
+
+
+async def run_workers(run_id: str, label: str, workers: int, concurrency: int) -> None:
+    async def handle(session, job: BackgroundJob) -> dict:
+        await asyncio.sleep(random.uniform(0, 0.005))
+        return {"worker": label}
+
+    stop = asyncio.Event()
+    pool = [JobWorker({JOB_TYPE: handle}, concurrency=concurrency, type_limits={}, listen=False) for _ in range(workers)]
+
+    async def watch() -> None:
+        while await remaining(run_id):
+            await asyncio.sleep(0.1)
+        stop.set()
+
+    await asyncio.gather(watch(), *(worker.run_forever(0.05, stop) for worker in pool))
+    await engine.dispose()
+
+
+def process_main(run_id: str, label: str, workers: int, concurrency: int) -> None:
+    asyncio.run(run_workers(run_id, label, workers, concurrency))
+
+
+async def seed(run_id: str, jobs: int) -> None:
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            insert(BackgroundJob),
+            [
+                {
+                    "job_type": JOB_TYPE,
+                    "status": "pending",
+                    "payload": {"run": run_id, "index": index},
+                    "run_after": now,
+                    "attempts": 0,
+                    "max_attempts": 1,
+                }
+                for index in range(jobs)
+            ],
+        )
+        await session.commit()
+
+
+async def verify(run_id: str, jobs: int) -> int:
+    async with AsyncSessionLocal() as session:
+        rows = (
+            await session.execute(
+                select(BackgroundJob.status, BackgroundJob.attempts, BackgroundJob.result).where(
+                    BackgroundJob.job_type == JOB_TYPE,
+                    BackgroundJob.payload["run"].as_string() == run_id,
+                )
+            )
+        ).all()
+        await session.execute(
+            delete(BackgroundJob).where(
+                BackgroundJob.job_type == JOB_TYPE,
+                BackgroundJob.payload["run"].as_string() == run_id,
+            )
+        )
+        await session.commit()
+    await engine.dispose()
+    done = sum(1 for row in rows if row.status == "done")
+    claimed_twice = sum(1 for row in rows if (row.attempts or 0) != 1)
+    per_worker: dict[str, int] = {}
+    for row in rows:
+        worker = (row.result or {}).get("worker", "-")
+        per_worker[worker] = per_worker.get(worker, 0) + 1
+    print(f"jobs={len(rows)} done={done} attempts!=1: {claimed_twice} per_process={per_worker}")
+    return 0 if len(rows) == jobs and done == jobs and claimed_twice == 0 else 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    run_id = uuid.uuid4().hex
+    asyncio.run(seed(run_id, args.jobs))
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=process_main, args=(run_id, f"p{index}", args.workers, args.concurrency))
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    print(f"processed in {time.perf_counter() - started:.2f}s")
+    failures = asyncio.run(verify(run_id, args.jobs))
+    if failures:
+        print("FAIL  a job was claimed more than once or not processed")
+        sys.exit(1)
+    print("ok    every job claimed exactly once")
+
+
+if __name__ == "__main__":
+    main()
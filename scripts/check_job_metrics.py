@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+
+
+from app.core.job_metrics import (  # noqa: E402
+    Histogram,
+    JobMetrics,
+    collect_job_metrics,
+    render_prometheus,
+    summarize,
+)
+from app.core.job_queue import JobWorker, RetryPolicy  # noqa: E402
+from app.models import BackgroundJob  # noqa: E402
+
+SAMPLE = re.compile(r'^[a-z_]+(\{([a-z_]+="[^"]*",?)+\})? -?[0-9.e+]+$|^[a-z_]+\{[^}]*le="\+Inf"\} [0-9]+$')
+
+
+def check_histogram() -> None:
+    histogram = Histogram((1, 5, 10))
+    for value in (0.5, 1, 3, 7, 20):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1], histogram.counts
+    assert histogram.quantile(0.5) == 5 and histogram.quantile(0.4) == 1, histogram.quantile(0.5)
+    assert histogram.quantile(1.0) == 10
+    merged = Histogram((1, 5, 10))
+    merged.merge(histogram.snapshot())
+    merged.merge(histogram.snapshot())
+    merged.merge(Histogram((1, 2)).snapshot())
+    assert merged.counts == [4, 2, 2, 2] and merged.count == 10, merged.counts
+    assert Histogram((1,)).quantile(0.5) is None
+
+
+def sample_metrics() -> dict:
+    worker_a, worker_b = JobMetrics(), JobMetrics()
+    for seconds in (0.2, 0.3, 40):
+        worker_a.observe_wait("refresh_stats", seconds)
+        worker_a.observe_outcome("refresh_stats", "done", 0.08, 1)
+    worker_b.observe_wait("send_report_notifications", 2)
+    worker_b.observe_outcome("send_report_notifications", "retry", 1.5, 1)
+    worker_b.observe_outcome("send_report_notifications", "dead", 1.5, 3)
+    metrics = JobMetrics()
+    metrics.merge(worker_a.snapshot())
+    metrics.merge(worker_b.snapshot())
+    queues = {
+        "refresh_stats": {"ready": 4, "scheduled": 0, "running": 1, "dead": 0, "oldest_pending_seconds": 125.5},
+        "import_words": {"ready": 0, "scheduled": 2, "running": 0, "dead": 1, "oldest_pending_seconds": 0.0},
+    }
+    return {"queues": queues, "metrics": metrics, "workers_alive": 2}
+
+
+def check_summary() -> None:
+    summary = summarize(sample_metrics())
+    assert set(summary) == {"refresh_stats", "import_words", "send_report_notifications"}, summary
+    refresh = summary["refresh_stats"]
+    assert refresh["ready"] == 4 and refresh["oldest_pending_seconds"] == 125.5, refresh
+    assert refresh["failure_rate"] == 0 and refresh["wait_p50_seconds"] == 0.5, refresh
+    assert refresh["wait_p95_seconds"] == 60, refresh
+    reports = summary["send_report_notifications"]
+    assert reports["failure_rate"] == 1 and reports["attempts_avg"] == 2, reports
+    assert reports["ready"] == 0, "job types without queued jobs report an empty queue"
+    assert summary["import_words"]["failure_rate"] is None
+
+
+def check_prometheus() -> None:
+    text = render_prometheus(sample_metrics())
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        if line.startswith("# "):
+            assert line.split()[1] in ("HELP", "TYPE"), line
+            continue
+        assert SAMPLE.match(line), f"bad sample line: {line}"
+    assert 'recallio_job_queue_depth{job_type="refresh_stats",state="ready"} 4' in text
+    assert 'recallio_job_oldest_pending_seconds{job_type="refresh_stats"} 125.5' in text
+    assert 'recallio_job_wait_seconds_bucket{job_type="refresh_stats",le="0.5"} 2' in text
+    assert 'recallio_job_wait_seconds_bucket{job_type="refresh_stats",le="+Inf"} 3' in text
+    assert 'recallio_job_outcomes_total{job_type="send_report_notifications",outcome="dead"} 1' in text
+    buckets = [
+        int(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith('recallio_job_run_seconds_bucket{job_type="send_report_notifications"')
+    ]
+    assert buckets == sorted(buckets) and buckets[-1] == 2, buckets
+
+
+async def check_database() -> None:
+    from sqlalchemy import delete, insert
+
+    from app.db.session import AsyncSessionLocal, engine
+    from app.models import JobMetricTotal, WorkerHeartbeat
+
+    ok_type, broken_type = "check_metrics_ok", "check_metrics_broken"
+
+    async def ok(session, job: BackgroundJob) -> dict:
+        await asyncio.sleep(0.05)
+        return {}
+
+    async def broken(session, job: BackgroundJob) -> dict:
+        raise RuntimeError("boom")
+
+    def build_worker() -> JobWorker:
+        return JobWorker(
+            {ok_type: ok, broken_type: broken},
+            concurrency=4,
+            type_limits={},
+            listen=False,
+            retry_policies={broken_type: RetryPolicy(3600, 3600, jitter=0)},
+        )
+
+    async def current() -> dict:
+        async with AsyncSessionLocal() as session:
+            return summarize(await collect_job_metrics(session, datetime.now(timezone.utc)))
+
+    worker = build_worker()
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as session:
+        rows = [{"job_type": ok_type, "run_after": now - timedelta(seconds=30)} for _ in range(3)]
+        rows.append({"job_type": broken_type, "run_after": now})
+        rows.append({"job_type": ok_type, "run_after": now + timedelta(hours=1)})
+        await session.execute(insert(BackgroundJob), [{**row, "status": "pending"} for row in rows])
+        await session.commit()
+    try:
+        # run_once flushes on exit and removes its heartbeat, like a graceful stop.
+        assert await worker.run_once(10) == 4
+        summary = await current()
+        assert summary[ok_type]["outcomes"]["done"] == 3, summary[ok_type]
+        assert summary[ok_type]["scheduled"] == 1 and summary[ok_type]["ready"] == 0, summary[ok_type]
+        assert summary[ok_type]["wait_p50_seconds"] >= 15, summary[ok_type]
+        assert summary[ok_type]["run_p50_seconds"] >= 0.05, summary[ok_type]
+        assert summary[broken_type]["outcomes"]["retry"] >= 1, summary[broken_type]
+        assert summary[broken_type]["scheduled"] == 1, "a failed job waits for its retry"
+        # A restarted worker adds to the totals instead of replacing them.
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                insert(BackgroundJob),
+                [{"job_type": ok_type, "status": "pending", "run_after": now} for _ in range(2)],
+            )
+            await session.commit()
+        worker = build_worker()
+        assert await worker.run_once(10) == 2
+        summary = await current()
+        assert summary[ok_type]["outcomes"]["done"] == 5, "counters must survive a worker restart"
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.job_type.in_((ok_type, broken_type))))
+            await session.execute(delete(WorkerHeartbeat).where(WorkerHeartbeat.worker_id == worker.worker_id))
+            await session.execute(delete(JobMetricTotal).where(JobMetricTotal.job_type.in_((ok_type, broken_type))))
+            await session.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", action="store_true", help="also run instrumented jobs through Postgres")
+    args = parser.parse_args()
+    checks = [
+        ("histogram buckets and merge", check_histogram),
+        ("per type summary", check_summary),
+        ("prometheus text format", check_prometheus),
+    ]
+    if args.db:
+        checks.append(("worker records metrics", lambda: asyncio.run(check_database())))
+    failures = 0
+    for label, check in checks:
+        try:
+            check()
+            print(f"ok    {label}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"FAIL  {label}: {exc}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
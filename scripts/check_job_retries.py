@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core.job_queue import (  # noqa: E402
+    JobWorker,
+    RetryPolicy,
+    apply_failure,
+    parse_retry_policies,
+    requeue_dead_jobs,
+)
+from app.models import BackgroundJob  # noqa: E402
+
+JOB_TYPE = "check_retry"
+
+
+class FakeClock:
+    def __init__(self, start: datetime) -> None:
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+def check_policy() -> None:
+    policy = RetryPolicy(30, 600, jitter=0)
+    delays = [policy.delay(attempt) for attempt in range(1, 8)]
+    assert delays == [30, 60, 120, 240, 480, 600, 600], delays
+    jittered = RetryPolicy(30, 600, jitter=0.25)
+    rng = random.Random(1)
+    samples = [jittered.delay(3, rng) for _ in range(1000)]
+    assert all(90 <= sample <= 120 for sample in samples), (min(samples), max(samples))
+    assert len({round(sample, 3) for sample in samples}) > 100, "jitter does not spread retries"
+    again = [jittered.delay(3, random.Random(1)) for _ in range(3)]
+    assert again[0] == samples[0], "seeded jitter is not reproducible"
+
+
+def check_parse() -> None:
+    policies = parse_retry_policies("a=10:100, b=5 ,bad")
+    assert set(policies) == {"a", "b"}, policies
+    assert (policies["a"].base_seconds, policies["a"].max_seconds) == (10, 100)
+    assert policies["b"].base_seconds == 5
+
+
+def check_fake_clock_failures() -> None:
+    clock = FakeClock(datetime(2026, 1, 1, tzinfo=timezone.utc))
+    policy = RetryPolicy(30, 600, jitter=0)
+    job = BackgroundJob(job_type=JOB_TYPE, status="running", attempts=0, max_attempts=3)
+    run_afters = []
+    for attempt in range(1, 4):
+        job.attempts = attempt
+        apply_failure(job, f"boom {attempt}", clock(), policy)
+        if attempt < 3:
+            assert job.status == "pending", job.status
+            assert job.run_after == clock() + timedelta(seconds=30 * 2 ** (attempt - 1)), job.run_after
+            run_afters.append(job.run_after)
+            clock.now = job.run_after
+    assert job.status == "dead", job.status
+    assert job.finished_at == clock(), job.finished_at
+    assert [entry["error"] for entry in job.errors] == ["boom 1", "boom 2", "boom 3"], job.errors
+    assert [entry["attempt"] for entry in job.errors] == [1, 2, 3], job.errors
+    assert run_afters == sorted(run_afters), run_afters
+
+
+async def check_database() -> None:
+    from sqlalchemy import delete, insert
+
+    from app.db.session import AsyncSessionLocal, engine
+
+    clock = FakeClock(datetime.now(timezone.utc))
+    calls = 0
+
+    async def broken(session, job: BackgroundJob) -> dict:
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("SMTP not configured")
+
+    worker = JobWorker(
+        {JOB_TYPE: broken},
+        concurrency=1,
+        type_limits={},
+        listen=False,
+        retry_policies={JOB_TYPE: RetryPolicy(30, 600, jitter=0)},
+        clock=clock,
+    )
+    async with AsyncSessionLocal() as session:
+        job_id = (
+            await session.execute(
+                insert(BackgroundJob)
+                .values(job_type=JOB_TYPE, status="pending", run_after=clock(), attempts=0, max_attempts=3)
+                .returning(BackgroundJob.id)
+            )
+        ).scalar_one()
+        await session.commit()
+    try:
+        assert await worker.run_once(5) == 1
+        # Same instant: the job must not be picked up again (no hot retry loop).
+        assert await worker.run_once(5) == 0
+        clock.advance(29)
+        assert await worker.run_once(5) == 0
+        clock.advance(1)
+        assert await worker.run_once(5) == 1
+        clock.advance(60)
+        assert await worker.run_once(5) == 1
+        clock.advance(3600)
+        assert await worker.run_once(5) == 0
+        assert calls == 3, calls
+        async with AsyncSessionLocal() as session:
+            job = await session.get(BackgroundJob, job_id)
+            assert job.status == "dead", job.status
+            assert len(job.errors or []) == 3, job.errors
+            requeued = await requeue_dead_jobs(session, job_type=JOB_TYPE, now=clock())
+            assert job_id in requeued, requeued
+            await session.refresh(job)
+            assert job.status == "pending" and job.attempts == 0, (job.status, job.attempts)
+            assert len(job.errors or []) == 3, "requeue must keep the error history"
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.id == job_id))
+            await session.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", action="store_true", help="also run a failing job through Postgres")
+    args = parser.parse_args()
+    checks = [
+        ("backoff grows and caps", check_policy),
+        ("retry policies parse", check_parse),
+        ("fake clock: pending -> dead", check_fake_clock_failures),
+    ]
+    if args.db:
+        checks.append(("worker retries on schedule", lambda: asyncio.run(check_database())))
+    failures = 0
+    for label, check in checks:
+        try:
+            check()
+            print(f"ok    {label}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"FAIL  {label}: {exc}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+
+from app.core.cron import CronSchedule, parse_schedule  # noqa: E402
+from app.core.job_queue import JobScheduler, enqueue  # noqa: E402
+from app.models import BackgroundJob, JobSchedule  # noqa: E402
+
+JOB_TYPE = "check_schedule"
+
+
+def at(*args: int) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def check_cron() -> None:
+    every_15 = CronSchedule("*/15 * * * *")
+    assert every_15.next_after(at(2026, 1, 1, 10, 7, 30)) == at(2026, 1, 1, 10, 15)
+    assert every_15.next_after(at(2026, 1, 1, 10, 15)) == at(2026, 1, 1, 10, 30)
+    assert every_15.next_after(at(2026, 12, 31, 23, 50)) == at(2027, 1, 1, 0, 0)
+    nightly = CronSchedule("17 3 * * *")
+    assert nightly.next_after(at(2026, 1, 1, 3, 17)) == at(2026, 1, 2, 3, 17)
+    # 2026-01-05 is a Monday.
+    weekdays = CronSchedule("0 9 * * 1-5")
+    assert weekdays.next_after(at(2026, 1, 3, 12, 0)) == at(2026, 1, 5, 9, 0)
+    sunday = CronSchedule("30 8 * * 7")
+    assert sunday.next_after(at(2026, 1, 5, 0, 0)) == at(2026, 1, 11, 8, 30)
+    leap = CronSchedule("0 0 29 2 *")
+    assert leap.next_after(at(2026, 3, 1, 0, 0)) == at(2028, 2, 29, 0, 0)
+    # Both day fields restricted: either one fires, as in cron.
+    either = CronSchedule("0 0 1 * 1")
+    assert either.next_after(at(2026, 1, 1, 0, 0)) == at(2026, 1, 5, 0, 0)
+    for bad in ("* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *", "0 0 31 2 *"):
+        try:
+            CronSchedule(bad).next_after(at(2026, 1, 1))
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} was accepted")
+
+
+def check_parse() -> None:
+    schedule = parse_schedule("a=*/5 * * * *; b = 0 3 * * 1,3 ;bad")
+    assert set(schedule) == {"a", "b"}, schedule
+    assert schedule["b"].expression == "0 3 * * 1,3", schedule["b"].expression
+    assert schedule["b"].weekdays == {1, 3}, schedule["b"].weekdays
+
+
+async def check_database() -> None:
+    from sqlalchemy import delete, func, select, update
+
+    from app.db.session import AsyncSessionLocal, engine
+
+    name = JOB_TYPE
+    key = f"{JOB_TYPE}:clicks"
+    try:
+        async with AsyncSessionLocal() as session:
+            ids = set()
+            for _click in range(5):
+                job_id, _created = await enqueue(session, JOB_TYPE, dedup_key=key)
+                await session.commit()
+                ids.add(job_id)
+            assert len(ids) == 1, f"repeated clicks queued {len(ids)} jobs"
+            await session.execute(update(BackgroundJob).where(BackgroundJob.id.in_(ids)).values(status="done"))
+            await session.commit()
+            job_id, created = await enqueue(session, JOB_TYPE, dedup_key=key)
+            await session.commit()
+            assert created and job_id not in ids, "a finished job must not absorb new requests"
+
+        async def click() -> int:
+            async with AsyncSessionLocal() as session:
+                job_id, _created = await enqueue(session, JOB_TYPE, dedup_key=f"{key}:race")
+                await session.commit()
+                return job_id
+
+        raced = await asyncio.gather(*(click() for _ in range(10)))
+        assert len(set(raced)) == 1, f"concurrent clicks queued {len(set(raced))} jobs"
+
+        start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        schedulers = [JobScheduler({name: CronSchedule("*/5 * * * *")}) for _ in range(3)]
+        fired = []
+        for minutes in (0, 5, 7, 10, 60):
+            now = start + timedelta(minutes=minutes)
+            for scheduler in schedulers:
+                async with AsyncSessionLocal() as session:
+                    fired.extend(await scheduler.tick(session, now))
+        async with AsyncSessionLocal() as session:
+            active = await session.scalar(
+                select(func.count())
+                .select_from(BackgroundJob)
+                .where(BackgroundJob.dedup_key == f"schedule:{name}", BackgroundJob.status == "pending")
+            )
+            entry = await session.get(JobSchedule, name)
+        # The first due tick queues the job; later ticks collapse into it while it is pending.
+        assert len(fired) == 1 and active == 1, (fired, active)
+        assert sum(scheduler.collapsed for scheduler in schedulers) >= 2
+        assert entry.next_run_at > start + timedelta(minutes=60), entry.next_run_at
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.job_type == JOB_TYPE))
+            await session.execute(delete(JobSchedule).where(JobSchedule.name == name))
+            await session.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", action="store_true", help="also check dedup and the scheduler against Postgres")
+    args = parser.parse_args()
+    checks = [
+        ("cron next run", check_cron),
+        ("schedule parses", check_parse),
+    ]
+    if args.db:
+        checks.append(("dedup and scheduler", lambda: asyncio.run(check_database())))
+    failures = 0
+    for label, check in checks:
+        try:
+            check()
+            print(f"ok    {label}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"FAIL  {label}: {exc}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+os.environ.setdefault("SMTP_FROM", "app@example.com")
+
+from app.core.mailer import SMTPPool  # noqa: E402
+from app.core.outbox import (  # noqa: E402
+    EmailChannel,
+    OutboxDispatcher,
+    RateLimiter,
+    TelegramChannel,
+    queue_email,
+    queue_telegram,
+)
+from app.core.telegram import TelegramPool  # noqa: E402
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+TOKEN = "check-token"
+
+
+class TelegramStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    messages: list[dict] = []
+    connections = 0
+    close_every = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with self.lock:
+            TelegramStandIn.connections += 1
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def reply(self, status: int, result: dict, close: bool = False) -> None:
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        form = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode()))
+        if self.path != f"/bot{TOKEN}/sendMessage":
+            self.reply(404, {"ok": False, "description": "Not Found"})
+            return
+        chat_id = form.get("chat_id", "")
+        if chat_id == "blocked":
+            self.reply(403, {"ok": False, "description": "Forbidden: bot was blocked by the user"})
+            return
+        if chat_id == "busy":
+            self.reply(429, {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 3}})
+            return
+        with self.lock:
+            TelegramStandIn.messages.append(form)
+            count = len(TelegramStandIn.messages)
+        close = bool(self.close_every) and count % self.close_every == 0
+        self.reply(200, {"ok": True, "result": {"message_id": count}}, close=close)
+
+
+class RecordingSMTP:
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content)
+        return "250 Message accepted"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def reset_stand_in(close_every: int = 0) -> None:
+    TelegramStandIn.messages = []
+    TelegramStandIn.connections = 0
+    TelegramStandIn.close_every = close_every
+
+
+def make_telegram_pool(port: int, size: int) -> TelegramPool:
+    return TelegramPool(size, base_url=f"http://127.0.0.1:{port}", token=TOKEN, idle_seconds=60)
+
+
+async def check_keep_alive(port: int, messages: int) -> None:
+    reset_stand_in()
+    pool = make_telegram_pool(port, 2)
+    channel = TelegramChannel(pool, 0)
+    errors = await asyncio.gather(
+        *(channel.deliver({"chat_id": str(index), "text": "hello"}) for index in range(messages))
+    )
+    stats = pool.stats()
+    await pool.close()
+    assert errors == [None] * messages, errors
+    assert len(TelegramStandIn.messages) == messages, len(TelegramStandIn.messages)
+    assert stats["connects"] <= 2 and TelegramStandIn.connections <= 2, (stats, TelegramStandIn.connections)
+
+
+async def check_server_close(port: int) -> None:
+    reset_stand_in(close_every=3)
+    pool = make_telegram_pool(port, 1)
+    channel = TelegramChannel(pool, 0)
+    errors = [await channel.deliver({"chat_id": "1", "text": str(index)}) for index in range(9)]
+    stats = pool.stats()
+    await pool.close()
+    assert errors == [None] * 9, errors
+    assert stats["connects"] == 3, stats
+
+
+async def check_errors(port: int) -> None:
+    reset_stand_in()
+    pool = make_telegram_pool(port, 1)
+    channel = TelegramChannel(pool, 0)
+    blocked = await channel.deliver({"chat_id": "blocked", "text": "x"})
+    busy = await channel.deliver({"chat_id": "busy", "text": "x"})
+    missing = await channel.deliver({"review_due": 3}, None)
+    ok = await channel.deliver({"chat_id": "1", "text": "x"})
+    stats = pool.stats()
+    await pool.close()
+    assert blocked is not None and channel.is_permanent(blocked), blocked
+    assert busy is not None and not channel.is_permanent(busy) and channel.retry_after(busy) == 3, busy
+    assert missing is not None and channel.is_permanent(missing), missing
+    assert ok is None, ok
+    assert stats["connects"] == 1, stats
+
+
+async def check_rate_limit(port: int, rate: float) -> None:
+    reset_stand_in()
+    pool = make_telegram_pool(port, 4)
+    channel = TelegramChannel(pool, rate)
+    count = int(rate) + 1
+    started = time.perf_counter()
+    await asyncio.gather(*(channel.deliver({"chat_id": "1", "text": str(index)}) for index in range(count)))
+    elapsed = time.perf_counter() - started
+    await pool.close()
+    assert elapsed >= (count - 1) / rate * 0.95, elapsed
+    limiter = RateLimiter(0)
+    started = time.perf_counter()
+    for _ in range(1000):
+        await limiter.wait()
+    assert time.perf_counter() - started < 0.5
+
+
+async def check_database(user_id: uuid.UUID, telegram_port: int, smtp_port: int, handler: RecordingSMTP) -> None:
+    from app.db.session import AsyncSessionLocal, engine
+    from app.models import NotificationOutbox, User
+
+    smtp = SMTPPool(2, host="127.0.0.1", port=smtp_port, user="", password="", tls=False, idle_seconds=60)
+    telegram = make_telegram_pool(telegram_port, 2)
+    dispatcher = OutboxDispatcher([EmailChannel(smtp, 0), TelegramChannel(telegram, 0)])
+    reset_stand_in()
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+        items = [queue_email(session, user.id, user.email, "check", "outbox check", f"email {index}") for index in range(5)]
+        items += [queue_telegram(session, user.id, "1", "check", f"telegram {index}") for index in range(5)]
+        blocked = queue_telegram(session, user.id, "blocked", "check", "never")
+        busy = queue_telegram(session, user.id, "busy", "check", "later")
+        await session.commit()
+        item_ids = [item.id for item in items]
+        blocked_id, busy_id = blocked.id, busy.id
+    before = len(handler.messages)
+    summary = await dispatcher.dispatch()
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = {
+                row.id: row
+                for row in (
+                    await session.execute(
+                        select(NotificationOutbox).where(NotificationOutbox.id.in_(item_ids + [blocked_id, busy_id]))
+                    )
+                ).scalars()
+            }
+            for item_id in item_ids:
+                assert rows[item_id].status == "sent" and rows[item_id].sent_at, (rows[item_id].status, rows[item_id].error)
+            assert rows[blocked_id].status == "failed" and "403" in rows[blocked_id].error, rows[blocked_id].error
+            assert rows[busy_id].status == "pending" and rows[busy_id].attempts == 1, rows[busy_id].status
+            for row in rows.values():
+                await session.delete(row)
+            await session.commit()
+    finally:
+        await dispatcher.close()
+        await engine.dispose()
+    assert len(handler.messages) - before == 5, len(handler.messages) - before
+    assert len(TelegramStandIn.messages) == 5, len(TelegramStandIn.messages)
+    assert summary["sent"] >= 10 and summary["failed"] >= 1 and summary["retried"] >= 1, summary
+
+
+async def run(user_id: uuid.UUID | None, messages: int, rate: float) -> int:
+    telegram_port = free_port()
+    server = ThreadingHTTPServer(("127.0.0.1", telegram_port), TelegramStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    checks = [
+        ("telegram keep-alive", lambda: check_keep_alive(telegram_port, messages)),
+        ("telegram reconnect on close", lambda: check_server_close(telegram_port)),
+        ("telegram transient vs permanent", lambda: check_errors(telegram_port)),
+        ("per-channel rate limit", lambda: check_rate_limit(telegram_port, rate)),
+    ]
+    controller = None
+    smtp_handler = RecordingSMTP()
+    if user_id is not None:
+        if Controller is None:
+            print("aiosmtpd is not installed: pip install aiosmtpd")
+            return 1
+        smtp_port = free_port()
+        controller = Controller(smtp_handler, hostname="127.0.0.1", port=smtp_port)
+        controller.start()
+        checks.append(
+            ("dispatch email + telegram", lambda: check_database(user_id, telegram_port, smtp_port, smtp_handler))
+        )
+    failures = 0
+    try:
+        for label, check in checks:
+            try:
+                await check()
+                print(f"ok    {label}")
+            except AssertionError as exc:
+                failures += 1
+                print(f"FAIL  {label}: {exc}")
+    finally:
+        server.shutdown()
+        if controller is not None:
+            controller.stop()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=20)
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.user_id, args.messages, args.rate))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.response_cache import MemoryBackend, RedisBackend, ResponseCache, redis_asyncio  # noqa: E402
+
+
+class BrokenBackend(MemoryBackend):
+    async def get_many(self, keys):
+        raise OSError("connection refused")
+
+
+def build_backends(redis_url: str | None) -> dict:
+    backends = {"memory": lambda: None}
+    try:
+        import fakeredis
+    except ImportError:
+        fakeredis = None
+    if fakeredis is not None:
+        backends["fakeredis"] = lambda: RedisBackend(fakeredis.FakeAsyncRedis())
+    if redis_url and redis_asyncio is not None:
+        backends["redis"] = lambda: RedisBackend.from_url(redis_url)
+    return backends
+
+
+async def check_roundtrip(cache: ResponseCache) -> None:
+    profile_id = uuid.uuid4()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return {"calls": calls}
+
+    first = await cache.get_or_set("check", profile_id, loader, 60)
+    second = await cache.get_or_set("check", profile_id, loader, 60)
+    assert first == second == {"calls": 1}, (first, second)
+    refreshed = await cache.get_or_set("check", profile_id, loader, 60, refresh=True)
+    assert refreshed == {"calls": 2}, refreshed
+    other = await cache.get_or_set("check", profile_id, loader, 60, variant="other")
+    assert other == {"calls": 3}, other
+
+
+async def check_ttl(cache: ResponseCache) -> None:
+    profile_id = uuid.uuid4()
+    await cache.set("check", profile_id, {"value": 1}, 0.2)
+    assert await cache.get("check", profile_id) == {"value": 1}
+    await asyncio.sleep(0.35)
+    assert await cache.get("check", profile_id) is None
+
+
+async def check_invalidation(cache: ResponseCache) -> None:
+    profile_id = uuid.uuid4()
+    other_id = uuid.uuid4()
+    await cache.set("check", profile_id, {"value": 1}, 60)
+    await cache.set("check", other_id, {"value": 2}, 60)
+    await cache.invalidate_profile(profile_id)
+    assert await cache.get("check", profile_id) is None
+    assert await cache.get("check", other_id) == {"value": 2}
+    await cache.set("check", profile_id, {"value": 3}, 60)
+    assert await cache.get("check", profile_id) == {"value": 3}
+
+
+async def check_stale_write(cache: ResponseCache) -> None:
+    profile_id = uuid.uuid4()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_loader():
+        started.set()
+        await release.wait()
+        return {"value": "stale"}
+
+    task = asyncio.create_task(cache.get_or_set("check", profile_id, slow_loader, 60))
+    await started.wait()
+    await cache.invalidate_profile(profile_id)
+    release.set()
+    assert await task == {"value": "stale"}
+    assert await cache.get("check", profile_id) is None
+
+
+async def check_single_flight(cache: ResponseCache, concurrency: int) -> None:
+    profile_id = uuid.uuid4()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return {"value": calls}
+
+    results = await asyncio.gather(
+        *(cache.get_or_set("check", profile_id, loader, 60) for _ in range(concurrency))
+    )
+    assert calls == 1, calls
+    assert all(result == {"value": 1} for result in results), results
+
+
+async def check_leader_cancelled(cache: ResponseCache) -> None:
+    profile_id = uuid.uuid4()
+    started = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.sleep(10)
+        await asyncio.sleep(0.05)
+        return {"value": calls}
+
+    leader = asyncio.create_task(cache.get_or_set("check", profile_id, loader, 60))
+    await started.wait()
+    waiters = [asyncio.create_task(cache.get_or_set("check", profile_id, loader, 60)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    leader.cancel()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert leader.cancelled(), "leader was not cancelled"
+    assert all(result == {"value": 2} for result in results), results
+    assert calls == 2, calls
+
+
+async def check_waiter_cancelled(cache: ResponseCache) -> None:
+    profile_id = uuid.uuid4()
+    started = asyncio.Event()
+
+    async def loader():
+        started.set()
+        await asyncio.sleep(0.1)
+        return {"value": 1}
+
+    leader = asyncio.create_task(cache.get_or_set("check", profile_id, loader, 60))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_set("check", profile_id, loader, 60))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert waiter.cancelled(), "a cancelled waiter must stay cancelled"
+    assert await leader == {"value": 1}
+
+
+async def check_release(cache: ResponseCache) -> None:
+    lock_key = f"{cache.prefix}:lock-check"
+    await cache._call("add", lock_key, b"other", 60)
+    await cache._release(lock_key, b"mine")
+    assert (await cache._call("get_many", [lock_key]))[0] == b"other", "released a lock held by someone else"
+    await cache._release(lock_key, b"other")
+    assert (await cache._call("get_many", [lock_key]))[0] is None, "own lock was not released"
+
+
+async def check_cross_process_lock(make_backend) -> None:
+    backend = make_backend()
+    left = ResponseCache(backend=backend, prefix="check")
+    right = ResponseCache(backend=backend, prefix="check")
+    profile_id = uuid.uuid4()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return {"value": calls}
+
+    results = await asyncio.gather(
+        left.get_or_set("check", profile_id, loader, 60),
+        right.get_or_set("check", profile_id, loader, 60),
+    )
+    assert calls == 1, calls
+    assert results[0] == results[1], results
+    await backend.close()
+
+
+async def check_fallback() -> None:
+    cache = ResponseCache(backend=BrokenBackend(10), prefix="check", retry_seconds=60)
+    profile_id = uuid.uuid4()
+
+    async def loader():
+        return {"value": 1}
+
+    assert await cache.get_or_set("check", profile_id, loader, 60) == {"value": 1}
+    assert cache.stats()["backend"] == "memory"
+    assert cache.stats()["errors"] == 1
+    assert await cache.get("check", profile_id) == {"value": 1}
+
+
+async def run(redis_url: str | None, concurrency: int) -> int:
+    failures = 0
+    checks = [
+        ("roundtrip", check_roundtrip),
+        ("ttl", check_ttl),
+        ("invalidation", check_invalidation),
+        ("stale write", check_stale_write),
+        ("single flight", lambda cache: check_single_flight(cache, concurrency)),
+        ("leader cancelled", check_leader_cancelled),
+        ("waiter cancelled", check_waiter_cancelled),
+        ("lock release", check_release),
+    ]
+    for name, make_backend in build_backends(redis_url).items():
+        for label, check in checks:
+            cache = ResponseCache(backend=make_backend(), prefix=f"check:{uuid.uuid4().hex}")
+            try:
+                await check(cache)
+                print(f"ok    {name:<10} {label}")
+            except AssertionError as exc:
+                failures += 1
+                print(f"FAIL  {name:<10} {label}: {exc}")
+            finally:
+                await cache.close()
+        if name == "memory":
+            continue
+        try:
+            await check_cross_process_lock(make_backend)
+            print(f"ok    {name:<10} cross-process lock")
+        except AssertionError as exc:
+            failures += 1
+            print(f"FAIL  {name:<10} cross-process lock: {exc}")
+    try:
+        await check_fallback()
+        print("ok    fallback   redis errors switch to memory")
+    except AssertionError as exc:
+        failures += 1
+        print(f"FAIL  fallback: {exc}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.redis_url, args.concurrency))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
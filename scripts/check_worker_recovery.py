@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, insert, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core.job_queue import JobWorker, RetryPolicy  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import BackgroundJob, WorkerHeartbeat  # noqa: E402
+
+JOB_TYPE = "check_recovery"
+LEASE_SECONDS = 60
+
+
+class FakeClock:
+    def __init__(self, start: datetime) -> None:
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+async def enqueue(run_after: datetime) -> int:
+    async with AsyncSessionLocal() as session:
+        job_id = (
+            await session.execute(
+                insert(BackgroundJob)
+                .values(job_type=JOB_TYPE, status="pending", run_after=run_after, attempts=0, max_attempts=3)
+                .returning(BackgroundJob.id)
+            )
+        ).scalar_one()
+        await session.commit()
+    return job_id
+
+
+async def load(job_id: int) -> BackgroundJob:
+    async with AsyncSessionLocal() as session:
+        return await session.get(BackgroundJob, job_id)
+
+
+def make_worker(handler, clock=None, name: str = "check") -> JobWorker:
+    options = {"clock": clock} if clock else {}
+    return JobWorker(
+        {JOB_TYPE: handler},
+        concurrency=1,
+        type_limits={},
+        listen=False,
+        retry_policies={JOB_TYPE: RetryPolicy(0, 0, jitter=0)},
+        worker_id=f"{name}-{os.getpid()}",
+        lease_seconds=LEASE_SECONDS,
+        heartbeat_seconds=0.2,
+        **options,
+    )
+
+
+async def check_stalled_worker() -> None:
+    clock = FakeClock(datetime.now(timezone.utc))
+    job_id = await enqueue(clock())
+    release = asyncio.Event()
+
+    async def hangs(session, job):
+        await release.wait()
+        return {"by": "stalled"}
+
+    async def quick(session, job):
+        return {"by": "rescuer"}
+
+    stalled = make_worker(hangs, clock, "stalled")
+    rescuer = make_worker(quick, clock, "rescuer")
+    assert await stalled.claim() == 1
+    clock.advance(LEASE_SECONDS - 1)
+    assert await rescuer.reap() == 0, "lease reaped before it expired"
+    clock.advance(2)
+    assert await rescuer.reap() == 1
+    job = await load(job_id)
+    assert job.status == "pending" and "stalled" in (job.last_error or ""), (job.status, job.last_error)
+    assert await rescuer.run_once(1) == 1
+    release.set()
+    await stalled.drain()
+    job = await load(job_id)
+    assert job.status == "done" and job.result == {"by": "rescuer"}, (job.status, job.result)
+    assert job.attempts == 2 and len(job.errors or []) == 1, (job.attempts, job.errors)
+    assert stalled.lost == 1 and stalled.completed == 0, stalled.stats()
+
+
+async def check_graceful_stop() -> None:
+    job_id = await enqueue(datetime.now(timezone.utc))
+    started = asyncio.Event()
+
+    async def slow(session, job):
+        started.set()
+        await asyncio.sleep(30)
+        return {}
+
+    worker = make_worker(slow, name="stopping")
+    stop = asyncio.Event()
+    task = asyncio.create_task(worker.run_forever(0.1, stop, grace=0.3))
+    await asyncio.wait_for(started.wait(), 10)
+    await asyncio.sleep(0.5)
+    async with AsyncSessionLocal() as session:
+        beat = await session.get(WorkerHeartbeat, worker.worker_id)
+        assert beat is not None and beat.running == 1, beat
+    began = time.perf_counter()
+    stop.set()
+    await task
+    elapsed = time.perf_counter() - began
+    job = await load(job_id)
+    assert elapsed < 3, elapsed
+    assert job.status == "pending" and job.attempts == 0, (job.status, job.attempts)
+    async with AsyncSessionLocal() as session:
+        assert await session.get(WorkerHeartbeat, worker.worker_id) is None, "heartbeat row left behind"
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(BackgroundJob).where(BackgroundJob.job_type == JOB_TYPE))
+        await session.execute(delete(WorkerHeartbeat).where(WorkerHeartbeat.worker_id.like(f"%-{os.getpid()}")))
+        await session.commit()
+
+
+async def run() -> int:
+    failures = 0
+    async with AsyncSessionLocal() as session:
+        leftover = await session.scalar(select(BackgroundJob.id).where(BackgroundJob.job_type == JOB_TYPE).limit(1))
+    if leftover:
+        await cleanup()
+    try:
+        for label, check in (
+            ("stalled worker is reaped and loses ownership", check_stalled_worker),
+            ("SIGTERM-style stop releases running jobs", check_graceful_stop),
+        ):
+            try:
+                await check()
+                print(f"ok    {label}")
+            except AssertionError as exc:
+                failures += 1
+                print(f"FAIL  {label}: {exc}")
+            finally:
+                await cleanup()
+    finally:
+        await engine.dispose()
+    return failures
+
+
+def main() -> None:
+    if asyncio.run(run()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 API_DIR = BASE_DIR / "api"
 sys.path.append(str(API_DIR))
 
+from app.core.learn_queue import invalidate_learn_queues  # noqa: E402
+from app.core.profile_counters import invalidate_profile_counters  # noqa: E402
+from app.core.word_index import word_index  # noqa: E402
 from app.db.session import AsyncSessionLocal  # noqa: E402
 from app.models import Corpus, CorpusWordStat, Translation, Word  # noqa: E402
 
@@ -293,6 +296,11 @@ async def run(sqlite_dir: Path, map_path: Path) -> None:
         if db_path.name in SKIP_FILES:
             continue
         await import_database(db_path, mapping)
+    async with AsyncSessionLocal() as session:
+        await invalidate_learn_queues(session)
+        await invalidate_profile_counters(session)
+        await session.commit()
+        await word_index.rebuild(session)
 
 
 def main() -> None:
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.learn_queue import check_learn_queue, rebuild_learn_queue  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.models import LearningProfile  # noqa: E402
+
+
+async def load_profiles(session, profile_id: uuid.UUID | None) -> list[LearningProfile]:
+    stmt = select(LearningProfile).where(LearningProfile.onboarding_done.is_(True))
+    if profile_id is not None:
+        stmt = stmt.where(LearningProfile.id == profile_id)
+    result = await session.execute(stmt.order_by(LearningProfile.created_at))
+    return result.scalars().all()
+
+
+async def rebuild(profile_id: uuid.UUID | None) -> None:
+    async with AsyncSessionLocal() as session:
+        profiles = await load_profiles(session, profile_id)
+        for profile in profiles:
+            queued = await rebuild_learn_queue(profile, session)
+            await session.commit()
+            print(f"Rebuilt {profile.id}: {queued} words")
+
+
+async def check(profile_id: uuid.UUID | None, fix: bool) -> int:
+    inconsistent = 0
+    async with AsyncSessionLocal() as session:
+        profiles = await load_profiles(session, profile_id)
+        for profile in profiles:
+            report = await check_learn_queue(profile, session)
+            if report["consistent"]:
+                continue
+            inconsistent += 1
+            print(
+                f"Drift {report['profile_id']}: expected={report['expected']} queued={report['queued']} "
+                f"missing={report['missing']} stale={report['stale']} misordered={report['misordered']}"
+            )
+            if fix:
+                await rebuild_learn_queue(profile, session)
+                await session.commit()
+        print(f"Checked {len(profiles)} profiles, {inconsistent} inconsistent")
+    return inconsistent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--profile-id", type=uuid.UUID, default=None)
+    parser.add_argument("--fix", action="store_true")
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        asyncio.run(rebuild(args.profile_id))
+    else:
+        inconsistent = asyncio.run(check(args.profile_id, args.fix))
+        if inconsistent and not args.fix:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
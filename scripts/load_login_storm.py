@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+
+def load_env_file(path: Path) -> None:
+    if not path.exists():
+        return
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or "=" not in stripped:
+            continue
+        key, value = stripped.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key:
+            os.environ.setdefault(key, value)
+
+
+load_env_file(BASE_DIR / ".env")
+
+from app.core.password_hashing import PasswordHasher, password_hasher  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User  # noqa: E402
+
+STUDY_PATH = "/study/review/start?limit=10"
+
+
+async def call(method: str, path: str, token: str | None = None, payload: dict | None = None) -> int:
+    raw_path, _, query = path.partition("?")
+    headers = [(b"host", b"localhost"), (b"content-type", b"application/json")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    sent = False
+    status_code = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+def summary(timings: list[float]) -> str:
+    if not timings:
+        return "n=0"
+    ordered = sorted(timings)
+    return (
+        f"n={len(ordered):<5} p50={ordered[len(ordered) // 2]:7.1f}ms "
+        f"p99={ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:7.1f}ms max={ordered[-1]:7.1f}ms"
+    )
+
+
+async def probe_loop(stop: asyncio.Event, interval: float, lags: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def storm(hasher: PasswordHasher, logins: int, concurrency: int, stored_hash: str) -> dict[str, int]:
+    outcomes = {"ok": 0, "busy": 0}
+    queue = iter(range(logins))
+
+    async def worker() -> None:
+        for _ in queue:
+            try:
+                await hasher.verify("wrong-password", stored_hash)
+                outcomes["ok"] += 1
+            except Exception:
+                outcomes["busy"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return outcomes
+
+
+async def run_loop_lag(kinds: list[str], workers: int, max_queue: int, logins: int, concurrency: int) -> None:
+    stored_hash = hash_password("correct-password")
+    for kind in kinds:
+        hasher = PasswordHasher(kind, workers, max_queue)
+        lags: list[float] = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_loop(stop, 0.005, lags))
+        started = time.perf_counter()
+        outcomes = await storm(hasher, logins, concurrency, stored_hash)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+        hasher.close()
+        print(f"{kind:<8} loop lag {summary(lags)} storm={elapsed:.1f}s {outcomes} {hasher.stats()}")
+
+
+async def study_latency(token: str, duration: float, interval: float) -> list[float]:
+    timings = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await call("POST", STUDY_PATH, token)
+        timings.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return timings
+
+
+async def http_storm(email: str, logins: int, concurrency: int) -> dict[int, int]:
+    statuses: dict[int, int] = {}
+    queue = iter(range(logins))
+
+    async def worker() -> None:
+        for _ in queue:
+            status_code = await call("POST", "/auth/login", payload={"email": email, "password": "wrong-password"})
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+
+async def run_http(user_id: uuid.UUID, kinds: list[str], logins: int, concurrency: int, duration: float) -> None:
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+    token = create_access_token(user.id, user.auth_version or 0)
+    print(f"idle     study {summary(await study_latency(token, duration, 0.01))}")
+    original_kind = password_hasher.kind
+    for kind in kinds:
+        password_hasher.close()
+        password_hasher.kind = kind
+        storm_task = asyncio.create_task(http_storm(user.email, logins, concurrency))
+        timings = await study_latency(token, duration, 0.01)
+        statuses = await storm_task
+        print(f"{kind:<8} study {summary(timings)} logins={statuses} {password_hasher.stats()}")
+    password_hasher.close()
+    password_hasher.kind = original_kind
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--executors", default="inline,thread,process")
+    parser.add_argument("--workers", type=int, default=password_hasher.workers)
+    parser.add_argument("--max-queue", type=int, default=password_hasher.max_queue)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    kinds = [kind.strip() for kind in args.executors.split(",") if kind.strip()]
+    if args.user_id is None:
+        asyncio.run(run_loop_lag(kinds, args.workers, args.max_queue, args.logins, args.concurrency))
+    else:
+        password_hasher.workers = max(1, args.workers)
+        password_hasher.max_queue = max(0, args.max_queue)
+        asyncio.run(run_http(args.user_id, kinds, args.logins, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.profile_counters import check_profile_counters, rebuild_profile_counters  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.models import LearningProfile  # noqa: E402
+
+
+async def load_profiles(session, profile_id: uuid.UUID | None) -> list[LearningProfile]:
+    stmt = select(LearningProfile).where(LearningProfile.onboarding_done.is_(True))
+    if profile_id is not None:
+        stmt = stmt.where(LearningProfile.id == profile_id)
+    result = await session.execute(stmt.order_by(LearningProfile.created_at))
+    return result.scalars().all()
+
+
+async def rebuild(profile_id: uuid.UUID | None) -> None:
+    async with AsyncSessionLocal() as session:
+        profiles = await load_profiles(session, profile_id)
+        for profile in profiles:
+            values = await rebuild_profile_counters(profile, session)
+            await session.commit()
+            print(
+                f"Rebuilt {profile.id}: known={values['known_words']} "
+                f"available={values['learn_available']} days={len(values['days'])}"
+            )
+
+
+async def reconcile(session, profile_id: uuid.UUID | None, fix: bool) -> dict:
+    profiles = await load_profiles(session, profile_id)
+    drifted = []
+    for profile in profiles:
+        report = await check_profile_counters(profile, session)
+        if report["consistent"]:
+            continue
+        drifted.append(report)
+        if fix:
+            await rebuild_profile_counters(profile, session)
+            await session.commit()
+    return {"checked": len(profiles), "drifted": drifted, "fixed": fix}
+
+
+async def check(profile_id: uuid.UUID | None, fix: bool) -> int:
+    async with AsyncSessionLocal() as session:
+        summary = await reconcile(session, profile_id, fix)
+    for report in summary["drifted"]:
+        print(
+            f"Drift {report['profile_id']}: known={report['known_words']} ({report['known_drift']:+d}) "
+            f"available={report['learn_available']} ({report['available_drift']:+d}) "
+            f"days={','.join(report['drifted_days']) or '-'}"
+        )
+    print(f"Checked {summary['checked']} profiles, {len(summary['drifted'])} inconsistent")
+    return len(summary["drifted"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--profile-id", type=uuid.UUID, default=None)
+    parser.add_argument("--fix", action="store_true")
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        asyncio.run(rebuild(args.profile_id))
+    else:
+        inconsistent = asyncio.run(check(args.profile_id, args.fix))
+        if inconsistent and not args.fix:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
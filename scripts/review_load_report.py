@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.api.study import profile_fuzz_seed  # noqa: E402
+from app.core.scheduler import days_until, simulate_review_load  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import UserSettings, UserWord  # noqa: E402
+
+DEFAULT_CAPACITY = 10
+BAR_WIDTH = 50
+
+
+async def load_profiles(profile_id: uuid.UUID | None) -> dict:
+    stmt = (
+        select(
+            UserWord.profile_id,
+            UserWord.word_id,
+            UserWord.repetitions,
+            UserWord.interval_days,
+            UserWord.ease_factor,
+            UserWord.next_review_at,
+            UserSettings.daily_review_words,
+        )
+        .outerjoin(UserSettings, UserSettings.profile_id == UserWord.profile_id)
+        .where(UserWord.next_review_at.is_not(None))
+    )
+    if profile_id is not None:
+        stmt = stmt.where(UserWord.profile_id == profile_id)
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(stmt)).fetchall()
+    profiles: dict = {}
+    for row in rows:
+        profiles.setdefault(row.profile_id, []).append(row)
+    return profiles
+
+
+def simulate(rows, days: int, now: datetime, success_rate: float, seed: int, smoothed: bool) -> list[int]:
+    capacity = rows[0].daily_review_words or DEFAULT_CAPACITY
+    return simulate_review_load(
+        [row.repetitions or 0 for row in rows],
+        [row.interval_days or 0 for row in rows],
+        [row.ease_factor or 2.5 for row in rows],
+        days_until([row.next_review_at for row in rows], now),
+        days,
+        success_rate=success_rate,
+        seed=seed,
+        word_ids=[row.word_id for row in rows] if smoothed else None,
+        fuzz_seed=profile_fuzz_seed(rows[0].profile_id) if smoothed else None,
+        capacity=capacity,
+    )
+
+
+def summarize(label: str, counts: list[int], capacity_total: int) -> None:
+    over = sum(1 for count in counts if count > capacity_total)
+    print(
+        f"{label:<7} total={sum(counts):<8} peak={max(counts):<6} "
+        f"mean={statistics.mean(counts):8.1f} stdev={statistics.pstdev(counts):8.1f} days_over_capacity={over}"
+    )
+
+
+def histogram(before: list[int], after: list[int], now: datetime) -> None:
+    peak = max(max(before), max(after), 1)
+    start = now.date()
+    for offset, (left, right) in enumerate(zip(before, after)):
+        day = start.fromordinal(start.toordinal() + offset)
+        left_bar = "#" * round(left / peak * BAR_WIDTH)
+        right_bar = "#" * round(right / peak * BAR_WIDTH)
+        print(f"{day.isoformat()} {left:>6} {left_bar:<{BAR_WIDTH}} | {right:>6} {right_bar}")
+
+
+async def run(profile_id: uuid.UUID | None, days: int, success_rate: float, seed: int, show_days: bool) -> None:
+    profiles = await load_profiles(profile_id)
+    await engine.dispose()
+    if not profiles:
+        print("No scheduled user_words")
+        return
+    now = datetime.now(timezone.utc)
+    before = [0] * days
+    after = [0] * days
+    capacity_total = 0
+    words = 0
+    for rows in profiles.values():
+        words += len(rows)
+        capacity_total += rows[0].daily_review_words or DEFAULT_CAPACITY
+        plain = simulate(rows, days, now, success_rate, seed, smoothed=False)
+        smooth = simulate(rows, days, now, success_rate, seed, smoothed=True)
+        before = [total + count for total, count in zip(before, plain)]
+        after = [total + count for total, count in zip(after, smooth)]
+    print(f"profiles={len(profiles)} words={words} days={days} capacity={capacity_total}")
+    summarize("before", before, capacity_total)
+    summarize("after", after, capacity_total)
+    if show_days:
+        histogram(before, after, now)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile-id", type=uuid.UUID, default=None)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--success-rate", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--summary-only", action="store_true")
+    args = parser.parse_args()
+    if args.days <= 0:
+        parser.error("--days must be positive")
+    asyncio.run(run(args.profile_id, args.days, args.success_rate, args.seed, not args.summary_only))
+
+
+if __name__ == "__main__":
+    main()
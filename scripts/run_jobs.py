@@ -2,17 +2,13 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import logging
 import os
-import smtplib
+import signal
 import sys
-import urllib.parse
-import urllib.request
 from datetime import datetime, timezone
-from email.message import EmailMessage
 from pathlib import Path
 
-from sqlalchemy import func, select
-
 BASE_DIR = Path(__file__).resolve().parents[1]
 API_DIR = BASE_DIR / "api"
 SCRIPTS_DIR = BASE_DIR / "scripts"
@@ -36,34 +32,34 @@ def load_env_file(path: Path) -> None:
 
 load_env_file(BASE_DIR / ".env")
 
+from app.api.auth import load_request_context  # noqa: E402
 from app.api.dashboard import get_dashboard  # noqa: E402
 from app.api.stats import weak_words  # noqa: E402
 from app.core.config import (  # noqa: E402
     ADMIN_EMAILS,
     ADMIN_TELEGRAM_CHAT_IDS,
-    SMTP_FROM,
-    SMTP_HOST,
-    SMTP_PASSWORD,
-    SMTP_PORT,
-    SMTP_TLS,
-    SMTP_USER,
-    TELEGRAM_BOT_TOKEN,
+    DB_POOL_SIZE,
+    JOB_CONCURRENCY,
+    JOB_SCHEDULE,
+    JOB_SHUTDOWN_GRACE_SECONDS,
+    JOB_TYPE_LIMITS,
 )
-from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.core.cron import parse_schedule  # noqa: E402
+from app.core.job_queue import JobScheduler, JobWorker, parse_type_limits  # noqa: E402
+from app.core.outbox import outbox_dispatcher, queue_email, queue_telegram  # noqa: E402
+from app.core.review_notifications import fan_out_review_notifications  # noqa: E402
+from app.core.translation_cache import translation_cache  # noqa: E402
+from app.core.word_index import REBUILD_JOB_TYPE, word_index  # noqa: E402
+from app.db.session import engine, warm_up_pool  # noqa: E402
 from app.models import (  # noqa: E402
     BackgroundJob,
     ContentReport,
     Corpus,
-    LearningProfile,
-    NotificationOutbox,
-    NotificationSettings,
-    Translation,
     User,
-    UserCustomWord,
-    UserWord,
 )
 
 import import_sqlite  # noqa: E402
+import profile_counters  # noqa: E402
 
 ISSUE_LABELS = {
     "typo": "\u041e\u043f\u0435\u0447\u0430\u0442\u043a\u0430",
@@ -81,67 +77,24 @@ SOURCE_LABELS = {
 }
 
 
-async def load_pending_jobs(session, limit: int):
-    now = datetime.now(timezone.utc)
-    result = await session.execute(
-        select(BackgroundJob)
-        .where(
-            BackgroundJob.status == "pending",
-            BackgroundJob.run_after <= now,
-        )
-        .order_by(BackgroundJob.created_at)
-        .limit(limit)
-    )
-    return result.scalars().all()
-
-
-async def mark_running(session, job: BackgroundJob) -> None:
-    job.status = "running"
-    job.started_at = datetime.now(timezone.utc)
-    job.attempts = (job.attempts or 0) + 1
-    job.updated_at = datetime.now(timezone.utc)
-    await session.commit()
-
-
-async def mark_done(session, job: BackgroundJob, result: dict | None = None) -> None:
-    job.status = "done"
-    job.result = result
-    job.last_error = None
-    job.finished_at = datetime.now(timezone.utc)
-    job.updated_at = datetime.now(timezone.utc)
-    await session.commit()
-
-
-async def mark_failed(session, job: BackgroundJob, message: str) -> None:
-    job.last_error = message
-    job.updated_at = datetime.now(timezone.utc)
-    if (job.attempts or 0) >= (job.max_attempts or 1):
-        job.status = "failed"
-    else:
-        job.status = "pending"
-    await session.commit()
-
-
 async def process_refresh_stats(session, job: BackgroundJob) -> dict:
     if not job.user_id:
         raise ValueError("job user_id is required")
-    result = await session.execute(select(User).where(User.id == job.user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+    context = await load_request_context(job.user_id, session)
+    if context is None:
         raise ValueError("user not found")
-    dashboard = await get_dashboard(refresh=True, user=user, db=session)
-    weak = await weak_words(limit=20, refresh=True, user=user, db=session)
+    dashboard = await get_dashboard(refresh=True, context=context, db=session)
+    weak = await weak_words(limit=20, refresh=True, context=context, db=session)
     return {"dashboard": True, "weak_words": True, "known_words": dashboard.known_words, "weak_total": weak.total}
 
 
 async def process_generate_report(session, job: BackgroundJob) -> dict:
     if not job.user_id:
         raise ValueError("job user_id is required")
-    result = await session.execute(select(User).where(User.id == job.user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+    context = await load_request_context(job.user_id, session)
+    if context is None:
         raise ValueError("user not found")
-    dashboard = await get_dashboard(refresh=True, user=user, db=session)
+    dashboard = await get_dashboard(refresh=True, context=context, db=session)
     report = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "known_words": dashboard.known_words,
@@ -154,82 +107,9 @@ async def process_generate_report(session, job: BackgroundJob) -> dict:
 
 
 async def process_send_review_notifications(session, job: BackgroundJob) -> dict:
-    now = datetime.now(timezone.utc)
-    settings_stmt = select(NotificationSettings)
-    if job.profile_id:
-        settings_stmt = settings_stmt.where(NotificationSettings.profile_id == job.profile_id)
-    settings_rows = (await session.execute(settings_stmt)).scalars().all()
-    created = 0
-    for settings in settings_rows:
-        if not (settings.email_enabled or settings.telegram_enabled or settings.push_enabled):
-            continue
-        if settings.review_hour is not None and now.hour < settings.review_hour:
-            continue
-        if settings.last_notified_at and settings.last_notified_at.date() == now.date():
-            continue
-
-        profile_result = await session.execute(
-            select(LearningProfile).where(LearningProfile.id == settings.profile_id)
-        )
-        learning_profile = profile_result.scalar_one_or_none()
-        if not learning_profile:
-            continue
-
-        due_subq = (
-            select(UserWord.word_id)
-            .where(
-                UserWord.profile_id == settings.profile_id,
-                UserWord.next_review_at.is_not(None),
-                UserWord.next_review_at <= now,
-            )
-            .subquery()
-        )
-        translation_subq = (
-            select(Translation.word_id)
-            .where(
-                Translation.word_id.in_(select(due_subq.c.word_id)),
-                Translation.target_lang == learning_profile.target_lang,
-            )
-        )
-        custom_subq = (
-            select(UserCustomWord.word_id)
-            .where(
-                UserCustomWord.profile_id == settings.profile_id,
-                UserCustomWord.target_lang == learning_profile.target_lang,
-                UserCustomWord.word_id.in_(select(due_subq.c.word_id)),
-            )
-        )
-        review_result = await session.execute(
-            select(func.count()).select_from(translation_subq.union(custom_subq).subquery())
-        )
-        review_due = int(review_result.scalar() or 0)
-        if review_due == 0:
-            continue
-
-        payload = {"review_due": review_due}
-        channels = []
-        if settings.email_enabled:
-            channels.append("email")
-        if settings.telegram_enabled:
-            channels.append("telegram")
-        if settings.push_enabled:
-            channels.append("push")
-        for channel in channels:
-            session.add(
-                NotificationOutbox(
-                    profile_id=settings.profile_id,
-                    user_id=settings.user_id,
-                    channel=channel,
-                    payload=payload,
-                    status="pending",
-                    scheduled_at=now,
-                )
-            )
-            created += 1
-        settings.last_notified_at = now
-
-    await session.commit()
-    return {"notifications_created": created}
+    summary = await fan_out_review_notifications(session, profile_id=job.profile_id)
+    outbox_dispatcher.kick()
+    return summary
 
 
 def build_report_message(report: ContentReport, corpus_name: str | None, reporter_email: str) -> tuple[str, str]:
@@ -249,35 +129,6 @@ def build_report_message(report: ContentReport, corpus_name: str | None, reporte
     return subject, "\n".join(parts)
 
 
-def send_email(recipients: set[str], subject: str, body: str) -> None:
-    if not SMTP_HOST:
-        raise ValueError("SMTP is not configured")
-    sender = SMTP_FROM or SMTP_USER or "english-web@local"
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = ", ".join(sorted(recipients))
-    msg.set_content(body)
-
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=15) as server:
-        if SMTP_TLS:
-            server.starttls()
-        if SMTP_USER:
-            server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
-
-
-def send_telegram(chat_id: str, text: str) -> None:
-    if not TELEGRAM_BOT_TOKEN:
-        raise ValueError("Telegram bot token is not configured")
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": chat_id, "text": text}
-    data = urllib.parse.urlencode(payload).encode("utf-8")
-    request = urllib.request.Request(url, data=data)
-    with urllib.request.urlopen(request, timeout=15) as response:
-        response.read()
-
-
 async def process_send_report_notifications(session, job: BackgroundJob) -> dict:
     payload = job.payload or {}
     report_id = payload.get("report_id")
@@ -299,30 +150,16 @@ async def process_send_report_notifications(session, job: BackgroundJob) -> dict
         reporter_email = reporter.email
 
     subject, body = build_report_message(report, corpus_name, reporter_email)
-    sent = 0
-    errors: list[str] = []
-
-    if ADMIN_EMAILS:
-        try:
-            send_email(ADMIN_EMAILS, subject, body)
-            sent += len(ADMIN_EMAILS)
-        except Exception as exc:
-            errors.append(f"email: {exc}")
-    if ADMIN_TELEGRAM_CHAT_IDS:
-        if not TELEGRAM_BOT_TOKEN:
-            errors.append("telegram: missing token")
-        else:
-            for chat_id in ADMIN_TELEGRAM_CHAT_IDS:
-                try:
-                    send_telegram(chat_id, body)
-                    sent += 1
-                except Exception as exc:
-                    errors.append(f"telegram {chat_id}: {exc}")
-
-    if sent == 0 and errors:
-        raise ValueError("; ".join(errors))
-
-    return {"sent": sent, "errors": errors}
+    queued = 0
+    for email in sorted(ADMIN_EMAILS):
+        queue_email(session, report.user_id, email, "report", subject, body)
+        queued += 1
+    for chat_id in sorted(ADMIN_TELEGRAM_CHAT_IDS):
+        queue_telegram(session, report.user_id, chat_id, "report", body)
+        queued += 1
+    await session.commit()
+    outbox_dispatcher.kick()
+    return {"queued": queued}
 
 
 async def process_import_words(session, job: BackgroundJob) -> dict:
@@ -330,44 +167,103 @@ async def process_import_words(session, job: BackgroundJob) -> dict:
     sqlite_dir = Path(payload.get("sqlite_dir") or "E:/Code/english_project/database")
     map_path = Path(payload.get("map_path") or "scripts/import_map.json")
     await import_sqlite.run(sqlite_dir, map_path)
+    translation_cache.clear()
     return {"imported": True, "sqlite_dir": str(sqlite_dir), "map_path": str(map_path)}
 
 
-async def handle_job(session, job: BackgroundJob) -> None:
-    await mark_running(session, job)
+async def process_reconcile_counters(session, job: BackgroundJob) -> dict:
+    payload = job.payload or {}
+    summary = await profile_counters.reconcile(session, job.profile_id, bool(payload.get("fix", True)))
+    return {
+        "checked": summary["checked"],
+        "drifted": len(summary["drifted"]),
+        "fixed": summary["fixed"],
+        "profiles": summary["drifted"][:50],
+    }
+
+
+async def process_rebuild_word_index(session, job: BackgroundJob) -> dict:
+    # Give up the dedup key before reading corpus_word_stats: an admin edit that
+    # commits during the rebuild then queues the next one instead of joining this.
+    job.dedup_key = None
+    await session.commit()
+    return await word_index.rebuild(session)
+
+
+HANDLERS = {
+    "refresh_stats": process_refresh_stats,
+    "send_review_notifications": process_send_review_notifications,
+    "import_words": process_import_words,
+    "generate_report": process_generate_report,
+    "send_report_notifications": process_send_report_notifications,
+    "reconcile_counters": process_reconcile_counters,
+    REBUILD_JOB_TYPE: process_rebuild_word_index,
+}
+
+
+async def dispatch_outbox() -> int:
+    summary = await outbox_dispatcher.dispatch()
+    return summary["sent"] + summary["retried"] + summary["failed"]
+
+
+async def run_once(worker: JobWorker, limit: int) -> int:
+    return await worker.run_once(limit) + await dispatch_outbox()
+
+
+async def run_loop(worker: JobWorker, interval: int) -> None:
+    stop = asyncio.Event()
+    dispatcher = asyncio.create_task(outbox_dispatcher.run_forever(interval, stop))
     try:
-        if job.job_type == "refresh_stats":
-            result = await process_refresh_stats(session, job)
-        elif job.job_type == "send_review_notifications":
-            result = await process_send_review_notifications(session, job)
-        elif job.job_type == "import_words":
-            result = await process_import_words(session, job)
-        elif job.job_type == "generate_report":
-            result = await process_generate_report(session, job)
-        elif job.job_type == "send_report_notifications":
-            result = await process_send_report_notifications(session, job)
-        else:
-            raise ValueError(f"unknown job type: {job.job_type}")
-        await mark_done(session, job, result=result)
-    except Exception as exc:
-        await mark_failed(session, job, str(exc))
-
-
-async def run_once(limit: int) -> int:
-    async with AsyncSessionLocal() as session:
-        jobs = await load_pending_jobs(session, limit)
-        if not jobs:
-            return 0
-        for job in jobs:
-            await handle_job(session, job)
-        return len(jobs)
-
-
-async def run_loop(limit: int, interval: int) -> None:
-    while True:
-        processed = await run_once(limit)
-        if processed == 0:
-            await asyncio.sleep(interval)
+        await worker.run_forever(interval, stop)
+    finally:
+        stop.set()
+        await dispatcher
+        await outbox_dispatcher.close()
+
+
+def install_stop_handlers(stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            signal.signal(signum, lambda *_args: loop.call_soon_threadsafe(stop.set))
+
+
+async def run_daemon(worker: JobWorker, interval: int, grace: float) -> None:
+    logger = logging.getLogger("run_jobs")
+    stop = asyncio.Event()
+    install_stop_handlers(stop)
+    # Each claim, job and the outbox dispatcher hold a connection at the same time.
+    wanted = worker.concurrency + 3
+    if wanted > DB_POOL_SIZE:
+        logger.warning("DB_POOL_SIZE=%s is below concurrency + 3 (%s), raise it to keep connections warm", DB_POOL_SIZE, wanted)
+    warmed = await warm_up_pool(wanted)
+    logger.info("worker %s started: concurrency=%s, %s connections warm", worker.worker_id, worker.concurrency, warmed)
+    dispatcher = asyncio.create_task(outbox_dispatcher.run_forever(interval, stop))
+    try:
+        await worker.run_forever(interval, stop, grace)
+    finally:
+        stop.set()
+        await dispatcher
+        await outbox_dispatcher.close()
+        await engine.dispose()
+        logger.info("worker %s stopped: %s", worker.worker_id, worker.stats())
+
+
+async def run_single(worker: JobWorker, limit: int) -> None:
+    try:
+        await run_once(worker, limit)
+    finally:
+        await outbox_dispatcher.close()
+
+
+def build_worker(concurrency: int, type_limits: list[str]) -> JobWorker:
+    limits = parse_type_limits(JOB_TYPE_LIMITS)
+    limits.update(parse_type_limits(",".join(type_limits)))
+    schedule = {job_type: cron for job_type, cron in parse_schedule(JOB_SCHEDULE).items() if job_type in HANDLERS}
+    scheduler = JobScheduler(schedule) if schedule else None
+    return JobWorker(HANDLERS, concurrency=concurrency, type_limits=limits, scheduler=scheduler)
 
 
 def main() -> None:
@@ -375,11 +271,19 @@ def main() -> None:
     parser.add_argument("--limit", type=int, default=5)
     parser.add_argument("--interval", type=int, default=15)
     parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--daemon", action="store_true", help="run until SIGTERM, with heartbeats and a warm pool")
+    parser.add_argument("--grace", type=float, default=JOB_SHUTDOWN_GRACE_SECONDS)
+    parser.add_argument("--concurrency", type=int, default=JOB_CONCURRENCY)
+    parser.add_argument("--type-limit", action="append", default=[], metavar="JOB_TYPE=N")
     args = parser.parse_args()
-    if args.loop:
-        asyncio.run(run_loop(args.limit, args.interval))
+    worker = build_worker(args.concurrency, args.type_limit)
+    if args.daemon:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+        asyncio.run(run_daemon(worker, args.interval, args.grace))
+    elif args.loop:
+        asyncio.run(run_loop(worker, args.interval))
     else:
-        asyncio.run(run_once(args.limit))
+        asyncio.run(run_single(worker, args.limit))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.api.study import sm2_next  # noqa: E402
+from app.core.scheduler import simulate_review_load, sm2_schedule  # noqa: E402
+
+EASE_STEPS = [0, 1.3, 1.36, 1.5, 2.0, 2.14, 2.5, 2.64, 2.8, 3.1]
+
+
+def build_cases(count: int, seed: int) -> list[tuple[int, int, int, float]]:
+    rng = random.Random(seed)
+    cases = []
+    for quality in range(6):
+        for repetitions in range(4):
+            for interval_days in (0, 1, 2, 4, 6, 10, 15):
+                for ease in EASE_STEPS:
+                    cases.append((quality, repetitions, interval_days, ease))
+    while len(cases) < count:
+        cases.append(
+            (
+                rng.randint(0, 5),
+                rng.randint(0, 20),
+                rng.randint(0, 400),
+                rng.choice([round(rng.uniform(1.3, 3.5), 2), rng.choice(EASE_STEPS)]),
+            )
+        )
+    return cases
+
+
+def check_parity(cases, now: datetime) -> int:
+    vectorized = sm2_schedule(
+        [case[0] for case in cases],
+        [case[1] for case in cases],
+        [case[2] for case in cases],
+        [case[3] for case in cases],
+        now,
+    )
+    mismatches = 0
+    for case, result in zip(cases, vectorized):
+        expected = sm2_next(case[0], case[1], case[2], case[3], now)
+        if expected != result:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch {case}: scalar={expected} vectorized={result}")
+    return mismatches
+
+
+def measure(cases, now: datetime) -> None:
+    started = time.perf_counter()
+    for case in cases:
+        sm2_next(case[0], case[1], case[2], case[3], now)
+    scalar = time.perf_counter() - started
+    started = time.perf_counter()
+    sm2_schedule(
+        [case[0] for case in cases],
+        [case[1] for case in cases],
+        [case[2] for case in cases],
+        [case[3] for case in cases],
+        now,
+    )
+    vectorized = time.perf_counter() - started
+    print(f"scalar     {scalar * 1000:8.2f} ms")
+    print(f"vectorized {vectorized * 1000:8.2f} ms")
+
+
+def simulate(words: int, days: int, seed: int) -> None:
+    rng = random.Random(seed)
+    repetitions = [rng.randint(0, 6) for _ in range(words)]
+    interval_days = [rng.randint(0, 60) for _ in range(words)]
+    ease = [round(rng.uniform(1.3, 2.8), 2) for _ in range(words)]
+    due = [rng.randint(0, 30) for _ in range(words)]
+    started = time.perf_counter()
+    counts = simulate_review_load(repetitions, interval_days, ease, due, days, seed=seed)
+    elapsed = time.perf_counter() - started
+    print(f"simulated words={words} days={days} in {elapsed * 1000:.2f} ms, peak={max(counts)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--sim-words", type=int, default=100000)
+    parser.add_argument("--sim-days", type=int, default=365)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    cases = build_cases(args.cases, args.seed)
+    mismatches = check_parity(cases, now)
+    print(f"cases={len(cases)} mismatches={mismatches}")
+    measure(cases, now)
+    simulate(args.sim_words, args.sim_days, args.seed)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
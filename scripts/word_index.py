@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import and_, func, or_, select
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+API_DIR = BASE_DIR / "api"
+sys.path.append(str(API_DIR))
+
+from app.core.word_index import word_index  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import CorpusWordStat, LearningProfile, UserCorpus, UserCustomWord, UserWord, Word  # noqa: E402
+
+
+async def count_available_sql(profile: LearningProfile, session) -> int:
+    corpora_subq = (
+        select(CorpusWordStat.word_id.label("word_id"))
+        .select_from(CorpusWordStat)
+        .join(UserCorpus, UserCorpus.corpus_id == CorpusWordStat.corpus_id)
+        .join(Word, Word.id == CorpusWordStat.word_id)
+        .outerjoin(
+            UserWord,
+            and_(UserWord.profile_id == profile.id, UserWord.word_id == CorpusWordStat.word_id),
+        )
+        .where(UserCorpus.profile_id == profile.id, UserCorpus.enabled.is_(True))
+        .where(Word.lang == profile.native_lang)
+        .where(
+            or_(
+                UserCorpus.target_word_limit == 0,
+                CorpusWordStat.rank <= UserCorpus.target_word_limit,
+            )
+        )
+        .where(UserWord.word_id.is_(None))
+    )
+    custom_subq = (
+        select(UserCustomWord.word_id.label("word_id"))
+        .select_from(UserCustomWord)
+        .join(Word, Word.id == UserCustomWord.word_id)
+        .outerjoin(
+            UserWord,
+            and_(UserWord.profile_id == profile.id, UserWord.word_id == UserCustomWord.word_id),
+        )
+        .where(
+            UserCustomWord.profile_id == profile.id,
+            UserCustomWord.target_lang == profile.target_lang,
+            Word.lang == profile.native_lang,
+            UserWord.word_id.is_(None),
+        )
+    )
+    combined = corpora_subq.union(custom_subq).subquery()
+    result = await session.execute(select(func.count()).select_from(combined))
+    return int(result.scalar() or 0)
+
+
+async def load_profiles(session, profile_id: uuid.UUID | None) -> list[LearningProfile]:
+    stmt = select(LearningProfile).where(LearningProfile.onboarding_done.is_(True))
+    if profile_id is not None:
+        stmt = stmt.where(LearningProfile.id == profile_id)
+    result = await session.execute(stmt.order_by(LearningProfile.created_at))
+    return result.scalars().all()
+
+
+def timed(samples: list[float], started: float) -> None:
+    samples.append((time.perf_counter() - started) * 1_000_000)
+
+
+def summary(label: str, samples: list[float]) -> str:
+    if not samples:
+        return f"{label}=-"
+    return f"{label} p50={statistics.median(samples):9.1f}us max={max(samples):9.1f}us"
+
+
+async def rebuild() -> None:
+    async with AsyncSessionLocal() as session:
+        started = time.perf_counter()
+        result = await word_index.rebuild(session)
+    await engine.dispose()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"Built {result['corpora']} corpus indexes, {result['words']} words in {elapsed:.1f} ms -> {word_index.path}")
+
+
+async def check(profile_id: uuid.UUID | None, limits: list[int]) -> int:
+    mismatches = 0
+    sql_times: list[float] = []
+    index_times: list[float] = []
+    coverage_times: list[float] = []
+    async with AsyncSessionLocal() as session:
+        started = time.perf_counter()
+        await word_index.ensure(session)
+        print(f"index ready in {(time.perf_counter() - started) * 1000:.1f} ms: {word_index.stats()}")
+        profiles = await load_profiles(session, profile_id)
+        for profile in profiles:
+            started = time.perf_counter()
+            expected = await count_available_sql(profile, session)
+            timed(sql_times, started)
+            started = time.perf_counter()
+            actual = await word_index.count_available(profile, session, fresh=True)
+            timed(index_times, started)
+            if expected != actual:
+                mismatches += 1
+                print(f"mismatch {profile.id}: sql={expected} index={actual}")
+            await word_index.profile_words(profile.id, session)
+            corpora = await session.execute(
+                select(UserCorpus.corpus_id).where(UserCorpus.profile_id == profile.id)
+            )
+            for corpus_id in corpora.scalars().all():
+                corpus = word_index.corpus(corpus_id, profile.native_lang)
+                if corpus is None:
+                    continue
+                words = await word_index.profile_words(profile.id, session)
+                words.learned_positions(corpus)
+                started = time.perf_counter()
+                await word_index.corpus_coverage(profile.id, corpus_id, profile.native_lang, limits, session)
+                timed(coverage_times, started)
+    await engine.dispose()
+    print(f"profiles={len(profiles)} mismatches={mismatches}")
+    print(summary("available sql   ", sql_times))
+    print(summary("available index ", index_times))
+    print(summary("coverage (warm) ", coverage_times))
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--profile-id", type=uuid.UUID, default=None)
+    parser.add_argument("--limits", default="500,1000,2000,5000,10000")
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        asyncio.run(rebuild())
+        return
+    limits = [int(item) for item in args.limits.split(",") if item.strip()]
+    if asyncio.run(check(args.profile_id, limits)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -109,7 +109,10 @@ export default function StatsPage() {
       return;
     }
     try {
-      const data = await getJson(`/stats/weak-words?limit=${DEFAULT_LIMIT}`, token);
+      const data = await getJson(
+        `/stats/weak-words?limit=${DEFAULT_LIMIT}&sort=${sortKey}&order=${sortDir}`,
+        token
+      );
       if (Array.isArray(data)) {
         setItems(data);
         setTotal(data.length);
@@ -126,7 +129,7 @@ export default function StatsPage() {
 
   useEffect(() => {
     loadStats();
-  }, []);
+  }, [sortKey, sortDir]);
 
   const sortOptions = [
     { value: "wrong", label: t.sortWrong },
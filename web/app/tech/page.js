@@ -12,6 +12,7 @@ const STATUS_TONE = {
   processing: "warn",
   done: "ok",
   failed: "danger",
+  dead: "danger",
   sent: "ok"
 };
 
@@ -65,6 +66,7 @@ const TEXT = {
       processing: "\u0412 \u0440\u0430\u0431\u043e\u0442\u0435",
       done: "\u0413\u043e\u0442\u043e\u0432\u043e",
       failed: "\u041e\u0448\u0438\u0431\u043a\u0430",
+      dead: "\u041e\u0441\u0442\u0430\u043d\u043e\u0432\u043b\u0435\u043d\u043e",
       sent: "\u041e\u0442\u043f\u0440\u0430\u0432\u043b\u0435\u043d\u043e"
     },
     channels: {
@@ -128,6 +130,7 @@ const TEXT = {
       processing: "Processing",
       done: "Done",
       failed: "Failed",
+      dead: "Stopped",
       sent: "Sent"
     },
     channels: {